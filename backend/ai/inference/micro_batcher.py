@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size=256, max_latency=0.002, n_features=None):
+        """
+        Coalesce concurrent prediction requests into single batched model calls.
+
+        Requests are collected until max_batch_size rows are queued or
+        max_latency seconds have passed since the first queued request, then
+        batch_fn is called once on the stacked rows. A request that cannot be
+        stacked or predicted fails on its own: malformed rows are rejected at
+        submit, and when a coalesced call raises, its requests are retried one
+        by one so only the offending ones receive the exception.
+
+        Parameters:
+        batch_fn (callable): Maps an (n, features) array to n predictions.
+        max_batch_size (int): Maximum rows per model call.
+        max_latency (float): Maximum time in seconds a request waits for company.
+        n_features (int): Expected row width; checked at submit when given.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.n_features = n_features
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, input_data):
+        """
+        Queue one sample (1-D) or several samples (2-D) for prediction.
+
+        Returns:
+        Future: Resolves to the predictions for exactly these rows, or holds
+        the ValueError of malformed input without entering a batch.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        try:
+            rows = np.asarray(input_data, dtype=float)
+            rows = rows.reshape(1, -1) if rows.ndim == 1 else rows
+            if rows.ndim != 2:
+                raise ValueError(f"Expected one or more samples, got an array of shape {rows.shape}")
+            if self.n_features is not None and rows.shape[1] != self.n_features:
+                raise ValueError(f"Expected {self.n_features} features per sample, got {rows.shape[1]}")
+        except (TypeError, ValueError) as exc:
+            future.set_exception(exc)
+            return future
+        self._queue.put((rows, future))
+        return future
+
+    def _collect(self):
+        """Block for the first request, then gather more until the size or latency limit."""
+        item = self._queue.get()
+        if item is None:
+            return None
+        pending = [item]
+        count = len(item[0])
+        deadline = time.perf_counter() + self.max_latency
+        while count < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the outer loop see the shutdown after this batch
+                break
+            pending.append(item)
+            count += len(item[0])
+        return pending
+
+    def _worker(self):
+        while True:
+            pending = self._collect()
+            if pending is None:
+                return
+            pending = [(rows, future) for rows, future in pending if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                predictions = np.asarray(self.batch_fn(np.vstack([rows for rows, _ in pending])))
+            except Exception as exc:
+                if len(pending) == 1:
+                    pending[0][1].set_exception(exc)
+                else:
+                    # one bad request must not fail the others coalesced with it
+                    self._run_each(pending)
+                continue
+            self.batches += 1
+            start = 0
+            for rows, future in pending:
+                future.set_result(predictions[start:start + len(rows)])
+                start += len(rows)
+            self.rows += start
+
+    def _run_each(self, pending):
+        for rows, future in pending:
+            try:
+                future.set_result(np.asarray(self.batch_fn(rows)))
+            except Exception as exc:
+                future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.rows += len(rows)
+
+    def close(self):
+        """Finish the queued requests and stop the worker thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
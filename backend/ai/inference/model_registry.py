@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import datetime
+import hashlib
+import itertools
+import threading
+
+import joblib
+
+from backend.config.settings import Config
+from backend.ai.inference.predictor import Predictor
+
+METADATA_FILE = 'metadata.json'
+ARTIFACT_FILE = 'model.pkl'
+ACTIVE_FILE = 'ACTIVE'
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, root=None, mmap_mode='r'):
+        """
+        Versioned model store with lazy, memory-mapped loading.
+
+        Layout: <root>/<name>/<version>/{model.pkl, metadata.json} and
+        <root>/<name>/ACTIVE holding the served version. Constructing the
+        registry touches no model file; a model is loaded on its first
+        prediction and re-loaded when its ACTIVE version changes.
+
+        Parameters:
+        root (str): Registry directory, defaults to Config.MODEL_REGISTRY_PATH.
+        mmap_mode (str): joblib mmap mode for the numpy arrays inside the artifacts.
+        """
+        self.root = root or Config.MODEL_REGISTRY_PATH
+        self.mmap_mode = mmap_mode
+        self._loaded = {}  # name -> (version, Predictor)
+        self._active = {}  # name -> (stat of the ACTIVE file, version)
+        self._lock = threading.Lock()
+
+    def _model_dir(self, name, version=None):
+        path = os.path.join(self.root, name)
+        return path if version is None else os.path.join(path, version)
+
+    def _reserve_version(self, name, version=None, overwrite=False):
+        """
+        Create the directory of a new version and return its label. Default
+        labels are microsecond timestamps, suffixed with a counter when taken;
+        the directory is created atomically, so concurrent registrations never
+        share one. An existing explicit version is refused unless overwrite.
+        """
+        os.makedirs(self._model_dir(name), exist_ok=True)
+        if version is not None:
+            path = self._model_dir(name, version)
+            if os.path.exists(os.path.join(path, METADATA_FILE)) and not overwrite:
+                raise ValueError(f"Version {version} of model {name} already exists")
+            os.makedirs(path, exist_ok=True)
+            return version
+        base = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        for attempt in itertools.count():
+            version = base if attempt == 0 else f"{base}-{attempt}"
+            try:
+                os.mkdir(self._model_dir(name, version))
+                return version
+            except FileExistsError:
+                continue
+
+    def versions(self, name):
+        """Registered versions of a model, oldest first."""
+        path = self._model_dir(name)
+        if not os.path.isdir(path):
+            return []
+        return sorted(v for v in os.listdir(path)
+                      if os.path.exists(os.path.join(path, v, METADATA_FILE)))
+
+    def active_version(self, name):
+        """
+        The version currently served for a model (latest when none is pinned).
+        The ACTIVE file is re-read only when its stat changes; activate()
+        replaces it with a new file, so a switch is seen on the next call.
+        """
+        active_file = os.path.join(self._model_dir(name), ACTIVE_FILE)
+        try:
+            stat = os.stat(active_file)
+        except FileNotFoundError:
+            versions = self.versions(name)
+            if not versions:
+                raise KeyError(f"Model not registered: {name}")
+            return versions[-1]
+        key = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        cached = self._active.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(active_file) as f:
+            version = f.read().strip()
+        self._active[name] = (key, version)
+        return version
+
+    def metadata(self, name, version=None):
+        version = version or self.active_version(name)
+        with open(os.path.join(self._model_dir(name, version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def version_path(self, name, version=None):
+        """Directory of a model version (the active one by default)."""
+        return self._model_dir(name, version or self.active_version(name))
+
+    def load_artifact(self, name, version=None):
+        """
+        Load a version's artifact as a private, writable copy (not memory-mapped),
+        e.g. as the starting point of further training.
+        """
+        return joblib.load(os.path.join(self.version_path(name, version), ARTIFACT_FILE))
+
+    def list_models(self):
+        """
+        Describe every registered model from its metadata files only.
+
+        Returns:
+        list: Dicts with name, versions, active version, loaded flag and the
+        active version's metadata (features, metrics, training hash ...).
+        """
+        if not os.path.isdir(self.root):
+            return []
+        models = []
+        for name in sorted(os.listdir(self.root)):
+            versions = self.versions(name)
+            if not versions:
+                continue
+            active = self.active_version(name)
+            models.append({
+                'name': name,
+                'versions': versions,
+                'active': active,
+                'loaded': self._loaded.get(name, (None,))[0] == active,
+                'metadata': self.metadata(name, active),
+            })
+        return models
+
+    def register(self, name, artifact, features=None, metrics=None, training_hash=None,
+                 version=None, activate=True, overwrite=False, **extra):
+        """
+        Store a new model version.
+
+        Parameters:
+        name (str): Model name, e.g. a topology id such as 'totem-pole-pfc'.
+        artifact: Path of a joblib file, a PFCModel, a save_model bundle or an estimator.
+        features (list): Input feature names.
+        metrics (dict): Evaluation metrics.
+        training_hash (str): Hash of the training data / configuration.
+        version (str): Version label, defaults to a unique microsecond timestamp.
+        activate (bool): Serve this version immediately.
+        overwrite (bool): Replace an existing version of the same label
+            instead of raising ValueError.
+        **extra: Additional metadata fields.
+
+        Returns:
+        str: The version label.
+        """
+        version = self._reserve_version(name, version, overwrite)
+        path = self._model_dir(name, version)
+        if isinstance(artifact, str):
+            artifact = joblib.load(artifact)
+        if hasattr(artifact, 'scaler_X') and hasattr(artifact, 'model'):
+            artifact = {'model': artifact.model, 'scaler_X': artifact.scaler_X,
+                        'scaler_y': artifact.scaler_y, 'trained': artifact.trained,
+                        'targets': getattr(artifact, 'targets', None),
+                        'members': getattr(artifact, 'members', None),
+                        'interval_scale': getattr(artifact, 'interval_scale', None),
+                        'confidence': getattr(artifact, 'confidence', None)}
+        artifact_path = os.path.join(path, ARTIFACT_FILE)
+        # uncompressed so that numpy arrays inside can be memory-mapped on load
+        joblib.dump(artifact, artifact_path)
+
+        metadata = dict(extra, name=name, version=version, features=features, metrics=metrics or {},
+                        training_hash=training_hash, artifact_hash=_file_hash(artifact_path),
+                        created=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        with open(os.path.join(path, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2, default=str)
+        if activate:
+            self.activate(name, version)
+        return version
+
+    def activate(self, name, version):
+        """Switch the served version; the next prediction picks it up without a restart."""
+        if version not in self.versions(name):
+            raise KeyError(f"Unknown version {version} of model {name}")
+        active_file = os.path.join(self._model_dir(name), ACTIVE_FILE)
+        with open(active_file + '.tmp', 'w') as f:
+            f.write(version)
+        os.replace(active_file + '.tmp', active_file)
+
+    def predictor(self, name, **predictor_kwargs):
+        """
+        Return the Predictor of the active version, loading it on first use and
+        swapping it when the active version has changed. Requests already
+        holding the previous Predictor finish on it; its micro-batching worker
+        is stopped once the requests queued on it are answered.
+        """
+        version = self.active_version(name)
+        loaded = self._loaded.get(name)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+        replaced = None
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is None or loaded[0] != version:
+                replaced = loaded
+                path = os.path.join(self._model_dir(name, version), ARTIFACT_FILE)
+                loaded = (version, Predictor(path, mmap_mode=self.mmap_mode, **predictor_kwargs))
+                self._loaded[name] = loaded
+        if replaced is not None:
+            replaced[1].close()
+        return loaded[1]
+
+    def unload(self, name):
+        """Drop a loaded model (stopping its batcher); it is loaded again on its next use."""
+        with self._lock:
+            loaded = self._loaded.pop(name, None)
+        if loaded is not None:
+            loaded[1].close()
+
+
+# Example usage
+if __name__ == "__main__":
+    from backend.simulation.pfc_engine import FEATURE_COLUMNS
+
+    registry = ModelRegistry()
+    registry.register('pfc', 'models/trained_pfc_model.pkl', features=FEATURE_COLUMNS)
+    for model in registry.list_models():
+        print(model['name'], model['active'], model['versions'])
+    print(registry.predictor('pfc').predict([230, 4, 30, 3e-4, 5e-4, 1e5, 0.25, 20, 0.005, 0.5, 0.1]))
@@ -1,9 +1,109 @@
+import threading
+
 import numpy as np
 import joblib
 
+from backend.ai.inference.micro_batcher import MicroBatcher
+from backend.ai.inference.compiled_mlp import export_mlp, CompiledEnsemble
+from backend.ai.inference.uncertainty import prediction_interval, interval_scale
+
 class Predictor:
-    def __init__(self, model_path):
-        self.model = joblib.load(model_path)
+    def __init__(self, model_path, max_batch_size=256, max_latency=0.002, compiled=False, mmap_mode=None):
+        """
+        Parameters:
+        model_path (str): A joblib file holding an estimator or a PFCModel.save_model bundle.
+        max_batch_size (int): Row limit of a coalesced model call (see submit).
+        max_latency (float): Seconds a submitted request may wait to be coalesced.
+        compiled (bool): Serve MLP models through the verified NumPy forward pass
+            with the scalers folded into the weights (see compiled_mlp).
+        mmap_mode (str): Memory-map the numpy arrays of the artifact (e.g. 'r').
+        """
+        loaded = joblib.load(model_path, mmap_mode=mmap_mode)
+        if isinstance(loaded, dict) and 'model' in loaded:
+            # PFCModel bundle: the estimator works on standardized inputs and outputs
+            self.model = loaded['model']
+            self.scaler_X = loaded.get('scaler_X')
+            self.scaler_y = loaded.get('scaler_y')
+            # output names of a multi-target surrogate, e.g. pfc_engine.SURROGATE_TARGETS
+            self.targets = loaded.get('targets')
+            members = loaded.get('members')
+            self.interval_scale = loaded.get('interval_scale')
+        else:
+            self.model = loaded
+            self.scaler_X = None
+            self.scaler_y = None
+            self.targets = None
+            members = None
+            self.interval_scale = None
+        # ensembles always run as one stacked forward pass over all members
+        self.ensemble = CompiledEnsemble.from_models(members, self.scaler_X, self.scaler_y) if members else None
+        # input width the model was fitted on (None when unknown), checked per submitted request
+        self.n_features = getattr(self.scaler_X, 'n_features_in_', None) or getattr(self.model, 'n_features_in_', None)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+        self.compiled = None
+        if compiled and self.ensemble is None and hasattr(self.model, 'coefs_'):
+            self.compiled = export_mlp({'model': self.model, 'scaler_X': self.scaler_X,
+                                        'scaler_y': self.scaler_y})
+
+    def predict_batch(self, input_data):
+        """
+        Predict many samples with a single model call.
+
+        Parameters:
+        input_data (array-like): Shape (n_samples, n_features), or one 1-D sample.
+
+        Returns:
+        array: One prediction per sample.
+        """
+        input_data = np.asarray(input_data, dtype=float)
+        if input_data.ndim == 1:
+            input_data = input_data.reshape(1, -1)
+        if self.ensemble is not None:
+            return self.ensemble.predict(input_data)
+        if self.compiled is not None:
+            return self.compiled.predict(input_data)
+        if self.scaler_X is not None:
+            input_data = self.scaler_X.transform(input_data)
+        prediction = self.model.predict(input_data)
+        if self.scaler_y is not None:
+            prediction = self.scaler_y.inverse_transform(prediction.reshape(len(input_data), -1))
+            prediction = prediction.ravel() if prediction.shape[1] == 1 else prediction
+        return prediction
+
+    def predict_interval(self, input_data, confidence=None):
+        """
+        Ensemble prediction interval from one stacked pass over all members.
+
+        Parameters:
+        input_data (array-like): Shape (n_samples, n_features), or one 1-D sample.
+        confidence (float): Central interval probability; by default the
+            calibrated width stored with the model (PFCModel.calibrate), else 90 %.
+
+        Returns:
+        dict: 'mean', 'std', 'lower' and 'upper', each (n_samples, n_outputs).
+        """
+        if self.ensemble is None:
+            raise ValueError("The model is not an ensemble; train it with PFCModel(n_members > 1)")
+        if confidence is None and self.interval_scale is not None:
+            scale = self.interval_scale
+        else:
+            scale = interval_scale(confidence or 0.9)
+        return prediction_interval(self.ensemble.forward(input_data), scale)
+
+    def predict_metrics(self, input_data):
+        """
+        All outputs of a multi-target model from one batched forward pass.
+
+        Returns:
+        dict: Target name -> array of one prediction per sample.
+        """
+        if not self.targets:
+            raise ValueError("The model has a single output; predict_metrics needs a multi-target model")
+        prediction = np.asarray(self.predict_batch(input_data)).reshape(-1, len(self.targets))
+        return {name: prediction[:, j] for j, name in enumerate(self.targets)}
 
     def predict(self, input_data):
         """
@@ -16,9 +116,37 @@ class Predictor:
         array: The predicted output.
         """
         input_data = np.array(input_data).reshape(1, -1)  # Reshape for a single sample
-        prediction = self.model.predict(input_data)
+        prediction = self.predict_batch(input_data)
         return prediction
 
+    def submit(self, input_data):
+        """
+        Queue a prediction request; concurrent requests are coalesced into one
+        model call (up to max_batch_size rows or max_latency seconds).
+
+        Parameters:
+        input_data (array-like): One sample (1-D) or several samples (2-D).
+
+        Returns:
+        Future: Resolves to the predictions for these samples.
+        """
+        batcher = self._batcher
+        if batcher is None:
+            # first submit: concurrent callers must share one batcher (and one worker thread)
+            with self._batcher_lock:
+                if self._batcher is None:
+                    self._batcher = MicroBatcher(self.predict_batch, self.max_batch_size, self.max_latency,
+                                                 n_features=self.n_features)
+                batcher = self._batcher
+        return batcher.submit(input_data)
+
+    def close(self):
+        """Stop the micro-batching worker, if it was started."""
+        with self._batcher_lock:
+            batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+
     def evaluate(self, input_data, true_output):
         """
         Evaluate the model's predictions against the true output.
@@ -30,11 +158,13 @@ class Predictor:
         Returns:
         float: The mean squared error of the predictions.
         """
-        predictions = self.predict(input_data)
+        predictions = self.predict_batch(input_data)
         mse = np.mean((predictions - true_output) ** 2)
         return mse
 
 # Example usage:
 # predictor = Predictor('path/to/your/model.pkl')
 # prediction = predictor.predict([feature1, feature2, feature3, ...])
-# mse = predictor.evaluate([feature1, feature2, feature3, ...], true_value)
\ No newline at end of file
+# predictions = predictor.predict_batch([[feature1, ...], [feature1, ...]])
+# future = predictor.submit([feature1, feature2, feature3, ...])  # coalesced with concurrent calls
+# mse = predictor.evaluate([feature1, feature2, feature3, ...], true_value)
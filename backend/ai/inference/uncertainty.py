@@ -0,0 +1,140 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from backend.simulation.result_cache import ResultCache
+from backend.simulation.circuit_simulator import CircuitSimulator
+from backend.simulation.pfc_engine import FEATURE_COLUMNS
+
+DEFAULT_CONFIDENCE = 0.9
+
+
+def interval_scale(confidence=DEFAULT_CONFIDENCE):
+    """Gaussian half-width of a central interval in standard deviations (1.645 for 90 %)."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2.0)
+
+
+def prediction_interval(member_outputs, scale):
+    """
+    Prediction interval from ensemble member outputs.
+
+    Parameters:
+    member_outputs (np.ndarray): Shape (n_members, n_samples, n_outputs).
+    scale (float or np.ndarray): Half-width in member standard deviations, per output.
+
+    Returns:
+    dict: 'mean', 'std', 'lower' and 'upper', each (n_samples, n_outputs).
+    """
+    outputs = np.asarray(member_outputs, dtype=float)
+    mean = outputs.mean(axis=0)
+    std = outputs.std(axis=0, ddof=1) if len(outputs) > 1 else np.zeros_like(mean)
+    half = np.asarray(scale, dtype=float) * std
+    return {'mean': mean, 'std': std, 'lower': mean - half, 'upper': mean + half}
+
+
+def conformal_scale(member_outputs, y_true, confidence=DEFAULT_CONFIDENCE):
+    """
+    Split-conformal calibration of the interval half-width: the confidence
+    quantile (with finite-sample correction) of |y - mean| / std over a
+    calibration set, per output. Ensembles are usually over-confident, so
+    this is typically larger than interval_scale(confidence).
+    """
+    outputs = np.asarray(member_outputs, dtype=float)
+    y_true = np.asarray(y_true, dtype=float).reshape(outputs.shape[1], -1)
+    mean = outputs.mean(axis=0)
+    std = np.maximum(outputs.std(axis=0, ddof=1), 1e-12)
+    scores = np.abs(y_true - mean) / std
+    level = min(np.ceil((len(scores) + 1) * confidence) / len(scores), 1.0)
+    return np.quantile(scores, level, axis=0)
+
+
+class UncertaintyRouter:
+    def __init__(self, predictor, max_half_width, targets=None, cache=None, simulate=None, **simulate_kwargs):
+        """
+        Fallback policy for an ensemble surrogate: every batch is predicted
+        with intervals in one stacked pass, and the rows whose interval is too
+        wide (typically queries outside the training distribution) are
+        simulated with CircuitSimulator instead. Simulated rows are cached by
+        their quantized feature values, so a revisited design costs a lookup.
+
+        The router has the predict_batch / targets interface of Predictor and
+        can stand in for it, e.g. in design_optimizer.surrogate_objective.
+
+        Parameters:
+        predictor (Predictor): Ensemble surrogate (see Predictor.predict_interval).
+        max_half_width (float or dict): Largest accepted interval half-width,
+            in target units; a dict gives one limit per target name.
+        targets (list): Simulation metric of every model output (pfc_engine
+            METRIC_COLUMNS names); defaults to the model's targets, or
+            ['efficiency'] for a single-output model.
+        cache (ResultCache): Cache of simulated rows, a private one by default.
+        simulate (callable): simulate(matrix) -> DataFrame with the target
+            columns; defaults to CircuitSimulator.simulate_batch.
+        """
+        self.predictor = predictor
+        self.targets = list(targets or getattr(predictor, 'targets', None) or ['efficiency'])
+        if isinstance(max_half_width, dict):
+            self.max_half_width = np.array([max_half_width.get(name, np.inf) for name in self.targets])
+        else:
+            self.max_half_width = np.full(len(self.targets), float(max_half_width))
+        self.cache = cache or ResultCache()
+        self.simulate = simulate or (lambda matrix: CircuitSimulator.simulate_batch(
+            matrix, columns=FEATURE_COLUMNS, **simulate_kwargs))
+        self.queries = 0
+        self.routed = 0
+        self.simulated = 0
+
+    def _simulated(self, rows):
+        """Simulated targets of the given feature rows, from the cache where possible."""
+        keys = [self.cache.key(dict(zip(FEATURE_COLUMNS, row.tolist())), namespace='surrogate-fallback')
+                for row in rows]
+        values = np.empty((len(rows), len(self.targets)))
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                values[i] = np.frombuffer(cached, dtype=np.float64)
+        if missing:
+            metrics = self.simulate(rows[missing])
+            self.simulated += len(missing)
+            simulated = np.column_stack([metrics[name].to_numpy(dtype=float) for name in self.targets])
+            for i, row in zip(missing, simulated):
+                values[i] = row
+                self.cache.put(keys[i], row.astype(np.float64).tobytes())
+        return values
+
+    def predict(self, X):
+        """
+        Predictions of a feature batch.
+
+        Returns:
+        dict: 'values' (n_samples, n_targets), 'lower' / 'upper' (the surrogate
+        interval; collapsed onto the value for simulated rows) and 'simulated'
+        (bool mask of the rows answered by the simulator).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        interval = self.predictor.predict_interval(X)
+        values, lower, upper = interval['mean'].copy(), interval['lower'].copy(), interval['upper'].copy()
+        routed = ((upper - lower) / 2.0 > self.max_half_width).any(axis=1)
+        if routed.any():
+            values[routed] = self._simulated(X[routed])
+            lower[routed] = upper[routed] = values[routed]
+        self.queries += len(X)
+        self.routed += int(routed.sum())
+        return {'values': values, 'lower': lower, 'upper': upper, 'simulated': routed}
+
+    def predict_batch(self, input_data):
+        values = self.predict(input_data)['values']
+        return values[:, 0] if values.shape[1] == 1 else values
+
+    def metrics(self):
+        """Query and fallback counters (routed rows, of which simulated, the rest cached) and cache statistics."""
+        return {
+            'queries': self.queries,
+            'routed': self.routed,
+            'simulated': self.simulated,
+            'routedRate': self.routed / self.queries if self.queries else 0.0,
+            'cache': self.cache.metrics(),
+        }
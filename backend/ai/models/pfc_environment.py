@@ -0,0 +1,144 @@
+import numpy as np
+
+from backend.simulation.pfc_engine import DEFAULT_PARAMETERS, TOPOLOGIES, resolve_topology
+from backend.ai.models.state_encoders import UniformEncoder
+
+# Changes of the line-current amplitude per action, per unit of the rated amplitude
+ACTIONS = np.array([-0.2, -0.05, 0.0, 0.05, 0.2])
+
+
+class PFCControlEnv:
+    def __init__(self, n_envs=256, parameters=None, topology='boost', rated_power=1000.0,
+                 input_voltage_range=(90.0, 265.0), steps_per_half_cycle=4, max_steps=200,
+                 load_step_probability=0.02, trip_error=0.25, bins=(15, 9, 5), seed=None):
+        """
+        Many parallel PFC voltage-loop environments stepped together.
+
+        Reduced-order model of a boost PFC stage: the inner current loop draws
+        i(t) = I |sin(wt)| and the agent adjusts the amplitude I. The bus
+        energy w = v^2 obeys (C / 2) dw/dt = p_in - p_loss - w / R, which is
+        linear in w and integrated exactly over each control step with the
+        step-averaged input and loss power (closed-form sin^2 / |sin| means).
+        Loads jump at random; an episode ends when the bus error exceeds
+        trip_error (charged as the worst in-band step cost for all remaining
+        steps) or after max_steps.
+
+        Parameters:
+        n_envs (int): Parallel environments.
+        parameters (dict): pfc_engine parameters (capacitor_value, output_voltage,
+            line_frequency, r_on, r_inductor, diode_drop); defaults from DEFAULT_PARAMETERS.
+        rated_power (float): Largest load (W); loads are drawn from 10-100 %.
+        steps_per_half_cycle (int): Control steps per half line cycle.
+        bins (tuple): Bins of the bus error, current mismatch and load used by
+            the default encoder; the line phase adds steps_per_half_cycle more.
+        """
+        p = dict(DEFAULT_PARAMETERS)
+        p.update(parameters or {})
+        spec = TOPOLOGIES[resolve_topology(topology)]
+        self.n_envs = n_envs
+        self.v_ref = p['output_voltage']
+        self.capacitance = p['capacitor_value']
+        self.omega = 2 * np.pi * p['line_frequency']
+        self.r_path = p['r_inductor'] + (2 if spec['synchronous'] else 1) * p['r_on']
+        self.v_static = spec['bridge_diodes'] * p['diode_drop']
+        self.rated_power = rated_power
+        self.input_voltage_range = input_voltage_range
+        self.steps_per_half_cycle = steps_per_half_cycle
+        self.dt = np.pi / self.omega / steps_per_half_cycle
+        self.max_steps = max_steps
+        self.load_step_probability = load_step_probability
+        self.trip_error = trip_error
+        # a trip is charged the worst regulating reward for every step left, so ending early never pays
+        self.trip_cost = 100.0 * trip_error + 0.5 * np.abs(ACTIONS).max()
+        # observation box (bus error, current mismatch, load fraction, phase slot)
+        self.observation_low = np.array([-0.1, -0.5, 0.1, 0.0])
+        self.observation_high = np.array([0.1, 0.5, 1.0, steps_per_half_cycle])
+        self.encoder = UniformEncoder(self.observation_low, self.observation_high,
+                                      tuple(bins) + (steps_per_half_cycle,))
+        self.n_states = self.encoder.n_keys
+        self.n_actions = len(ACTIONS)
+        self.rng = np.random.default_rng(seed)
+
+        # per-environment state
+        self.v = np.zeros(n_envs)
+        self.amplitude = np.zeros(n_envs)
+        self.load = np.zeros(n_envs)
+        self.v_peak = np.zeros(n_envs)
+        self.steps = np.zeros(n_envs, dtype=int)
+
+        # step-averaged sin^2 and |sin| for every phase slot of the half cycle
+        theta = np.pi * np.arange(steps_per_half_cycle + 1) / steps_per_half_cycle
+        width = np.diff(theta)
+        self._sin2 = 0.5 - (np.sin(2 * theta[1:]) - np.sin(2 * theta[:-1])) / (4 * width)
+        self._abs_sin = (np.cos(theta[:-1]) - np.cos(theta[1:])) / width
+
+    @staticmethod
+    def _balanced_amplitude(load, v_peak):
+        """Current amplitude that balances the load (p_in = V_pk I / 2)."""
+        return 2.0 * load / v_peak
+
+    def reset(self, mask=None):
+        """
+        Start new episodes for the environments in mask (all when omitted).
+
+        Returns:
+        np.ndarray: Observations of every environment, shape (n_envs, 4).
+        """
+        mask = np.ones(self.n_envs, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        n = int(mask.sum())
+        if n:
+            low, high = self.input_voltage_range
+            self.v_peak[mask] = np.sqrt(2.0) * self.rng.uniform(low, high, n)
+            self.load[mask] = self.rated_power * self.rng.uniform(0.1, 1.0, n)
+            self.v[mask] = self.v_ref * (1.0 + self.rng.uniform(-0.05, 0.05, n))
+            balanced = self._balanced_amplitude(self.load[mask], self.v_peak[mask])
+            self.amplitude[mask] = balanced * (1.0 + self.rng.uniform(-0.2, 0.2, n))
+            self.steps[mask] = 0
+        return self.observe()
+
+    def observe(self):
+        """(bus error, current mismatch, load fraction, phase slot) per environment."""
+        return np.stack([
+            self.v / self.v_ref - 1.0,
+            self.amplitude / self._balanced_amplitude(self.load, self.v_peak) - 1.0,
+            self.load / self.rated_power,
+            self.steps % self.steps_per_half_cycle,
+        ], axis=1)
+
+    def encode(self, observations):
+        """Uniform-bin state index of every observation row."""
+        return self.encoder.encode(observations)[:, 0]
+
+    def step(self, actions):
+        """
+        Apply one action per environment and advance one control step.
+
+        Returns:
+        tuple: (observations, rewards, terminated, truncated); terminated marks
+        trips, truncated the time limit. Finished environments are not reset
+        here, call reset(terminated | truncated) afterwards.
+        """
+        delta = ACTIONS[actions]
+        rated = self._balanced_amplitude(self.rated_power, self.v_peak)
+        self.amplitude = np.clip(self.amplitude + delta * rated, 0.0, 2.0 * rated)
+
+        slot = self.steps % self.steps_per_half_cycle
+        p_in = self.v_peak * self.amplitude * self._sin2[slot]
+        p_loss = (self.r_path * self.amplitude ** 2 * self._sin2[slot]
+                  + self.v_static * self.amplitude * self._abs_sin[slot])
+        r_load = self.v_ref ** 2 / self.load
+        decay = np.exp(-2.0 * self.dt / (r_load * self.capacitance))
+        energy = decay * self.v ** 2 + (1.0 - decay) * r_load * (p_in - p_loss)
+        self.v = np.sqrt(np.maximum(energy, 0.0))
+        self.steps += 1
+
+        jump = self.rng.random(self.n_envs) < self.load_step_probability
+        if jump.any():
+            self.load[jump] = self.rated_power * self.rng.uniform(0.1, 1.0, int(jump.sum()))
+
+        error = self.v / self.v_ref - 1.0
+        terminated = np.abs(error) > self.trip_error
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        rewards = (-100.0 * np.abs(error) - 0.5 * np.abs(delta)
+                   - self.trip_cost * (self.max_steps - self.steps) * terminated)
+        return self.observe(), rewards, terminated, truncated
@@ -0,0 +1,76 @@
+import numpy as np
+
+# Largest dense table chosen automatically (bytes); bigger key spaces are hashed
+DEFAULT_MEMORY_BUDGET = 64 * 2 ** 20
+GOLDEN_RATIO_64 = np.uint64(0x9E3779B97F4A7C15)
+
+
+class DenseQTable:
+    """One row of action values per key; exact but sized by the whole key space."""
+
+    kind = 'dense'
+
+    def __init__(self, n_keys, n_actions, dtype=np.float64):
+        self.n_actions = n_actions
+        self.table = np.zeros((n_keys, n_actions), dtype=dtype)
+
+    def rows(self, keys):
+        return np.asarray(keys)
+
+    def values(self, keys):
+        """Action values of shape keys.shape + (n_actions,)."""
+        return self.table[self.rows(keys)]
+
+    def add(self, keys, actions, deltas):
+        """Add deltas to the (key, action) cells; repeated cells accumulate."""
+        np.add.at(self.table, (self.rows(keys), actions), deltas)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def state_dict(self):
+        """Only the rows that were ever updated, as float32."""
+        rows = np.flatnonzero(np.any(self.table != 0, axis=1))
+        return {'rows': rows, 'values': self.table[rows].astype(np.float32),
+                'shape': np.array(self.table.shape)}
+
+    def load_state_dict(self, state):
+        self.table = np.zeros(tuple(state['shape']), dtype=self.table.dtype)
+        self.table[state['rows']] = state['values']
+
+
+class HashedQTable(DenseQTable):
+    """
+    Fixed-size table addressed by a multiplicative hash of the key.
+
+    Memory is capacity (rounded down to a power of two) x n_actions whatever
+    the size of the key space; colliding keys share a row (the hashing
+    trick), which tile coding and other generalizing encoders tolerate well.
+    """
+
+    kind = 'hashed'
+
+    def __init__(self, n_actions, capacity=2 ** 20, dtype=np.float32):
+        bits = max(int(np.floor(np.log2(capacity))), 1)
+        self.shift = np.uint64(64 - bits)
+        super().__init__(2 ** bits, n_actions, dtype)
+
+    def rows(self, keys):
+        hashed = np.asarray(keys, dtype=np.int64).view(np.uint64) * GOLDEN_RATIO_64
+        return (hashed >> self.shift).astype(np.intp)
+
+
+def build_storage(n_keys, n_actions, storage='auto', capacity=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Q storage for a key space: 'dense', 'hashed', or 'auto' (dense when the
+    full float64 table fits memory_budget, hashed otherwise).
+    """
+    if storage == 'auto':
+        storage = 'dense' if n_keys * n_actions * 8 <= memory_budget else 'hashed'
+    if storage == 'dense':
+        return DenseQTable(n_keys, n_actions)
+    if storage == 'hashed':
+        capacity = capacity or max(memory_budget // (n_actions * 4), 2)
+        return HashedQTable(n_actions, capacity)
+    raise ValueError(f"Unknown Q storage: {storage}")
@@ -1,50 +1,164 @@
+import json
+
 import numpy as np
-import random
+
+from backend.ai.models.pfc_environment import PFCControlEnv
+from backend.ai.models.q_storage import build_storage
+from backend.ai.models.state_encoders import build_encoder
 
 class ReinforcementLearningPFC:
-    def __init__(self, state_size, action_size, learning_rate=0.001, discount_factor=0.99):
-        self.state_size = state_size
-        self.action_size = action_size
+    def __init__(self, state_size=None, action_size=None, learning_rate=0.001, discount_factor=0.99, env=None,
+                 encoder=None, storage='auto', capacity=None, seed=None):
+        """
+        Q-learning on a vectorized PFC control environment.
+
+        Observations are turned into integer keys by a state encoder (uniform
+        bins give one key per state, tile coding one per tiling, whose values
+        are summed) and the action values live in a dense or hashed Q storage.
+        States, actions, rewards and next states are arrays of one entry per
+        parallel environment, so every step updates the whole batch at once.
+        Scalar states still work for single lookups.
+
+        Parameters:
+        state_size (int), action_size (int): Size of a dense key space and the
+            number of actions; default to the encoder's and the environment's.
+        env (PFCControlEnv): Environment; a default PFCControlEnv when omitted.
+        encoder: UniformEncoder or TileCodingEncoder; the environment's uniform bins by default.
+        storage (str): 'dense', 'hashed', or 'auto' (hashed once a dense table
+            would exceed q_storage.DEFAULT_MEMORY_BUDGET).
+        capacity (int): Rows of a hashed table.
+        seed (int): Seed of the exploration draws; by default they share the
+            environment's generator, so PFCControlEnv(seed=...) fixes the whole run.
+        """
+        self.env = env or PFCControlEnv()
+        self.encoder = encoder or self.env.encoder
+        self.state_size = state_size or self.encoder.n_keys
+        self.action_size = action_size or self.env.n_actions
         self.learning_rate = learning_rate
         self.discount_factor = discount_factor
-        self.q_table = np.zeros((state_size, action_size))
+        self.q = build_storage(self.state_size, self.action_size, storage, capacity)
+        self._terminal = None
+        self.rng = np.random.default_rng(seed) if seed is not None else self.env.rng
+
+    @property
+    def q_table(self):
+        """The dense table (dense storage only)."""
+        return self.q.table
+
+    @q_table.setter
+    def q_table(self, table):
+        self.q.table = table
+
+    @staticmethod
+    def _keys(state):
+        """Keys as (N, features): scalars and 1-D batches are single-feature states."""
+        keys = np.asarray(state)
+        return keys.reshape(1, 1) if keys.ndim == 0 else keys[:, None] if keys.ndim == 1 else keys
+
+    def q_values(self, state):
+        """Action values of shape (N, action_size), summed over the state's active keys."""
+        return self.q.values(self._keys(state)).sum(axis=-2)
+
+    def encode(self, observations):
+        return self.encoder.encode(observations)
 
     def choose_action(self, state, exploration_rate):
-        if random.uniform(0, 1) < exploration_rate:
-            return random.randint(0, self.action_size - 1)  # Explore
-        else:
-            return np.argmax(self.q_table[state])  # Exploit
+        if np.ndim(state) == 0:
+            if self.rng.random() < exploration_rate:
+                return int(self.rng.integers(self.action_size))  # Explore
+            return np.argmax(self.q_values(state)[0])  # Exploit
+        # epsilon-greedy for a batch of states
+        actions = np.argmax(self.q_values(state), axis=1)
+        explore = self.rng.random(len(actions)) < exploration_rate
+        actions[explore] = self.rng.integers(0, self.action_size, int(explore.sum()))
+        return actions
+
+    def update_q_value(self, state, action, reward, next_state, terminal=None):
+        """
+        Q-learning update for one transition or a batch of them.
 
-    def update_q_value(self, state, action, reward, next_state):
-        best_next_action = np.argmax(self.q_table[next_state])
-        td_target = reward + self.discount_factor * self.q_table[next_state][best_next_action]
-        td_delta = td_target - self.q_table[state][action]
-        self.q_table[state][action] += self.learning_rate * td_delta
+        The TD error is shared among the state's active keys. Transitions into
+        a terminal state do not bootstrap; updates that hit the same cell
+        within a batch are accumulated.
+        """
+        keys = self._keys(state)
+        action = np.atleast_1d(action)
+        best_next = self.q_values(next_state).max(axis=-1)
+        if terminal is not None:
+            best_next = np.where(terminal, 0.0, best_next)
+        td_target = reward + self.discount_factor * best_next
+        td_delta = td_target - self.q_values(keys)[np.arange(len(keys)), action]
+        step = self.learning_rate * td_delta / keys.shape[1]
+        self.q.add(keys, action[:, None], step[:, None])
 
     def train(self, episodes, exploration_rate_decay=0.995, min_exploration_rate=0.01):
+        """
+        Run the parallel environments until `episodes` episodes have finished.
+
+        The exploration rate decays by exploration_rate_decay per finished episode.
+
+        Returns:
+        dict: 'returns' (total reward of every finished episode, in order),
+        'steps' (environment steps taken) and 'exploration_rate'.
+        """
         exploration_rate = 1.0
-        for episode in range(episodes):
-            state = self.reset_environment()  # Reset environment for new episode
-            done = False
-            
-            while not done:
-                action = self.choose_action(state, exploration_rate)
-                next_state, reward, done = self.step(action)  # Take action and observe result
-                self.update_q_value(state, action, reward, next_state)
-                state = next_state
-            
-            exploration_rate = max(min_exploration_rate, exploration_rate * exploration_rate_decay)
+        state = self.reset_environment()
+        episode_return = np.zeros(len(state))
+        returns, steps, finished = [], 0, 0
+
+        while finished < episodes:
+            action = self.choose_action(state, exploration_rate)
+            next_state, reward, done = self.step(action)  # Take action and observe result
+            self.update_q_value(state, action, reward, next_state, self._terminal)
+            episode_return += reward
+            steps += len(state)
+
+            if done.any():
+                returns.extend(episode_return[done])
+                episode_return[done] = 0.0
+                finished += int(done.sum())
+                exploration_rate = max(min_exploration_rate,
+                                       exploration_rate * exploration_rate_decay ** int(done.sum()))
+                next_state = self.encode(self.env.reset(done))
+            state = next_state
+
+        return {'returns': np.array(returns), 'steps': steps, 'exploration_rate': exploration_rate}
 
     def reset_environment(self):
-        # Implement environment reset logic
-        pass
+        return self.encode(self.env.reset())
 
     def step(self, action):
-        # Implement action step logic
-        pass
+        observations, reward, terminated, truncated = self.env.step(action)
+        self._terminal = terminated
+        return self.encode(observations), reward, terminated | truncated
+
+    def policy(self, observations):
+        """Greedy actions for a batch of observations."""
+        return np.argmax(self.q_values(self.encode(observations)), axis=1)
 
     def save_model(self, file_path):
-        np.save(file_path, self.q_table)
+        """
+        Save the encoder configuration and the updated Q rows (float32,
+        compressed) to one .npz file at file_path.
+        """
+        state = self.q.state_dict()
+        meta = {'storage': self.q.kind, 'encoder': self.encoder.kind, 'encoder_config': self.encoder.config(),
+                'state_size': self.state_size, 'action_size': self.action_size}
+        with open(file_path, 'wb') as f:
+            np.savez_compressed(f, meta=np.array(json.dumps(meta)), **state)
 
     def load_model(self, file_path):
-        self.q_table = np.load(file_path)
\ No newline at end of file
+        """Load a model saved by save_model; a plain .npy dense Q table also loads."""
+        data = np.load(file_path)
+        if isinstance(data, np.ndarray):
+            self.q = build_storage(*data.shape, storage='dense')
+            self.q.table = data
+            self.state_size, self.action_size = data.shape
+            return
+        with data:
+            meta = json.loads(str(data['meta']))
+            self.encoder = build_encoder(meta['encoder'], meta['encoder_config'])
+            self.state_size, self.action_size = meta['state_size'], meta['action_size']
+            self.q = build_storage(self.state_size, self.action_size, meta['storage'],
+                                   capacity=int(data['shape'][0]))
+            self.q.load_state_dict({key: data[key] for key in ('rows', 'values', 'shape')})
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class UniformEncoder:
+    """
+    Uniform bins over a box of continuous observations.
+
+    Every observation maps to one integer key, the raveled bin index; values
+    outside [low, high] fall into the edge bins.
+    """
+
+    kind = 'uniform'
+
+    def __init__(self, low, high, bins):
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.bins = np.broadcast_to(np.asarray(bins, dtype=np.int64), self.low.shape).copy()
+        if np.prod(self.bins.astype(float)) >= 2 ** 63:
+            raise ValueError("Too many bins for 64-bit state keys")
+        self.n_features = 1
+        self.n_keys = int(np.prod(self.bins))
+        self._scale = self.bins / (self.high - self.low)
+
+    def encode(self, observations):
+        """Keys of shape (N, 1) for observations of shape (N, D)."""
+        index = ((np.asarray(observations, dtype=float) - self.low) * self._scale).astype(np.int64)
+        np.clip(index, 0, self.bins - 1, out=index)
+        return np.ravel_multi_index(index.T, self.bins)[:, None]
+
+    def config(self):
+        return {'low': self.low.tolist(), 'high': self.high.tolist(), 'bins': self.bins.tolist()}
+
+
+class TileCodingEncoder:
+    """
+    Tile coding: n_tilings uniform grids over the same box, each shifted by a
+    fraction of a tile along an asymmetric displacement (1, 3, 5, ...), so an
+    observation activates one tile per tiling and nearby observations share
+    most of their tiles. Q values are the sum over the active tiles.
+    """
+
+    kind = 'tile'
+
+    def __init__(self, low, high, bins, n_tilings=8):
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.bins = np.broadcast_to(np.asarray(bins, dtype=np.int64), self.low.shape).copy()
+        self.n_tilings = int(n_tilings)
+        # one extra tile per dimension holds the shifted upper edge
+        self._tiles = self.bins + 1
+        tiles_per_tiling = np.prod(self._tiles.astype(float))
+        if tiles_per_tiling * self.n_tilings >= 2 ** 63:
+            raise ValueError("Too many tiles for 64-bit state keys")
+        self.n_features = self.n_tilings
+        self.n_keys = int(tiles_per_tiling) * self.n_tilings
+        self._scale = self.bins / (self.high - self.low)
+        displacement = 2 * np.arange(len(self.low)) + 1
+        self._offsets = (np.arange(self.n_tilings)[:, None] * displacement / self.n_tilings) % 1.0
+
+    def encode(self, observations):
+        """Keys of shape (N, n_tilings) for observations of shape (N, D)."""
+        position = (np.asarray(observations, dtype=float) - self.low) * self._scale       # (N, D) in tiles
+        index = (position[:, None, :] + self._offsets[None]).astype(np.int64)             # (N, T, D)
+        np.clip(index, 0, self._tiles - 1, out=index)
+        keys = np.ravel_multi_index(np.moveaxis(index, -1, 0), self._tiles)
+        return keys + np.arange(self.n_tilings) * int(np.prod(self._tiles))
+
+    def config(self):
+        return {'low': self.low.tolist(), 'high': self.high.tolist(), 'bins': self.bins.tolist(),
+                'n_tilings': self.n_tilings}
+
+
+ENCODERS = {
+    'uniform': UniformEncoder,
+    'tile': TileCodingEncoder,
+}
+
+
+def build_encoder(kind, config):
+    return ENCODERS[kind](**config)
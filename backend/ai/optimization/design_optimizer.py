@@ -0,0 +1,301 @@
+import numpy as np
+
+from backend.simulation.pfc_engine import simulate_batch, FEATURE_COLUMNS
+from backend.simulation.sweep_runner import FEATURE_RANGES, latin_hypercube_samples
+
+# Design variables searched by the optimizer; the remaining features are the operating point
+DESIGN_VARIABLES = ['inductor_value', 'capacitor_value', 'switching_freq', 'kp', 'ki', 'kd']
+
+DEFAULT_OPERATING_POINT = {
+    'input_voltage': 230.0,
+    'load_current': 2.5,
+    'ambient_temp': 25.0,
+    'zbf': 0.5,
+    'compval': 0.1,
+}
+
+
+def operating_point_from_request(params):
+    """Map the frontend parameter names (inputVoltage, loadPower ...) onto feature columns."""
+    params = params or {}
+    point = dict(DEFAULT_OPERATING_POINT)
+    if 'inputVoltage' in params:
+        point['input_voltage'] = float(params['inputVoltage'])
+    if 'loadPower' in params:
+        point['load_current'] = float(params['loadPower']) / float(params.get('outputVoltage', 400))
+    if 'temperature' in params:
+        point['ambient_temp'] = float(params['temperature'])
+    for name in DEFAULT_OPERATING_POINT:
+        if name in params:
+            point[name] = float(params[name])
+    return point
+
+
+class DesignSpace:
+    def __init__(self, operating_point=None, variables=None, bounds=None):
+        """
+        Unit-cube parameterization of the design variables at a fixed operating point.
+
+        Parameters:
+        operating_point (dict): Values of the non-design feature columns.
+        variables (list): Design variables, defaults to DESIGN_VARIABLES.
+        bounds (dict): name -> (low, high), defaults to FEATURE_RANGES.
+        """
+        self.variables = list(variables or DESIGN_VARIABLES)
+        bounds = bounds or {}
+        self.low = np.array([bounds.get(name, FEATURE_RANGES[name])[0] for name in self.variables], dtype=float)
+        self.high = np.array([bounds.get(name, FEATURE_RANGES[name])[1] for name in self.variables], dtype=float)
+        self.operating_point = dict(DEFAULT_OPERATING_POINT, **(operating_point or {}))
+
+    @property
+    def dim(self):
+        return len(self.variables)
+
+    def features(self, unit):
+        """Full feature matrix (n, len(FEATURE_COLUMNS)) for unit-cube candidates (n, dim)."""
+        unit = np.clip(np.atleast_2d(unit), 0.0, 1.0)
+        design = self.low + unit * (self.high - self.low)
+        matrix = np.empty((len(unit), len(FEATURE_COLUMNS)))
+        for j, name in enumerate(FEATURE_COLUMNS):
+            if name in self.variables:
+                matrix[:, j] = design[:, self.variables.index(name)]
+            else:
+                matrix[:, j] = self.operating_point[name]
+        return matrix
+
+    def encode(self, design):
+        """Unit-cube point of a design variable dict (inverse of decode)."""
+        return np.array([(design[name] - low) / (high - low)
+                         for name, low, high in zip(self.variables, self.low, self.high)])
+
+    def decode(self, unit):
+        """Design variable dict of one unit-cube point."""
+        design = self.low + np.clip(unit, 0.0, 1.0) * (self.high - self.low)
+        return {name: float(value) for name, value in zip(self.variables, design)}
+
+
+def surrogate_objective(predictor, space):
+    """
+    Cost of a candidate batch: negative predicted efficiency, one predict_batch
+    call per batch. Multi-target surrogates are read at their 'efficiency' output.
+    """
+    targets = getattr(predictor, 'targets', None)
+    column = targets.index('efficiency') if targets else 0
+
+    def evaluate(unit):
+        prediction = np.asarray(predictor.predict_batch(space.features(unit)), dtype=float)
+        return -prediction.reshape(len(unit), -1)[:, column]
+    return evaluate
+
+
+def _simulate_rows(matrix):
+    return simulate_batch(matrix)['efficiency'].values
+
+
+def simulation_objective(space, pool=None, workers=4):
+    """Cost of a candidate batch from the circuit simulator, rows split over a process pool."""
+    def evaluate(unit):
+        matrix = space.features(unit)
+        if pool is None:
+            return -_simulate_rows(matrix)
+        parts = np.array_split(matrix, min(workers, len(matrix)))
+        return -np.concatenate(list(pool.map(_simulate_rows, parts)))
+    return evaluate
+
+
+def cma_es(evaluate, dim, iterations=50, population=None, sigma=0.3, x0=None, seed=42, callback=None):
+    """
+    Minimize a batched cost over the unit cube with (mu/mu_w, lambda)-CMA-ES.
+
+    Parameters:
+    evaluate (callable): Maps an (n, dim) candidate array to n costs in one call.
+    dim (int): Number of design variables.
+    iterations (int): Generations.
+    population (int): Candidates per generation (default 4 + 3 ln(dim)).
+    sigma (float): Initial step size in unit-cube coordinates.
+    x0 (array-like): Initial mean, defaults to the centre of the cube.
+    callback (callable): callback(iteration, best_x, best_cost); returning
+        False stops the search.
+
+    Returns:
+    tuple: (best_x, best_cost, history of best cost per generation)
+    """
+    rng = np.random.default_rng(seed)
+    n = dim
+    lam = population or 4 + int(3 * np.log(n))
+    mu = lam // 2
+    weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+    weights /= weights.sum()
+    mueff = 1.0 / np.sum(weights ** 2)
+    cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+    cs = (mueff + 2) / (n + mueff + 5)
+    c1 = 2 / ((n + 1.3) ** 2 + mueff)
+    cmu = min(1 - c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+    damps = 1 + 2 * max(0.0, np.sqrt((mueff - 1) / (n + 1)) - 1) + cs
+    chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+    mean = np.full(n, 0.5) if x0 is None else np.asarray(x0, dtype=float)
+    C = np.eye(n)
+    p_sigma = np.zeros(n)
+    p_c = np.zeros(n)
+    best_x, best_cost = mean.copy(), np.inf
+    history = []
+
+    for iteration in range(iterations):
+        eigenvalues, B = np.linalg.eigh(C)
+        D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        z = rng.standard_normal((lam, n))
+        y = (z * D) @ B.T
+        candidates = np.clip(mean + sigma * y, 0.0, 1.0)
+        costs = np.asarray(evaluate(candidates), dtype=float)
+
+        order = np.argsort(costs)
+        if costs[order[0]] < best_cost:
+            best_cost, best_x = costs[order[0]], candidates[order[0]].copy()
+        history.append(best_cost)
+
+        # recombination in the clipped space keeps the mean inside the cube
+        y_sel = (candidates[order[:mu]] - mean) / sigma
+        y_w = weights @ y_sel
+        mean = mean + sigma * y_w
+
+        C_inv_sqrt = B @ np.diag(1 / D) @ B.T
+        p_sigma = (1 - cs) * p_sigma + np.sqrt(cs * (2 - cs) * mueff) * (C_inv_sqrt @ y_w)
+        h_sigma = (np.linalg.norm(p_sigma) / np.sqrt(1 - (1 - cs) ** (2 * (iteration + 1))) / chi_n
+                   < 1.4 + 2 / (n + 1))
+        p_c = (1 - cc) * p_c + h_sigma * np.sqrt(cc * (2 - cc) * mueff) * y_w
+        rank_mu = (y_sel.T * weights) @ y_sel
+        C = ((1 - c1 - cmu) * C + c1 * (np.outer(p_c, p_c) + (1 - h_sigma) * cc * (2 - cc) * C)
+             + cmu * rank_mu)
+        C = (C + C.T) / 2
+        sigma *= np.exp((cs / damps) * (np.linalg.norm(p_sigma) / chi_n - 1))
+        sigma = min(sigma, 1.0)
+
+        if callback is not None and callback(iteration + 1, best_x, best_cost) is False:
+            break
+    return best_x, best_cost, history
+
+
+def _gp_posterior(X, y, candidates, length_scale, noise=1e-6):
+    """Zero-mean GP with an RBF kernel on standardized costs: posterior mean and std."""
+    def kernel(a, b):
+        d2 = np.sum(a ** 2, 1)[:, None] + np.sum(b ** 2, 1)[None, :] - 2 * a @ b.T
+        return np.exp(-0.5 * np.maximum(d2, 0.0) / length_scale ** 2)
+
+    K = kernel(X, X) + noise * np.eye(len(X))
+    L = np.linalg.cholesky(K)
+    alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+    K_s = kernel(X, candidates)
+    v = np.linalg.solve(L, K_s)
+    mean = K_s.T @ alpha
+    std = np.sqrt(np.maximum(1.0 - np.sum(v ** 2, axis=0), 1e-12))
+    return mean, std
+
+
+def _log_marginal_likelihood(X, y, length_scale, noise=1e-6):
+    d2 = np.sum(X ** 2, 1)[:, None] + np.sum(X ** 2, 1)[None, :] - 2 * X @ X.T
+    K = np.exp(-0.5 * np.maximum(d2, 0.0) / length_scale ** 2) + noise * np.eye(len(X))
+    try:
+        L = np.linalg.cholesky(K)
+    except np.linalg.LinAlgError:
+        return -np.inf
+    alpha = np.linalg.solve(L.T, np.linalg.solve(L, y))
+    return -0.5 * y @ alpha - np.sum(np.log(np.diag(L)))
+
+
+def bayesian_optimization(evaluate, dim, iterations=20, batch_size=8, n_initial=None,
+                          n_candidates=2000, seed=42, callback=None):
+    """
+    Minimize a batched cost over the unit cube with GP-based Bayesian optimization.
+
+    Every iteration scores n_candidates random points by expected improvement
+    and evaluates the batch_size best (spread out by a minimum distance) in
+    one evaluate call.
+
+    Returns:
+    tuple: (best_x, best_cost, history of best cost per iteration)
+    """
+    from math import erf, sqrt, pi
+
+    rng = np.random.default_rng(seed)
+    n_initial = n_initial or max(2 * dim, batch_size)
+    ranges = {i: (0.0, 1.0) for i in range(dim)}
+    X = latin_hypercube_samples(ranges, n_initial, seed=seed).values
+    y = np.asarray(evaluate(X), dtype=float)
+    history = []
+    erf_v = np.vectorize(erf)
+
+    for iteration in range(iterations):
+        y_mean, y_std = y.mean(), y.std() or 1.0
+        y_norm = (y - y_mean) / y_std
+        length_scale = max((0.05, 0.1, 0.2, 0.4, 0.8),
+                           key=lambda ls: _log_marginal_likelihood(X, y_norm, ls))
+        candidates = rng.random((n_candidates, dim))
+        mean, std = _gp_posterior(X, y_norm, candidates, length_scale)
+        improvement = y_norm.min() - mean
+        z = improvement / std
+        cdf = 0.5 * (1 + erf_v(z / sqrt(2)))
+        pdf = np.exp(-0.5 * z ** 2) / sqrt(2 * pi)
+        ei = improvement * cdf + std * pdf
+
+        chosen = []
+        for index in np.argsort(-ei):
+            point = candidates[index]
+            if all(np.linalg.norm(point - candidates[c]) > 0.5 * length_scale for c in chosen):
+                chosen.append(index)
+            if len(chosen) == batch_size:
+                break
+        batch = candidates[chosen]
+        X = np.vstack([X, batch])
+        y = np.concatenate([y, np.asarray(evaluate(batch), dtype=float)])
+
+        best = np.argmin(y)
+        history.append(y[best])
+        if callback is not None and callback(iteration + 1, X[best], y[best]) is False:
+            break
+    best = np.argmin(y)
+    return X[best], y[best], history
+
+
+def optimize_design(evaluate, space, method='cmaes', iterations=50, callback=None, **kwargs):
+    """
+    Search the design space for the lowest cost.
+
+    Parameters:
+    evaluate (callable): Batched cost over unit-cube candidates (see surrogate_objective).
+    space (DesignSpace): Design variables and operating point.
+    method (str): 'cmaes' or 'bayesian'.
+    iterations (int): Generations / BO iterations.
+    callback (callable): callback(iteration, best_x, best_cost), may return False to stop.
+
+    Returns:
+    dict: Best design variables, its cost and the per-iteration history.
+    """
+    if method == 'cmaes':
+        best_x, best_cost, history = cma_es(evaluate, space.dim, iterations, callback=callback, **kwargs)
+    elif method == 'bayesian':
+        best_x, best_cost, history = bayesian_optimization(evaluate, space.dim, iterations,
+                                                           callback=callback, **kwargs)
+    else:
+        raise ValueError(f"Unknown optimization method: {method}")
+    return {
+        'parameters': space.decode(best_x),
+        'operating_point': space.operating_point,
+        'cost': float(best_cost),
+        'history': [float(c) for c in history],
+    }
+
+
+# Example usage
+if __name__ == "__main__":
+    from concurrent.futures import ProcessPoolExecutor
+    from backend.ai.inference.predictor import Predictor
+
+    space = DesignSpace({'input_voltage': 230, 'load_current': 1.0})
+    predictor = Predictor('models/trained_pfc_model.pkl', compiled=True)
+    result = optimize_design(surrogate_objective(predictor, space), space, method='cmaes', iterations=40)
+    print(result['parameters'], -result['cost'])
+    with ProcessPoolExecutor(4) as pool:
+        check = simulation_objective(space, pool)(np.atleast_2d(
+            (np.array(list(result['parameters'].values())) - space.low) / (space.high - space.low)))
+    print("simulated efficiency:", -check[0])
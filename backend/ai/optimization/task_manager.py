@@ -0,0 +1,241 @@
+import os
+import time
+import functools
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+from backend.config.settings import Config
+from backend.ai.inference.predictor import Predictor
+from backend.ai.inference.model_registry import ModelRegistry
+from backend.ai.inference.uncertainty import UncertaintyRouter
+from backend.ai.optimization.design_optimizer import (
+    DesignSpace, operating_point_from_request, surrogate_objective, simulation_objective, optimize_design,
+)
+from backend.simulation.pfc_engine import simulate_batch
+from backend.simulation.simulation_service import format_metrics
+
+
+DEFAULT_ITERATIONS = 40
+
+
+def parse_iterations(value, maximum=None):
+    """
+    Validate the 'iterations' request parameter: an integer from 1 to maximum
+    (Config.OPTIMIZATION_MAX_ITERATIONS); None gives DEFAULT_ITERATIONS.
+    Raises ValueError otherwise.
+    """
+    maximum = maximum or Config.OPTIMIZATION_MAX_ITERATIONS
+    if value is None:
+        return DEFAULT_ITERATIONS
+    iterations = None
+    if isinstance(value, float):
+        iterations = int(value) if value.is_integer() else None
+    elif not isinstance(value, bool):
+        try:
+            iterations = int(value)
+        except (TypeError, ValueError):
+            pass
+    if iterations is None or not 1 <= iterations <= maximum:
+        raise ValueError(f"iterations must be an integer from 1 to {maximum}, got {value!r}")
+    return iterations
+
+
+class OptimizationTaskManager:
+    def __init__(self, workers=None, registry=None, max_finished=100, offload=None):
+        """
+        Run design optimizations in background worker threads, addressable by task id.
+
+        Parameters:
+        workers (int): Concurrent optimization tasks, defaults to Config.OPTIMIZATION_WORKERS.
+        registry (ModelRegistry): Source of the surrogate models.
+        max_finished (int): Finished tasks kept for status queries before the oldest are dropped.
+        offload (callable): offload(fn, *args) runs CPU-bound candidate evaluation off
+            the event loop when the server uses cooperative (eventlet / gevent) workers.
+        """
+        self.workers = workers or Config.OPTIMIZATION_WORKERS
+        self.registry = registry or ModelRegistry()
+        self.max_finished = max_finished
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._fallback = None
+        self.offload = offload
+
+    def _surrogate(self, model_name):
+        """Registered surrogate if present, else the default trained PFC model."""
+        try:
+            return self.registry.predictor(model_name)
+        except KeyError:
+            if model_name != 'pfc':
+                raise
+            if self._fallback is None:
+                self._fallback = Predictor(Config.SURROGATE_MODEL_PATH, compiled=True)
+            return self._fallback
+
+    def has_surrogate(self, model_name):
+        """Whether _surrogate(model_name) has a model to load (registered, or the default PFC file)."""
+        try:
+            self.registry.active_version(model_name)
+            return True
+        except KeyError:
+            return model_name == 'pfc' and os.path.exists(Config.SURROGATE_MODEL_PATH)
+
+    def submit(self, params, on_progress=None, on_complete=None):
+        """
+        Start an optimization task.
+
+        Parameters:
+        params (dict): Request parameters. Operating point keys (inputVoltage,
+            loadPower, outputVoltage, temperature) fix the non-design features;
+            'method' ('cmaes' / 'bayesian'), 'iterations', 'evaluator'
+            ('surrogate' / 'simulation') and 'model' select the search.
+            With an ensemble surrogate, 'maxUncertainty' (interval half-width
+            of the efficiency, or a dict per target) sends uncertain
+            candidates to the circuit simulator instead.
+        on_progress (callable): Called with the task status after every iteration.
+        on_complete (callable): Called with the final task status.
+
+        Returns:
+        str: Task id. Raises ValueError for an invalid 'iterations'.
+        """
+        params = dict(params or {})
+        iterations = parse_iterations(params.get('iterations'))
+        task_id = f"task-{uuid.uuid4().hex[:12]}"
+        task = {
+            'taskId': task_id,
+            'status': 'queued',
+            'progress': 0,
+            'iteration': 0,
+            'iterations': iterations,
+            'method': params.get('method', 'cmaes'),
+            'bestEfficiency': None,
+            'results': None,
+            'error': None,
+            'created': time.time(),
+            'elapsed': 0.0,
+            'cancelled': False,
+        }
+        with self._lock:
+            self._tasks[task_id] = task
+            self._evict()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='optimizer')
+        self._executor.submit(self._run, task, params, on_progress, on_complete)
+        return task_id
+
+    def _evict(self):
+        finished = [t for t in self._tasks.values() if t['status'] in ('completed', 'failed', 'cancelled')]
+        for task in sorted(finished, key=lambda t: t['created'])[:max(0, len(finished) - self.max_finished)]:
+            del self._tasks[task['taskId']]
+
+    def _run(self, task, params, on_progress, on_complete):
+        task['status'] = 'running'
+        started = time.time()
+        pool = None
+        surrogate = None
+        try:
+            space = DesignSpace(operating_point_from_request(params))
+            if params.get('evaluator', 'surrogate') == 'simulation':
+                workers = int(params.get('workers', Config.SWEEP_WORKERS))
+                pool = ProcessPoolExecutor(workers)
+                evaluate = simulation_objective(space, pool, workers)
+            else:
+                surrogate = self._surrogate(params.get('model', 'pfc'))
+                limit = params.get('maxUncertainty')
+                if limit is not None:
+                    limit = limit if isinstance(limit, dict) else {'efficiency': float(limit)}
+                    surrogate = UncertaintyRouter(surrogate, limit)
+                evaluate = surrogate_objective(surrogate, space)
+            if self.offload is not None:
+                evaluate = functools.partial(self.offload, evaluate)
+
+            def callback(iteration, best_x, best_cost):
+                task['iteration'] = iteration
+                task['progress'] = round(100.0 * iteration / task['iterations'], 1)
+                # percent, like the efficiency of the final results
+                task['bestEfficiency'] = round(100 * -float(best_cost), 2)
+                task['bestParameters'] = space.decode(best_x)
+                task['elapsed'] = time.time() - started
+                task['estimatedTime'] = task['elapsed'] / iteration * (task['iterations'] - iteration)
+                if on_progress is not None:
+                    on_progress(self.status(task['taskId']))
+                return not task['cancelled']
+
+            result = optimize_design(evaluate, space, task['method'], task['iterations'], callback=callback)
+            task['results'] = (self.offload or (lambda fn, *a: fn(*a)))(self._verify, space, result)
+            if isinstance(surrogate, UncertaintyRouter):
+                task['results']['fallback'] = surrogate.metrics()
+                surrogate = surrogate.predictor
+            if surrogate is not None and getattr(surrogate, 'targets', None):
+                # every metric of the best design from one forward pass of the multi-target surrogate
+                predicted = surrogate.predict_metrics(space.features(space.encode(result['parameters'])))
+                task['results']['predicted'] = format_metrics({k: v[0] for k, v in predicted.items()})
+            task['status'] = 'cancelled' if task['cancelled'] else 'completed'
+        except Exception as e:
+            task['status'] = 'failed'
+            task['error'] = str(e)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            task['elapsed'] = time.time() - started
+        if on_complete is not None:
+            on_complete(self.status(task['taskId']))
+
+    @staticmethod
+    def _verify(space, result):
+        """Simulate the best design once to report THD and power factor next to the surrogate score."""
+        metrics = simulate_batch(space.features(space.encode(result['parameters'])))
+        row = metrics.iloc[0]
+        return {
+            'efficiency': round(100 * -result['cost'], 2),
+            'simulatedEfficiency': round(100 * float(row['efficiency']), 2),
+            'thd': round(100 * float(row['thd']), 2),
+            'powerFactor': round(float(row['power_factor']), 3),
+            'peakTemp': round(float(row['peak_temp']), 1),
+            'parameters': result['parameters'],
+            'operatingPoint': result['operating_point'],
+            'history': [-cost for cost in result['history']],
+        }
+
+    def status(self, task_id):
+        """Snapshot of a task; raises KeyError for unknown ids."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                raise KeyError(f"Unknown task: {task_id}")
+            return {k: v for k, v in task.items() if k != 'cancelled'}
+
+    def cancel(self, task_id):
+        """Stop a task after its current iteration."""
+        with self._lock:
+            if task_id not in self._tasks:
+                raise KeyError(f"Unknown task: {task_id}")
+            self._tasks[task_id]['cancelled'] = True
+
+    def list_tasks(self):
+        with self._lock:
+            return [{k: task[k] for k in ('taskId', 'status', 'progress', 'method')}
+                    for task in self._tasks.values()]
+
+    def shutdown(self, wait=True):
+        for task in list(self._tasks.values()):
+            task['cancelled'] = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Shared by the REST routes and the WebSocket handlers
+task_manager = OptimizationTaskManager()
+
+
+# Example usage
+if __name__ == "__main__":
+    task_id = task_manager.submit({'inputVoltage': 230, 'loadPower': 1000, 'method': 'cmaes', 'iterations': 30})
+    while task_manager.status(task_id)['status'] in ('queued', 'running'):
+        time.sleep(0.2)
+    print(task_manager.status(task_id)['results'])
+    task_manager.shutdown()
@@ -1,7 +1,7 @@
-import os
-import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from backend.ai.training.dataset_store import load_directory
+
 def prepare_data(data_directory, test_size=0.2, random_state=42):
     """
     Prepare the dataset for training by loading, cleaning, and splitting the data.
@@ -17,10 +17,8 @@ def prepare_data(data_directory, test_size=0.2, random_state=42):
     - y_train: Series, training labels
     - y_test: Series, testing labels
     """
-    # Load data
-    data_files = [f for f in os.listdir(data_directory) if f.endswith('.csv')]
-    data_frames = [pd.read_csv(os.path.join(data_directory, f)) for f in data_files]
-    full_data = pd.concat(data_frames, ignore_index=True)
+    # Load data (memory-mapped column stores, CSVs are parsed only when they change)
+    full_data = load_directory(data_directory)
 
     # Data cleaning (example: drop rows with missing values)
     full_data.dropna(inplace=True)
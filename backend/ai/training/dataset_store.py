@@ -0,0 +1,237 @@
+import os
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR_NAME = '.cache'
+SCHEMA_FILE = 'schema.json'
+# Rows parsed at a time when converting a CSV file
+CONVERT_CHUNK_SIZE = 100000
+# Text width of numbers in a column that also holds text (repr of a float64 is at most 24 characters)
+NUMBER_TEXT_WIDTH = 32
+
+# Predicate operators accepted in filters, e.g. ('switching_freq', 'between', (80e3, 100e3))
+FILTER_OPERATORS = {
+    '==': lambda column, value: column == value,
+    '!=': lambda column, value: column != value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+    'in': lambda column, value: np.isin(column, list(value)),
+    'between': lambda column, value: (column >= value[0]) & (column <= value[1]),
+}
+
+
+def cache_path(csv_path, cache_dir=None):
+    """Column store directory of a CSV file (<dir>/.cache/<stem>/ by default)."""
+    directory, filename = os.path.split(os.path.abspath(csv_path))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(cache_dir or os.path.join(directory, CACHE_DIR_NAME), stem)
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'source': os.path.abspath(csv_path), 'source_size': stat.st_size, 'source_mtime': stat.st_mtime}
+
+
+def read_schema(store_path):
+    """Return the schema of a column store, or None if it does not exist."""
+    schema_file = os.path.join(store_path, SCHEMA_FILE)
+    if not os.path.exists(schema_file):
+        return None
+    with open(schema_file) as f:
+        return json.load(f)
+
+
+def is_stale(csv_path, cache_dir=None):
+    """True when the column store is missing or older than its CSV source."""
+    schema = read_schema(cache_path(csv_path, cache_dir))
+    if schema is None:
+        return True
+    stamp = _source_stamp(csv_path)
+    return any(schema.get(key) != value for key, value in stamp.items())
+
+
+def _column_dtypes(csv_path, chunk_size):
+    """
+    First pass over a CSV file: row count and the dtype of every column as a
+    whole-file read would infer it (numeric chunk dtypes promoted, text
+    columns as fixed-width unicode wide enough for every chunk).
+    """
+    n_rows = 0
+    numeric, text_width = {}, {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        n_rows += len(chunk)
+        for name in chunk.columns:
+            values = chunk[name].to_numpy()
+            if values.dtype == object:
+                text_width[name] = max(text_width.get(name, 1), int(np.char.str_len(values.astype(str)).max()))
+            else:
+                numeric[name] = np.result_type(numeric.get(name, values.dtype), values.dtype)
+    dtypes = {}
+    for name in pd.read_csv(csv_path, nrows=0).columns:
+        if name in text_width:
+            # numbers of a mixed column are stored as their text, which fits in NUMBER_TEXT_WIDTH
+            width = max(text_width[name], NUMBER_TEXT_WIDTH if name in numeric else 1)
+            dtypes[name] = np.dtype(f'<U{width}')
+        else:
+            dtypes[name] = numeric.get(name, np.dtype(float))
+    return n_rows, dtypes
+
+
+def convert_csv(csv_path, cache_dir=None, chunk_size=CONVERT_CHUNK_SIZE):
+    """
+    Parse a CSV file and store it as one .npy file per column plus a schema.
+
+    The file is read twice in chunks of chunk_size rows: once for the row
+    count and column dtypes, then into preallocated memory-mapped columns,
+    so converting needs memory for one chunk, not for the whole dataset.
+
+    Parameters:
+    csv_path (str): Source CSV file.
+    cache_dir (str): Directory holding the stores, defaults to <csv dir>/.cache.
+    chunk_size (int): Rows parsed at a time.
+
+    Returns:
+    str: Path of the column store.
+    """
+    store_path = cache_path(csv_path, cache_dir)
+    n_rows, dtypes = _column_dtypes(csv_path, chunk_size)
+
+    tmp_path = store_path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns, outputs = [], {}
+    for i, (name, dtype) in enumerate(dtypes.items()):
+        filename = f'c{i:04d}.npy'
+        outputs[name] = np.lib.format.open_memmap(os.path.join(tmp_path, filename), mode='w+',
+                                                  dtype=dtype, shape=(n_rows,))
+        columns.append({'name': name, 'dtype': dtype.str, 'file': filename})
+
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        stop = start + len(chunk)
+        for name, output in outputs.items():
+            values = chunk[name].to_numpy()
+            output[start:stop] = values.astype(str) if output.dtype.kind == 'U' else values
+        start = stop
+    for output in outputs.values():
+        output.flush()
+    del outputs
+
+    schema = dict(_source_stamp(csv_path), n_rows=n_rows, columns=columns)
+    with open(os.path.join(tmp_path, SCHEMA_FILE), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+    shutil.rmtree(store_path, ignore_errors=True)
+    os.replace(tmp_path, store_path)
+    return store_path
+
+
+def load_columns(store_path, columns=None, filters=None):
+    """
+    Memory-map a column store.
+
+    Parameters:
+    store_path (str): Column store directory.
+    columns (list): Columns to return (projection); all columns by default.
+    filters (list): (column, operator, value) predicates combined with AND;
+        operators are the keys of FILTER_OPERATORS.
+
+    Returns:
+    dict: Column name -> array. Without filters the arrays are read-only
+    memory maps, so nothing is read until the data is touched.
+    """
+    schema = read_schema(store_path)
+    if schema is None:
+        raise FileNotFoundError(f"Column store not found: {store_path}")
+    files = {column['name']: os.path.join(store_path, column['file']) for column in schema['columns']}
+    columns = list(columns) if columns is not None else list(files)
+    missing = [name for name in columns if name not in files]
+    if missing:
+        raise KeyError(f"Unknown columns: {missing}")
+
+    mapped = {}
+
+    def column(name):
+        if name not in mapped:
+            mapped[name] = np.load(files[name], mmap_mode='r')
+        return mapped[name]
+
+    mask = None
+    for name, operator, value in filters or []:
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown filter operator: {operator}")
+        if name not in files:
+            raise KeyError(f"Unknown filter column: {name}")
+        condition = FILTER_OPERATORS[operator](column(name), value)
+        mask = condition if mask is None else mask & condition
+
+    if mask is None:
+        return {name: column(name) for name in columns}
+    rows = np.flatnonzero(mask)
+    return {name: column(name)[rows] for name in columns}
+
+
+def load_dataset(csv_path, columns=None, filters=None, cache_dir=None, as_frame=True):
+    """
+    Load a CSV dataset through its column store, converting it on first use
+    or when the CSV has changed.
+
+    Parameters:
+    csv_path (str): Source CSV file.
+    columns (list): Column projection.
+    filters (list): (column, operator, value) predicates, see load_columns.
+    cache_dir (str): Column store root.
+    as_frame (bool): Return a DataFrame (zero-copy over the memory maps when
+        unfiltered) instead of a dict of arrays.
+    """
+    if is_stale(csv_path, cache_dir):
+        convert_csv(csv_path, cache_dir)
+    data = load_columns(cache_path(csv_path, cache_dir), columns=columns, filters=filters)
+    if as_frame:
+        return pd.DataFrame(data, copy=False)
+    return data
+
+
+def load_directory(data_directory, columns=None, filters=None, cache_dir=None):
+    """Load and concatenate every CSV dataset in a directory through the column stores."""
+    data_files = sorted(f for f in os.listdir(data_directory) if f.endswith('.csv'))
+    frames = [load_dataset(os.path.join(data_directory, f), columns=columns, filters=filters,
+                           cache_dir=cache_dir)
+              for f in data_files]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def iter_chunks(csv_path, columns=None, chunk_size=10000, order=None, cache_dir=None):
+    """
+    Stream a dataset in row chunks from its memory-mapped column store.
+
+    Parameters:
+    csv_path (str): Source CSV file.
+    columns (list): Column projection.
+    chunk_size (int): Rows per chunk.
+    order (array-like): Chunk indices to visit (e.g. a shuffled permutation);
+        sequential by default.
+
+    Yields:
+    dict: Column name -> in-memory array for one chunk.
+    """
+    data = load_dataset(csv_path, columns=columns, cache_dir=cache_dir, as_frame=False)
+    n_rows = len(next(iter(data.values()))) if data else 0
+    n_chunks = (n_rows + chunk_size - 1) // chunk_size
+    for chunk_id in (range(n_chunks) if order is None else order):
+        rows = slice(chunk_id * chunk_size, (chunk_id + 1) * chunk_size)
+        yield {name: np.array(values[rows]) for name, values in data.items()}
+
+
+def count_rows(csv_path, cache_dir=None):
+    """Number of rows of a dataset, read from its column store schema."""
+    if is_stale(csv_path, cache_dir):
+        convert_csv(csv_path, cache_dir)
+    return read_schema(cache_path(csv_path, cache_dir))['n_rows']
@@ -0,0 +1,303 @@
+import os
+import json
+import math
+import time
+import warnings
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import ExtraTreesRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.neural_network import MLPRegressor
+from sklearn.preprocessing import StandardScaler
+
+from backend.ai.training.dataset_store import load_dataset
+
+# Hyperparameters per model family: a list is a choice, ('log', low, high) a log-uniform range
+SEARCH_SPACE = {
+    'mlp': {
+        'hidden_layer_sizes': [(64,), (100, 50), (128, 64), (100, 80, 50), (256, 128, 64)],
+        'alpha': ('log', 1e-6, 1e-2),
+        'learning_rate_init': ('log', 1e-4, 1e-2),
+        'batch_size': [64, 128, 256],
+    },
+    'random_forest': {
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 2, 4, 8],
+        'max_features': [1.0, 0.7, 0.4],
+    },
+    'extra_trees': {
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 2, 4, 8],
+        'max_features': [1.0, 0.7, 0.4],
+    },
+    'gradient_boosting': {
+        'learning_rate': ('log', 0.02, 0.3),
+        'max_leaf_nodes': [15, 31, 63],
+        'l2_regularization': ('log', 1e-6, 1.0),
+        'min_samples_leaf': [5, 20, 50],
+    },
+}
+
+# Iteration budget of every family at full fidelity: (parameter, value, minimum)
+FULL_BUDGET = {
+    'mlp': ('max_iter', 200, 5),
+    'random_forest': ('n_estimators', 200, 5),
+    'extra_trees': ('n_estimators', 200, 5),
+    'gradient_boosting': ('max_iter', 300, 10),
+}
+
+ESTIMATORS = {
+    'mlp': lambda **p: MLPRegressor(activation='relu', solver='adam', random_state=42, **p),
+    'random_forest': lambda **p: RandomForestRegressor(random_state=42, n_jobs=1, **p),
+    'extra_trees': lambda **p: ExtraTreesRegressor(random_state=42, n_jobs=1, **p),
+    'gradient_boosting': lambda **p: HistGradientBoostingRegressor(random_state=42, early_stopping=False, **p),
+}
+
+
+def sample_configs(n_configs, families=None, seed=42):
+    """Draw n_configs random configurations, spread evenly over the families."""
+    rng = np.random.default_rng(seed)
+    families = list(families or SEARCH_SPACE)
+    configs = []
+    for i in range(n_configs):
+        family = families[i % len(families)]
+        params = {}
+        for name, space in SEARCH_SPACE[family].items():
+            if isinstance(space, tuple) and space[0] == 'log':
+                params[name] = float(np.exp(rng.uniform(np.log(space[1]), np.log(space[2]))))
+            else:
+                params[name] = space[rng.integers(len(space))]
+        configs.append({'id': i, 'family': family, 'params': params})
+    return configs
+
+
+def build_estimator(config, fidelity=1.0):
+    """Estimator of a configuration with its iteration budget scaled by fidelity."""
+    name, full, minimum = FULL_BUDGET[config['family']]
+    params = dict(config['params'], **{name: max(minimum, int(round(full * fidelity)))})
+    return ESTIMATORS[config['family']](**params)
+
+
+def fit_config(config, fidelity, X_train, y_train, seed=42):
+    """
+    Fit a configuration on the first `fidelity` share of the (shuffled)
+    training rows, on standardized inputs and outputs.
+
+    Returns:
+    dict: A PFCModel-style bundle (model, scaler_X, scaler_y, trained).
+    """
+    n = max(int(math.ceil(len(X_train) * fidelity)), 32)
+    rows = np.random.default_rng(seed).permutation(len(X_train))[:n]
+    scaler_X = StandardScaler().fit(X_train[rows])
+    scaler_y = StandardScaler().fit(y_train[rows].reshape(-1, 1))
+    model = build_estimator(config, fidelity)
+    if 'batch_size' in config['params']:
+        model.set_params(batch_size=min(config['params']['batch_size'], n))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model.fit(scaler_X.transform(X_train[rows]), scaler_y.transform(y_train[rows].reshape(-1, 1)).ravel())
+    return {'model': model, 'scaler_X': scaler_X, 'scaler_y': scaler_y, 'trained': True}
+
+
+def score_bundle(bundle, X, y):
+    predictions = bundle['scaler_y'].inverse_transform(
+        bundle['model'].predict(bundle['scaler_X'].transform(X)).reshape(-1, 1)).ravel()
+    mse = mean_squared_error(y, predictions)
+    return {'mse': float(mse), 'rmse': float(np.sqrt(mse)), 'r2': float(r2_score(y, predictions))}
+
+
+# Data of a worker process, set once by _init_worker instead of being sent with every task
+_worker_data = {}
+
+
+def _init_worker(X_train, y_train, X_val, y_val):
+    _worker_data.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+
+def _evaluate(task):
+    config, fidelity = task
+    started = time.perf_counter()
+    bundle = fit_config(config, fidelity, _worker_data['X_train'], _worker_data['y_train'])
+    scores = score_bundle(bundle, _worker_data['X_val'], _worker_data['y_val'])
+    return dict(scores, seconds=time.perf_counter() - started)
+
+
+class HyperparameterSearch:
+    def __init__(self, data_path, target_column='target_variable', families=None, n_configs=200,
+                 method='hyperband', eta=3, min_fidelity=1 / 27, workers=None, validation_size=0.2,
+                 seed=42, output_dir='models/tuning'):
+        """
+        Multi-fidelity hyperparameter search over model families.
+
+        Configurations are first trained cheaply (a share of the training rows
+        and a proportionally smaller iteration / tree budget) and only the best
+        1/eta of every rung moves on to eta times the fidelity, up to full
+        fidelity (successive halving). 'hyperband' splits the configurations
+        over brackets that start at different fidelities, hedging against
+        models that only shine with more data. Every rung is evaluated in a
+        process pool that receives the data once per worker.
+
+        Parameters:
+        data_path (str): Training CSV (read through the column store).
+        families (list): Model families from SEARCH_SPACE; all by default.
+        n_configs (int): Sampled configurations in total.
+        method (str): 'hyperband' or 'halving'.
+        eta (int): Reduction factor between rungs.
+        min_fidelity (float): Lowest fidelity (share of rows and budget).
+        workers (int): Processes; defaults to the CPU count.
+        output_dir (str): Where leaderboard.csv, best_model.pkl and best_model.json are written.
+        """
+        self.data_path = data_path
+        self.target_column = target_column
+        self.families = list(families or SEARCH_SPACE)
+        self.n_configs = n_configs
+        self.method = method
+        self.eta = eta
+        self.min_fidelity = min_fidelity
+        self.workers = workers or os.cpu_count() or 1
+        self.validation_size = validation_size
+        self.seed = seed
+        self.output_dir = output_dir
+        self.results = []
+
+    def load_data(self):
+        data = load_dataset(self.data_path).dropna()
+        features = data.drop(self.target_column, axis=1)
+        self.feature_names = features.columns.tolist()
+        X_train, X_val, y_train, y_val = train_test_split(
+            features.values, data[self.target_column].values,
+            test_size=self.validation_size, random_state=self.seed)
+        return X_train, y_train, X_val, y_val
+
+    def brackets(self):
+        """
+        Starting fidelities and configuration counts, as [(fidelity, n_configs), ...].
+        """
+        s_max = max(int(round(math.log(1 / self.min_fidelity, self.eta))), 0)
+        if self.method == 'halving':
+            return [(self.eta ** -s_max, self.n_configs)]
+        if self.method != 'hyperband':
+            raise ValueError(f"Unknown search method: {self.method}")
+        counts = [math.ceil((s_max + 1) / (s + 1) * self.eta ** s) for s in range(s_max, -1, -1)]
+        scale = self.n_configs / sum(counts)
+        sizes = [max(1, int(round(c * scale))) for c in counts]
+        sizes[0] += self.n_configs - sum(sizes)
+        return [(self.eta ** -s, n) for s, n in zip(range(s_max, -1, -1), sizes)]
+
+    def _run_rung(self, pool, configs, fidelity, bracket, rung):
+        tasks = [(config, fidelity) for config in configs]
+        scores = pool.map(_evaluate, tasks) if pool is not None else map(_evaluate, tasks)
+        results = []
+        for config, score in zip(configs, scores):
+            results.append(dict(score, id=config['id'], family=config['family'],
+                                params=json.dumps(config['params'], default=list),
+                                fidelity=fidelity, bracket=bracket, rung=rung))
+        self.results.extend(results)
+        print(f"bracket {bracket} rung {rung}: {len(configs)} configs at fidelity {fidelity:.3f}, "
+              f"best rmse {min(r['rmse'] for r in results):.6f}")
+        return results
+
+    def successive_halving(self, pool, configs, fidelity, bracket=0):
+        """Run one bracket; returns the results of its final (full-fidelity) rung."""
+        rung = 0
+        while True:
+            results = self._run_rung(pool, configs, fidelity, bracket, rung)
+            if fidelity >= 1.0:
+                return results
+            order = np.argsort([r['rmse'] for r in results])
+            keep = max(1, len(configs) // self.eta)
+            configs = [configs[i] for i in order[:keep]]
+            fidelity = min(1.0, fidelity * self.eta)
+            rung += 1
+
+    def run(self, register_as=None):
+        """
+        Run the search, write the leaderboard and refit the winner at full fidelity.
+
+        Parameters:
+        register_as (str): Also register the winner in the model registry under this name.
+
+        Returns:
+        dict: The winner's configuration and validation metrics.
+        """
+        X_train, y_train, X_val, y_val = self.load_data()
+        configs = iter(sample_configs(self.n_configs, self.families, self.seed))
+        started = time.perf_counter()
+        self.results = []
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                       initargs=(X_train, y_train, X_val, y_val))
+        else:
+            _init_worker(X_train, y_train, X_val, y_val)
+        try:
+            finals = []
+            for bracket, (fidelity, n) in enumerate(self.brackets()):
+                bracket_configs = [next(configs) for _ in range(n)]
+                finals.extend(self.successive_halving(pool, bracket_configs, fidelity, bracket))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        best = min(finals, key=lambda r: r['rmse'])
+        config = {'id': best['id'], 'family': best['family'], 'params': json.loads(best['params'])}
+        if config['family'] == 'mlp':
+            config['params']['hidden_layer_sizes'] = tuple(config['params']['hidden_layer_sizes'])
+        bundle = fit_config(config, 1.0, X_train, y_train)
+        metrics = score_bundle(bundle, X_val, y_val)
+        summary = {'config': config, 'metrics': metrics, 'features': self.feature_names,
+                   'evaluations': len(self.results), 'search_seconds': time.perf_counter() - started,
+                   'method': self.method, 'n_configs': self.n_configs}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.leaderboard().to_csv(os.path.join(self.output_dir, 'leaderboard.csv'), index=False)
+        joblib.dump(bundle, os.path.join(self.output_dir, 'best_model.pkl'))
+        with open(os.path.join(self.output_dir, 'best_model.json'), 'w') as f:
+            json.dump(summary, f, indent=2, default=list)
+        if register_as:
+            from backend.ai.inference.model_registry import ModelRegistry
+            ModelRegistry().register(register_as, bundle, features=self.feature_names, metrics=metrics,
+                                     search=config)
+        return summary
+
+    def leaderboard(self):
+        """Every evaluation, highest fidelity first and best RMSE first within it."""
+        board = pd.DataFrame(self.results)
+        if board.empty:
+            return board
+        board = board.sort_values(['fidelity', 'rmse'], ascending=[False, True]).reset_index(drop=True)
+        board.insert(0, 'rank', np.arange(1, len(board) + 1))
+        return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-fidelity hyperparameter search for the PFC surrogate')
+    parser.add_argument('--data', default='data/training/pfc_buck_data.csv')
+    parser.add_argument('--target', default='target_variable')
+    parser.add_argument('--families', nargs='*', default=None, choices=list(SEARCH_SPACE))
+    parser.add_argument('--configs', type=int, default=200)
+    parser.add_argument('--method', default='hyperband', choices=['hyperband', 'halving'])
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--min-fidelity', type=float, default=1 / 27)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='models/tuning')
+    parser.add_argument('--register', default=None, help='Register the winner under this model name')
+    args = parser.parse_args()
+
+    search = HyperparameterSearch(args.data, args.target, args.families, args.configs, args.method,
+                                  args.eta, args.min_fidelity, args.workers, output_dir=args.output)
+    summary = search.run(register_as=args.register)
+    print(f"best: {summary['config']['family']} {summary['config']['params']}")
+    print(f"validation rmse {summary['metrics']['rmse']:.6f}, r2 {summary['metrics']['r2']:.4f}, "
+          f"{summary['evaluations']} evaluations in {summary['search_seconds']:.0f} s")
+
+
+if __name__ == '__main__':
+    main()
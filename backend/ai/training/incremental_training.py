@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+
+from backend.config.settings import Config
+from backend.ai.inference.model_registry import ModelRegistry
+
+# Holdout and replay rows of a published version, stored next to its artifact
+STATE_FILE = 'incremental.npz'
+
+
+def _hash_file(path, prefix_size=None):
+    """sha256 of the whole file and, when prefix_size is given, of its first prefix_size bytes."""
+    digest = hashlib.sha256()
+    prefix = None
+    read = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            if prefix_size is not None and prefix is None and read + len(block) >= prefix_size:
+                head = digest.copy()
+                head.update(block[:prefix_size - read])
+                prefix = head.hexdigest()
+            digest.update(block)
+            read += len(block)
+    return digest.hexdigest(), prefix
+
+
+def _ends_with_newline(path, size):
+    with open(path, 'rb') as f:
+        f.seek(size - 1)
+        return f.read(1) == b'\n'
+
+
+def _read_rows(path, offset=0):
+    """Rows of a CSV file starting at byte offset (0 reads the whole file)."""
+    if offset == 0:
+        return pd.read_csv(path)
+    columns = pd.read_csv(path, nrows=0).columns
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return pd.read_csv(f, header=None, names=columns)
+
+
+def _score(bundle, X, y):
+    predictions = bundle['scaler_y'].inverse_transform(
+        bundle['model'].predict(bundle['scaler_X'].transform(X)).reshape(-1, 1)).ravel()
+    mse = mean_squared_error(y, predictions)
+    return {'mse': float(mse), 'rmse': float(np.sqrt(mse)), 'r2': float(r2_score(y, predictions)),
+            'holdout_rows': int(len(y))}
+
+
+def update_scalers(bundle, X, y):
+    """
+    Update the bundle's scalers with the running statistics of new rows
+    (StandardScaler.partial_fit) and fold the change into the first and last
+    layer of a fitted MLP, so the network computes the same function of the
+    raw inputs as before and only the following partial_fit steps change it.
+    """
+    scaler_X, scaler_y, model = bundle['scaler_X'], bundle['scaler_y'], bundle['model']
+    fitted = hasattr(model, 'coefs_') and hasattr(scaler_X, 'mean_')
+    if fitted:
+        mean_x, scale_x = scaler_X.mean_.copy(), scaler_X.scale_.copy()
+        mean_y, scale_y = scaler_y.mean_[0], scaler_y.scale_[0]
+    scaler_X.partial_fit(X)
+    scaler_y.partial_fit(y.reshape(-1, 1))
+    if fitted:
+        # x_old = x_new * scale_new / scale_old + (mean_new - mean_old) / scale_old
+        model.intercepts_[0] = model.intercepts_[0] + ((scaler_X.mean_ - mean_x) / scale_x) @ model.coefs_[0]
+        model.coefs_[0] = model.coefs_[0] * (scaler_X.scale_ / scale_x)[:, None]
+        # y_new = (y_old * scale_old + mean_old - mean_new) / scale_new
+        ratio = scale_y / scaler_y.scale_[0]
+        model.coefs_[-1] = model.coefs_[-1] * ratio
+        model.intercepts_[-1] = model.intercepts_[-1] * ratio + (mean_y - scaler_y.mean_[0]) / scaler_y.scale_[0]
+
+
+class IncrementalTrainer:
+    def __init__(self, name='pfc', data_dir=None, registry=None, target_column='target_variable',
+                 epochs=5, batch_size=256, holdout_fraction=0.1, replay_ratio=1.0, buffer_size=20000,
+                 tolerance=0.0, hidden_layers=(100, 50), seed=42):
+        """
+        Warm-start retraining of a registry model from new training data.
+
+        Every published version records the content hash, size and row count
+        of each CSV file in data_dir it has seen. A retrain cycle trains only
+        on files that are new or whose hash changed; a file that merely grew
+        (its old bytes hash the same) contributes just the appended rows, read
+        from the old end of file. The active MLP continues with partial_fit
+        from its current weights, the scalers are updated with running
+        statistics, and a reservoir sample of earlier training rows is
+        replayed (replay_ratio rows per new row) against forgetting.
+
+        A share of the new rows joins a persistent holdout. The candidate is
+        published only if its holdout RMSE does not exceed the active model's
+        by more than tolerance (relative); rejected data stays pending.
+
+        Parameters:
+        name (str): Registry model name.
+        data_dir (str): Training data directory, defaults to Config.TRAINING_DATA_PATH.
+        registry (ModelRegistry): Defaults to ModelRegistry().
+        epochs (int): Passes over the new (and replayed) rows.
+        holdout_fraction (float): Share of new rows kept for validation.
+        buffer_size (int): Rows of the replay reservoir.
+        hidden_layers (tuple): Network of the first model when none is registered yet.
+        """
+        self.name = name
+        self.data_dir = data_dir or Config.TRAINING_DATA_PATH
+        self.registry = registry or ModelRegistry()
+        self.target_column = target_column
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.holdout_fraction = holdout_fraction
+        self.replay_ratio = replay_ratio
+        self.buffer_size = buffer_size
+        self.tolerance = tolerance
+        self.hidden_layers = hidden_layers
+        self.rng = np.random.default_rng(seed)
+
+    def _active(self):
+        try:
+            version = self.registry.active_version(self.name)
+        except KeyError:
+            return None, {}
+        return version, self.registry.metadata(self.name, version)
+
+    def scan(self, known=None):
+        """
+        Compare the CSV files of data_dir with the fingerprints of a published version.
+
+        Returns:
+        tuple: (files, changes); files maps every file name to its fingerprint
+        (sha256, size, mtime), changes lists the files to train on as dicts with
+        file, path, offset (byte offset of the new rows) and start_row.
+        """
+        known = known or {}
+        files, changes = {}, []
+        for filename in sorted(os.listdir(self.data_dir)):
+            path = os.path.join(self.data_dir, filename)
+            if not filename.endswith('.csv') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            old = known.get(filename)
+            if old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime:
+                files[filename] = old
+                continue
+            grew = old is not None and stat.st_size > old['size']
+            digest, prefix = _hash_file(path, old['size'] if grew else None)
+            files[filename] = {'sha256': digest, 'size': stat.st_size, 'mtime': stat.st_mtime,
+                               'rows': old['rows'] if old else 0}
+            if old and digest == old['sha256']:
+                continue
+            if grew and prefix == old['sha256'] and _ends_with_newline(path, old['size']):
+                changes.append({'file': filename, 'path': path, 'offset': old['size'], 'start_row': old['rows']})
+            else:
+                changes.append({'file': filename, 'path': path, 'offset': 0, 'start_row': 0})
+        return files, changes
+
+    def _load_state(self, version, n_features):
+        empty = np.empty((0, n_features))
+        state = {'holdout_X': empty, 'holdout_y': np.empty(0), 'replay_X': empty, 'replay_y': np.empty(0),
+                 'seen': 0}
+        if version is not None:
+            path = os.path.join(self.registry.version_path(self.name, version), STATE_FILE)
+            if os.path.exists(path):
+                with np.load(path) as data:
+                    state.update({key: data[key] for key in data.files})
+                state['seen'] = int(state['seen'])
+        return state
+
+    def _new_bundle(self):
+        from backend.models.pfc_model import PFCModel
+
+        model = PFCModel(hidden_layers=self.hidden_layers)
+        model.model.set_params(verbose=False)
+        return {'model': model.model, 'scaler_X': model.scaler_X, 'scaler_y': model.scaler_y, 'trained': False}
+
+    def _update_reservoir(self, state, X, y):
+        """Reservoir sampling: every training row seen so far is kept with equal probability."""
+        replay_X, replay_y = list(state['replay_X']), list(state['replay_y'])
+        seen = state['seen']
+        for i in range(len(X)):
+            if len(replay_X) < self.buffer_size:
+                replay_X.append(X[i])
+                replay_y.append(y[i])
+            else:
+                slot = self.rng.integers(seen + i + 1)
+                if slot < self.buffer_size:
+                    replay_X[slot], replay_y[slot] = X[i], y[i]
+        state['replay_X'] = np.array(replay_X).reshape(-1, X.shape[1])
+        state['replay_y'] = np.array(replay_y)
+        state['seen'] = seen + len(X)
+
+    def retrain(self):
+        """
+        Run one retrain cycle.
+
+        Returns:
+        dict: published flag, version, base_version, new_rows, metrics and
+        baseline_metrics on the holdout, and seconds.
+        """
+        started = time.perf_counter()
+        version, metadata = self._active()
+        files, changes = self.scan(metadata.get('data_files'))
+        report = {'published': False, 'version': version, 'base_version': version, 'new_rows': 0,
+                  'files': [change['file'] for change in changes]}
+        if not changes:
+            report.update(reason='no new data', seconds=time.perf_counter() - started)
+            return report
+
+        features = metadata.get('features')
+        X_parts, y_parts, holdout_parts = [], [], []
+        for change in changes:
+            data = _read_rows(change['path'], change['offset']).dropna()
+            if features is None:
+                features = [c for c in data.columns if c != self.target_column]
+            missing = set(features + [self.target_column]) - set(data.columns)
+            if missing:
+                raise ValueError(f"{change['file']} lacks columns: {sorted(missing)}")
+            files[change['file']]['rows'] = change['start_row'] + len(data)
+            # the holdout split of a row depends only on the file content, not on the cycle
+            rng = np.random.default_rng(int(files[change['file']]['sha256'][:16], 16))
+            X_parts.append(data[features].to_numpy(dtype=float))
+            y_parts.append(data[self.target_column].to_numpy(dtype=float))
+            holdout_parts.append(rng.random(len(data)) < self.holdout_fraction)
+        X_new, y_new, holdout = np.vstack(X_parts), np.concatenate(y_parts), np.concatenate(holdout_parts)
+        report['new_rows'] = len(y_new)
+
+        state = self._load_state(version, len(features))
+        state['holdout_X'] = np.vstack([state['holdout_X'], X_new[holdout]])
+        state['holdout_y'] = np.concatenate([state['holdout_y'], y_new[holdout]])
+        X_train, y_train = X_new[~holdout], y_new[~holdout]
+        if len(state['holdout_y']) == 0 or len(y_train) == 0:
+            raise ValueError("Not enough new rows for training and validation")
+
+        bundle = self.registry.load_artifact(self.name, version) if version else self._new_bundle()
+        if not isinstance(bundle, dict) or not hasattr(bundle.get('model'), 'partial_fit'):
+            raise ValueError(f"Model {self.name} {version} cannot be warm-started (needs an MLP bundle)")
+        if bundle.get('targets'):
+            raise ValueError(f"Model {self.name} {version} is multi-target; retrain it with PFCModel.train")
+        baseline = _score(bundle, state['holdout_X'], state['holdout_y']) if version else None
+
+        update_scalers(bundle, X_train, y_train)
+        n_replay = min(int(self.replay_ratio * len(y_train)), len(state['replay_y']))
+        replay = self.rng.choice(len(state['replay_y']), n_replay, replace=False)
+        X_fit = np.vstack([X_train, state['replay_X'][replay]])
+        y_fit = np.concatenate([y_train, state['replay_y'][replay]])
+        X_fit = bundle['scaler_X'].transform(X_fit)
+        y_fit = bundle['scaler_y'].transform(y_fit.reshape(-1, 1)).ravel()
+
+        model = bundle['model']
+        verbose = model.verbose
+        model.set_params(verbose=False)
+        try:
+            for _ in range(self.epochs):
+                order = self.rng.permutation(len(y_fit))
+                for start in range(0, len(order), self.batch_size):
+                    batch = order[start:start + self.batch_size]
+                    model.partial_fit(X_fit[batch], y_fit[batch])
+        finally:
+            model.set_params(verbose=verbose)
+        bundle['trained'] = True
+
+        metrics = _score(bundle, state['holdout_X'], state['holdout_y'])
+        report.update(metrics=metrics, baseline_metrics=baseline)
+        if baseline is not None and metrics['rmse'] > baseline['rmse'] * (1.0 + self.tolerance):
+            report.update(reason='holdout regression', seconds=time.perf_counter() - started)
+            return report
+
+        self._update_reservoir(state, X_train, y_train)
+        training_hash = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        new_version = self.registry.register(
+            self.name, bundle, features=features, metrics=metrics, training_hash=training_hash,
+            data_files=files, base_version=version, new_rows=len(y_new), training_rows=state['seen'])
+        if new_version == version:
+            # the replay and holdout state of the base version must survive next to it
+            raise RuntimeError(f"Registry reused version {version} of model {self.name}")
+        np.savez(os.path.join(self.registry.version_path(self.name, new_version), STATE_FILE), **state)
+        report.update(published=True, version=new_version, seconds=time.perf_counter() - started)
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm-start retraining of a registry model from new data')
+    parser.add_argument('--name', default='pfc')
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--registry', default=None)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.0)
+    args = parser.parse_args()
+
+    trainer = IncrementalTrainer(args.name, args.data_dir, ModelRegistry(args.registry),
+                                 epochs=args.epochs, tolerance=args.tolerance)
+    report = trainer.retrain()
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
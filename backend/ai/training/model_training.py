@@ -1,3 +1,5 @@
+import json
+
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
@@ -5,13 +7,25 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 import joblib
 
+from backend.ai.training.dataset_store import load_dataset
+from backend.ai.training.hyperparameter_search import build_estimator
+
 class PFCModelTrainer:
-    def __init__(self, data_path):
+    def __init__(self, data_path, model=None):
         self.data_path = data_path
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model = model if model is not None else RandomForestRegressor(n_estimators=100, random_state=42)
+
+    @classmethod
+    def from_search(cls, data_path, summary_path):
+        """Trainer for the winning configuration of a hyperparameter search (best_model.json)."""
+        with open(summary_path) as f:
+            config = json.load(f)['config']
+        if config['family'] == 'mlp':
+            config['params']['hidden_layer_sizes'] = tuple(config['params']['hidden_layer_sizes'])
+        return cls(data_path, build_estimator(config))
 
     def load_data(self):
-        data = pd.read_csv(self.data_path)
+        data = load_dataset(self.data_path)
         X = data.drop('target', axis=1)
         y = data['target']
         return X, y
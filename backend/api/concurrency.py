@@ -0,0 +1,57 @@
+import os
+
+# Async mode of the Socket.IO server, set by configure() at startup
+_mode = 'threading'
+
+
+def resolve_async_mode(requested=None):
+    """The requested mode, else the first of eventlet / gevent that is installed, else threading."""
+    if requested:
+        return requested
+    for candidate in ('eventlet', 'gevent'):
+        try:
+            __import__(candidate)
+            return candidate
+        except ImportError:
+            continue
+    return 'threading'
+
+
+def configure(async_mode, workers=None):
+    """
+    Record the server's async mode and size the OS-thread pool used by run_blocking.
+
+    Parameters:
+    async_mode (str): 'eventlet', 'gevent' or 'threading' (SocketIO.async_mode).
+    workers (int): OS threads available for CPU-bound request work.
+    """
+    global _mode
+    _mode = async_mode or 'threading'
+    workers = workers or os.cpu_count() or 1
+    if _mode == 'eventlet':
+        from eventlet import tpool
+        tpool.set_num_threads(workers)
+    elif _mode == 'gevent':
+        import gevent
+        gevent.get_hub().threadpool.maxsize = workers
+
+
+def async_mode():
+    return _mode
+
+
+def run_blocking(fn, *args, **kwargs):
+    """
+    Call a CPU-bound function without stalling the cooperative event loop.
+
+    Under eventlet / gevent the call runs on a native thread pool while the
+    calling green thread yields; in threading mode every request already has
+    its own OS thread and the function is called directly.
+    """
+    if _mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(fn, *args, **kwargs)
+    if _mode == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+    return fn(*args, **kwargs)
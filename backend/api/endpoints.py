@@ -1,8 +1,9 @@
 from flask import Blueprint, request, jsonify
-from backend.ai.inference.predictor import Predictor
+from backend.ai.optimization.task_manager import task_manager
 
-api = Blueprint('api', __name__)
-predictor = Predictor()
+api = Blueprint('endpoints', __name__)
+# Models are loaded lazily on first use, so importing this module stays cheap
+registry = task_manager.registry
 
 @api.route('/optimize/pfc', methods=['POST'])
 def optimize_pfc():
@@ -10,10 +11,15 @@ def optimize_pfc():
     if not data or 'parameters' not in data:
         return jsonify({'error': 'Invalid input'}), 400
     
-    parameters = data['parameters']
-    optimization_result = predictor.optimize_pfc(parameters)
+    model = data.get('model', 'pfc')
+    if not task_manager.has_surrogate(model):
+        return jsonify({'error': f"Model not registered: {model}"}), 404
+    try:
+        task_id = task_manager.submit(dict(data['parameters'], model=model))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(optimization_result), 200
+    return jsonify({'taskId': task_id, 'status': 'queued'}), 202
 
 @api.route('/optimize/buck', methods=['POST'])
 def optimize_buck():
@@ -21,11 +27,52 @@ def optimize_buck():
     if not data or 'parameters' not in data:
         return jsonify({'error': 'Invalid input'}), 400
     
-    parameters = data['parameters']
-    optimization_result = predictor.optimize_buck(parameters)
+    model = data.get('model', 'buck')
+    try:
+        registry.active_version(model)
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    try:
+        task_id = task_manager.submit(dict(data['parameters'], model=model))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(optimization_result), 200
+    return jsonify({'taskId': task_id, 'status': 'queued'}), 202
+
+@api.route('/optimize/tasks/<task_id>', methods=['GET'])
+def optimization_status(task_id):
+    try:
+        return jsonify(task_manager.status(task_id)), 200
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+
+@api.route('/models', methods=['GET'])
+def list_models():
+    return jsonify(registry.list_models()), 200
+
+@api.route('/models/<name>/activate', methods=['POST'])
+def activate_model(name):
+    data = request.json
+    if not data or 'version' not in data:
+        return jsonify({'error': 'Invalid input'}), 400
+    try:
+        registry.activate(name, data['version'])
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    return jsonify({'name': name, 'active': data['version']}), 200
+
+@api.route('/predict/<name>', methods=['POST'])
+def predict(name):
+    data = request.json
+    if not data or 'inputs' not in data:
+        return jsonify({'error': 'Invalid input'}), 400
+    try:
+        predictor = registry.predictor(name)
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    predictions = predictor.predict_batch(data['inputs'])
+    return jsonify({'predictions': predictions.tolist()}), 200
 
 @api.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy'}), 200
\ No newline at end of file
+    return jsonify({'status': 'healthy'}), 200
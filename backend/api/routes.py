@@ -1,10 +1,29 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+import os
+import json
+import math
 import random
-import time
 from datetime import datetime
 
+import numpy as np
+
+from backend.config.settings import Config
+from backend.ai.optimization.task_manager import task_manager
+from backend.simulation.result_cache import ResultCache
+from backend.simulation.simulation_service import run_simulation as simulate_request, thermal_history, efficiency_map_request, format_metrics
+from backend.simulation.response_surface import surface_for
+from backend.api.concurrency import run_blocking
+from backend.api.waveform_transport import MIMETYPES, negotiate, decimate, encode, encode_frame, decode_frame
+
 api_bp = Blueprint('api', __name__)
 
+# 仿真结果缓存：键为规范化、量化后的参数，值为序列化好的响应体
+simulation_cache = ResultCache(
+    max_bytes=Config.SIMULATION_CACHE_MAX_BYTES,
+    disk_dir=os.path.join(Config.SIMULATION_RESULTS_PATH, 'cache') if Config.SIMULATION_CACHE_DISK else None,
+    significant_digits=Config.SIMULATION_CACHE_DIGITS
+)
+
 # 系统状态接口
 @api_bp.route('/system/status', methods=['GET'])
 def get_system_status():
@@ -44,44 +63,125 @@ def get_topology_data(topology_type):
         "modelUrl": f"/models/{topology_type}.glb"
     })
 
+# 预计算响应面查表：参数滑块拖动时的实时指标（多线性插值，无需在线仿真）
+@api_bp.route('/topology/<topology_type>/metrics', methods=['GET'])
+def get_topology_metrics(topology_type):
+    surface = surface_for(topology_type)
+    if surface is None:
+        return jsonify({
+            "error": "Not Found",
+            "message": f"拓扑 {topology_type} 尚未生成响应面查表"
+        }), 404
+    try:
+        params = {name: float(request.args[name]) for name in surface.names if name in request.args}
+        # nan / inf 会使插值结果成为非法JSON
+        invalid = [name for name, value in params.items() if not math.isfinite(value)]
+        if invalid:
+            raise ValueError(f"参数必须是有限数值: {', '.join(invalid)}")
+    except ValueError as e:
+        return jsonify({
+            "error": "Bad Request",
+            "message": str(e)
+        }), 400
+
+    ranges = surface.ranges()
+    return jsonify({
+        "metrics": format_metrics(surface.query(**params)),
+        # 超出表格范围的参数按边界值查询
+        "clamped": [name for name, value in params.items()
+                    if not ranges[name][0] <= value <= ranges[name][1]],
+        "errorBound": dict(zip(surface.outputs, surface.meta.get('error_bound', []))),
+        "ranges": ranges,
+        "fixed": surface.fixed
+    })
+
+# 根据 ?format= 或 Accept 头协商波形编码，?width= 为前端绘图的像素宽度
+# （3 到 WAVEFORM_MAX_WIDTH 之间，超出上限按上限处理；完整分辨率需显式请求 ?width=full）
+def _waveform_request():
+    fmt = negotiate(request)
+    if fmt is None:
+        return None, None, (jsonify({
+            "error": "Not Acceptable",
+            "message": f"不支持的波形格式: {request.args.get('format')}"
+        }), 406)
+    raw = request.args.get('width')
+    if raw is None:
+        return fmt, Config.WAVEFORM_DEFAULT_WIDTH, None
+    if raw == 'full':
+        return fmt, None, None
+    try:
+        width = int(raw)
+    except ValueError:
+        width = None
+    if width is None or width < 3:
+        return None, None, (jsonify({
+            "error": "Bad Request",
+            "message": f"width 必须是不小于3的整数或 full: {raw}"
+        }), 400)
+    return fmt, min(width, Config.WAVEFORM_MAX_WIDTH), None
+
 # 运行电路仿真
 @api_bp.route('/simulation/run', methods=['POST'])
 def run_simulation():
-    params = request.get_json()
+    params = request.get_json() or {}
+    fmt, width, error = _waveform_request()
+    if error:
+        return error
     
-    # 模拟仿真计算
-    time.sleep(0.5)  # 模拟计算时间
-    
-    # 根据参数生成模拟结果
-    base_efficiency = 93 + random.uniform(-2, 5)
-    thd = 5 - (params.get('inductorValue', 0.5) * 4) + random.uniform(0, 2)
-    power_factor = 0.9 + (params.get('inductorValue', 0.5) * 0.1) - random.uniform(0, 0.05)
-    peak_temp = 45 + (params.get('loadPower', 1000) / params.get('outputVoltage', 400)) * 10 + random.uniform(0, 5)
+    # 完整分辨率的仿真结果与每种格式/宽度的响应体分别缓存，相同参数不再重新仿真
+    raw_key = simulation_cache.key(params)
+    key = simulation_cache.key(params, namespace=f"{fmt}:{width}")
+
+    # CPU 密集的仿真与编码在原生线程池中执行，不阻塞协程事件循环
+    def render():
+        frame, _ = simulation_cache.get_or_compute(
+            raw_key, lambda: run_blocking(lambda: encode_frame(simulate_request(params), dtype='float64'))
+        )
+        return run_blocking(lambda: encode(decimate(decode_frame(frame), width), fmt))
+
+    try:
+        body, hit = simulation_cache.get_or_compute(key, render)
+    except ValueError as e:
+        return jsonify({
+            "error": "Bad Request",
+            "message": str(e)
+        }), 400
     
-    return jsonify({
-        "metrics": {
-            "efficiency": round(base_efficiency, 1),
-            "thd": round(thd, 1),
-            "powerFactor": round(power_factor, 2),
-            "peakTemp": round(peak_temp, 1),
-            "simulationTime": random.randint(200, 500)
-        },
-        "waveforms": {
-            "voltage": {
-                "labels": [i/100 for i in range(100)],
-                "values": [311 * (0.8 + 0.4 * random.random()) for _ in range(100)],
-                "reference": [400] * 100
-            },
-            "current": {
-                "labels": [i/100 for i in range(100)],
-                "values": [15 * (0.5 + 0.5 * random.random()) for _ in range(100)],
-                "reference": [0] * 100
-            },
-            "switchingSignal": {
-                "labels": [i/100 for i in range(100)],
-                "values": [15 if i % 10 < 5 else 0 for i in range(100)]
-            }
-        }
+    return Response(body, mimetype=MIMETYPES[fmt], headers={
+        'X-Cache': 'HIT' if hit else 'MISS',
+        'ETag': key,
+        'Vary': 'Accept'
+    })
+
+# 仿真缓存命中率等指标
+@api_bp.route('/simulation/cache', methods=['GET'])
+def get_simulation_cache_metrics():
+    return jsonify(simulation_cache.metrics())
+
+# 清空仿真缓存
+@api_bp.route('/simulation/cache', methods=['DELETE'])
+def clear_simulation_cache():
+    simulation_cache.clear(disk=request.args.get('disk', 'false').lower() in ['true', '1'])
+    return jsonify({"success": True})
+
+# 电热联合仿真效率图：负载 × 输入电压 × 环境温度
+@api_bp.route('/simulation/efficiency-map', methods=['POST'])
+def run_efficiency_map():
+    params = request.get_json() or {}
+    key = simulation_cache.key(params, namespace='efficiency-map')
+    try:
+        body, hit = simulation_cache.get_or_compute(
+            key, lambda: run_blocking(lambda: json.dumps(efficiency_map_request(params)).encode())
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "error": "Bad Request",
+            "message": str(e)
+        }), 400
+
+    return Response(body, mimetype='application/json', headers={
+        'X-Cache': 'HIT' if hit else 'MISS',
+        'ETag': key
     })
 
 # 保存拓扑设置
@@ -89,9 +189,6 @@ def run_simulation():
 def save_topology_settings():
     settings = request.get_json()
     
-    # 模拟保存操作
-    time.sleep(0.2)
-    
     return jsonify({
         "success": True,
         "message": "设置已成功保存",
@@ -102,11 +199,11 @@ def save_topology_settings():
 @api_bp.route('/ai/results', methods=['POST'])
 def get_ai_results():
     params = request.get_json()
+    fmt, width, error = _waveform_request()
+    if error:
+        return error
     
-    # 模拟AI分析
-    time.sleep(1)
-    
-    return jsonify({
+    results = {
         "before": {
             "efficiency": 93.2,
             "thd": 4.5,
@@ -118,56 +215,92 @@ def get_ai_results():
             "thd": 1.9,
             "powerFactor": 0.99,
             "peakTemp": 65
+        }
+    }
+    waveforms = {
+        "before": {
+            "voltage": [310 * (0.9 + 0.2 * random.random()) for _ in range(100)],
+            "current": [10 * (0.8 + 0.4 * random.random()) for _ in range(100)]
         },
-        "waveformData": {
-            "before": {
-                "voltage": [310 * (0.9 + 0.2 * random.random()) for _ in range(100)],
-                "current": [10 * (0.8 + 0.4 * random.random()) for _ in range(100)]
-            },
-            "after": {
-                "voltage": [310 * (0.95 + 0.1 * random.random()) for _ in range(100)],
-                "current": [10 * (0.9 + 0.2 * random.random()) for _ in range(100)]
-            }
+        "after": {
+            "voltage": [310 * (0.95 + 0.1 * random.random()) for _ in range(100)],
+            "current": [10 * (0.9 + 0.2 * random.random()) for _ in range(100)]
         }
+    }
+    if fmt == 'json':
+        return jsonify(dict(results, waveformData=waveforms))
+    
+    # 二进制格式：四条曲线共享同一个采样轴
+    waveset = dict(results, axes={"sample": np.arange(100, dtype=float)}, waveforms={
+        f"{stage}.{name}": {"axis": "sample", "values": np.asarray(values)}
+        for stage, traces in waveforms.items() for name, values in traces.items()
     })
+    return Response(encode(decimate(waveset, width), fmt), mimetype=MIMETYPES[fmt], headers={'Vary': 'Accept'})
 
 # 执行AI优化
 @api_bp.route('/ai/optimize', methods=['POST'])
 def run_ai_optimization():
-    params = request.get_json()
+    params = request.get_json() or {}
     
-    # 模拟优化过程
-    task_id = f"task-{int(time.time())}"
+    # 在后台线程中运行基于代理模型的设计优化
+    try:
+        task_id = task_manager.submit(params)
+    except ValueError as e:
+        return jsonify({
+            "error": "Bad Request",
+            "message": str(e)
+        }), 400
     
     return jsonify({
         "success": True,
         "taskId": task_id,
         "message": "AI优化任务已启动",
-        "estimatedTime": "2-3分钟"
-    })
+        "statusUrl": f"/api/ai/optimize/{task_id}"
+    }), 202
+
+# 查询AI优化任务状态与结果
+@api_bp.route('/ai/optimize/<task_id>', methods=['GET'])
+def get_ai_optimization(task_id):
+    try:
+        return jsonify(task_manager.status(task_id))
+    except KeyError:
+        return jsonify({
+            "error": "Not Found",
+            "message": f"优化任务不存在: {task_id}"
+        }), 404
+
+# 取消AI优化任务
+@api_bp.route('/ai/optimize/<task_id>/cancel', methods=['POST'])
+def cancel_ai_optimization(task_id):
+    try:
+        task_manager.cancel(task_id)
+    except KeyError:
+        return jsonify({
+            "error": "Not Found",
+            "message": f"优化任务不存在: {task_id}"
+        }), 404
+    return jsonify({"success": True, "taskId": task_id})
 
 # 获取热分布数据
 @api_bp.route('/thermal/data', methods=['GET'])
 def get_thermal_data():
     import datetime
-    
-    data = []
+
+    # 过去1小时的器件温度：按负载曲线计算损耗，经 Foster 热网络瞬态求解
+    try:
+        history = run_blocking(thermal_history, request.args.to_dict())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     now = datetime.datetime.now()
-    
-    # 生成过去1小时的数据点
-    for i in range(12):
-        time_point = now - datetime.timedelta(minutes=i*5)
-        data.append({
-            "time": time_point.strftime("%H:%M"),
-            "temperature": 60 + random.uniform(0, 15),
-            "mosfetTemp": 65 + random.uniform(0, 20),
-            "inductorTemp": 55 + random.uniform(0, 10),
-            "diodeTemp": 60 + random.uniform(0, 15),
-            "controllerTemp": 40 + random.uniform(0, 5),
-            "ambientTemp": 25 + random.uniform(0, 2)
-        })
-    
-    return jsonify(data[::-1])  # 反转列表，最新的在后面
+    start = now - datetime.timedelta(seconds=history[-1]['elapsed'])
+    data = []
+    for point in history:
+        point = dict(point)
+        time_point = start + datetime.timedelta(seconds=point.pop('elapsed'))
+        data.append({"time": time_point.strftime("%H:%M"), **point})
+
+    return jsonify(data)  # 最新的在后面
 
 # 错误处理
 @api_bp.errorhandler(400)
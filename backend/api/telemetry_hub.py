@@ -0,0 +1,157 @@
+import threading
+from collections import deque
+
+
+class TelemetryHub:
+    def __init__(self, socketio, sample_interval=0.5, flush_interval=2.0, buffer_size=120, max_lag=3):
+        """
+        One sampler and one flusher for all telemetry subscribers.
+
+        Every topic has a sample function and a bounded ring buffer (the
+        oldest samples are dropped when it is full). The flusher broadcasts the
+        samples gathered since the last flush to the topic's room in a single
+        emit, so the work per flush does not grow with the number of clients.
+
+        Clients subscribing with ack=True acknowledge every batch
+        ('telemetry_ack'); one that falls max_lag batches behind is taken out of
+        the live room and later receives a single catch-up emit with whatever
+        is still in the ring buffer once it acknowledges again.
+
+        Parameters:
+        socketio (SocketIO): Server used for rooms, emits and background tasks.
+        sample_interval (float): Seconds between samples of every active topic.
+        flush_interval (float): Seconds between coalesced emits.
+        buffer_size (int): Samples kept per topic.
+        max_lag (int): Unacknowledged batches before a client is treated as slow.
+        """
+        self.socketio = socketio
+        self.sample_interval = sample_interval
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.max_lag = max_lag
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._generation = 0
+        self.emits = 0
+        self.dropped = 0
+
+    def register(self, topic, sample_fn, event=None):
+        """Add a topic; sample_fn() returns one JSON-serializable sample dict."""
+        self._topics[topic] = {
+            'sample_fn': sample_fn,
+            'event': event or f'{topic}_update',
+            'buffer': deque(maxlen=self.buffer_size),
+            'seq': 0,
+            'flushed': 0,
+            'recent_flushes': deque(maxlen=self.max_lag + 1),  # last seq of the latest batches
+            'subscribers': {},  # sid -> {'ack': bool, 'acked': seq, 'live': bool}
+        }
+
+    def subscribe(self, sid, topic, ack=False):
+        if topic not in self._topics:
+            raise KeyError(f"Unknown telemetry topic: {topic}")
+        info = self._topics[topic]
+        self.socketio.server.enter_room(sid, topic, namespace='/')
+        with self._lock:
+            info['subscribers'][sid] = {'ack': ack, 'acked': info['seq'], 'live': True}
+            start = not self._running
+            if start:
+                self._running = True
+                self._generation += 1
+                generation = self._generation
+        if start:
+            self.socketio.start_background_task(self._sampler, generation)
+            self.socketio.start_background_task(self._flusher, generation)
+
+    def unsubscribe(self, sid, topic=None):
+        """Leave one topic, or every topic (on disconnect)."""
+        for name, info in self._topics.items():
+            if topic is not None and name != topic:
+                continue
+            with self._lock:
+                removed = info['subscribers'].pop(sid, None)
+            if removed is not None and removed['live']:
+                self.socketio.server.leave_room(sid, name, namespace='/')
+
+    def acknowledge(self, sid, topic, seq):
+        """Record a client's last received sequence number; resume it if it was lagging."""
+        info = self._topics.get(topic)
+        if info is None:
+            return
+        with self._lock:
+            client = info['subscribers'].get(sid)
+            if client is None:
+                return
+            client['acked'] = max(client['acked'], int(seq))
+            resume = not client['live']
+            if resume:
+                client['live'] = True
+                missed = [s for s in info['buffer'] if s['seq'] > client['acked']]
+                # the catch-up batch restarts the lag count
+                client['acked'] = info['seq']
+        if resume:
+            if missed:
+                self.socketio.emit(info['event'], self._payload(missed), to=sid)
+                self.emits += 1
+            self.socketio.server.enter_room(sid, topic, namespace='/')
+
+    @staticmethod
+    def _payload(samples):
+        # the latest sample at the top level keeps single-sample consumers working
+        return dict(samples[-1], samples=samples)
+
+    def _active(self):
+        return [(name, info) for name, info in self._topics.items() if info['subscribers']]
+
+    def _alive(self, generation):
+        return self._running and self._generation == generation
+
+    def _sampler(self, generation):
+        while self._alive(generation):
+            for name, info in self._active():
+                sample = dict(info['sample_fn']())
+                with self._lock:
+                    info['seq'] += 1
+                    sample['seq'] = info['seq']
+                    if len(info['buffer']) == info['buffer'].maxlen:
+                        self.dropped += 1
+                    info['buffer'].append(sample)
+            self.socketio.sleep(self.sample_interval)
+
+    def _flusher(self, generation):
+        while self._alive(generation):
+            self.socketio.sleep(self.flush_interval)
+            for name, info in self._active():
+                with self._lock:
+                    batch = [s for s in info['buffer'] if s['seq'] > info['flushed']]
+                    if not batch:
+                        continue
+                    info['flushed'] = batch[-1]['seq']
+                    recent = info['recent_flushes']
+                    recent.append(info['flushed'])
+                    # slow: has not acknowledged any of the last max_lag batches
+                    slow = [sid for sid, c in info['subscribers'].items()
+                            if c['ack'] and c['live'] and len(recent) == recent.maxlen and c['acked'] < recent[0]]
+                    for sid in slow:
+                        info['subscribers'][sid]['live'] = False
+                for sid in slow:
+                    self.socketio.server.leave_room(sid, name, namespace='/')
+                self.socketio.emit(info['event'], self._payload(batch), to=name)
+                self.emits += 1
+            with self._lock:
+                if not any(info['subscribers'] for info in self._topics.values()):
+                    self._running = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'running': self._running,
+                'emits': self.emits,
+                'dropped': self.dropped,
+                'topics': {name: {'subscribers': len(info['subscribers']),
+                                  'lagging': sum(not c['live'] for c in info['subscribers'].values()),
+                                  'buffered': len(info['buffer']),
+                                  'seq': info['seq']}
+                           for name, info in self._topics.items()},
+            }
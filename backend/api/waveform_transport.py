@@ -0,0 +1,259 @@
+import json
+import struct
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # optional: application/x-msgpack is not offered without it
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow IPC is not offered without it
+    pa = None
+
+# A waveform set is a dict with
+#   'axes':      {name: 1-D time array}, shared by every trace that names it
+#   'waveforms': {name: {'axis': axis name, 'values': 1-D array, 'reference': float (optional)}}
+# plus any JSON-serializable entries (e.g. 'metrics') carried along unchanged.
+
+FRAME_MAGIC = b'PFCW'
+FRAME_MIMETYPE = 'application/vnd.pfc.waveform'
+MIMETYPES = {
+    'json': 'application/json',
+    'float32': FRAME_MIMETYPE,
+    'msgpack': 'application/x-msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def available_formats():
+    formats = ['json', 'float32']
+    if msgpack is not None:
+        formats.append('msgpack')
+    if pa is not None:
+        formats.append('arrow')
+    return formats
+
+
+def negotiate(request, default='json'):
+    """
+    Pick the response format from ?format=... or the Accept header.
+
+    Returns:
+    str: A key of MIMETYPES, or None when the explicitly requested format is unavailable.
+    """
+    formats = available_formats()
+    requested = request.args.get('format')
+    if requested:
+        return requested if requested in formats else None
+    best = request.accept_mimetypes.best_match([MIMETYPES[f] for f in formats], default=MIMETYPES[default])
+    return next(f for f in formats if MIMETYPES[f] == best)
+
+
+def _minmax_candidates(y, buckets):
+    """Indices of the minimum and maximum of y in each of `buckets` equal slices (plus both ends)."""
+    n = len(y)
+    inner = y[1:-1]
+    size = -(-len(inner) // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:len(inner)] = inner
+    padded = padded.reshape(buckets, size)
+    valid = ~np.isnan(padded).all(axis=1)
+    offsets = np.arange(buckets)[valid] * size + 1
+    lows = offsets + np.nanargmin(padded[valid], axis=1)
+    highs = offsets + np.nanargmax(padded[valid], axis=1)
+    return np.unique(np.concatenate(([0], lows, highs, [n - 1])))
+
+
+def minmax_lttb(x, y, n_out, minmax_ratio=4):
+    """
+    Largest-Triangle-Three-Buckets down-sampling with a min/max preselection.
+
+    The series is first reduced to the minimum and maximum of
+    n_out * minmax_ratio / 2 buckets (which keeps every local extreme at that
+    resolution), then LTTB picks one point per output bucket from those
+    candidates. The global minimum and maximum are always kept.
+
+    Returns:
+    np.ndarray: Sorted indices into x / y.
+    """
+    if n_out < 3:
+        raise ValueError(f"Decimation needs at least 3 output points, got {n_out}")
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    candidates = _minmax_candidates(y, max(n_out * minmax_ratio // 2, 1)) if n > n_out * minmax_ratio else np.arange(n)
+    cx, cy = x[candidates], y[candidates]
+
+    edges = np.linspace(1, len(candidates) - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, len(candidates) - 1
+    previous = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], max(edges[b + 1], edges[b] + 1)
+        if b + 2 < len(edges):
+            nxt = slice(edges[b + 1], max(edges[b + 2], edges[b + 1] + 1))
+            ax, ay = cx[nxt].mean(), cy[nxt].mean()
+        else:
+            ax, ay = cx[-1], cy[-1]
+        px, py = cx[previous], cy[previous]
+        area = np.abs((px - ax) * (cy[lo:hi] - py) - (px - cx[lo:hi]) * (ay - py))
+        previous = lo + int(np.argmax(area))
+        selected[b + 1] = previous
+    indices = candidates[np.unique(selected)]
+    return np.union1d(indices, [np.argmin(y), np.argmax(y)])
+
+
+def decimate(waveset, width):
+    """
+    Reduce every trace to about `width` points (one per pixel column).
+
+    Traces sharing an axis keep sharing it: the axis is cut to the union of
+    the points each of its traces selects. width=None keeps full resolution;
+    widths below 3 raise ValueError.
+    """
+    if width is None:
+        return waveset
+    indices = {}
+    for trace in waveset['waveforms'].values():
+        x = waveset['axes'][trace['axis']]
+        chosen = minmax_lttb(x, np.asarray(trace['values'], dtype=float), width)
+        indices[trace['axis']] = np.union1d(indices.get(trace['axis'], chosen), chosen)
+    result = {k: v for k, v in waveset.items() if k not in ('axes', 'waveforms')}
+    result['axes'] = {name: x[indices[name]] if name in indices else x for name, x in waveset['axes'].items()}
+    result['waveforms'] = {name: dict(trace, values=np.asarray(trace['values'])[indices[trace['axis']]])
+                           for name, trace in waveset['waveforms'].items()}
+    return result
+
+
+def _meta(waveset):
+    return {k: v for k, v in waveset.items() if k not in ('axes', 'waveforms')}
+
+
+def to_json(waveset):
+    """The legacy JSON layout: labels / values / reference lists per trace."""
+    waveforms = {}
+    for name, trace in waveset['waveforms'].items():
+        entry = {'labels': waveset['axes'][trace['axis']].tolist(), 'values': np.asarray(trace['values']).tolist()}
+        if 'reference' in trace:
+            entry['reference'] = [trace['reference']] * len(entry['values'])
+        waveforms[name] = entry
+    return dict(_meta(waveset), waveforms=waveforms)
+
+
+def encode_frame(waveset, dtype='float32'):
+    """
+    Binary frame: b'PFCW', uint32 little-endian header length, JSON header,
+    zero padding to 8 bytes, then the raw little-endian arrays.
+
+    The header lists byte offsets (from the start of the data block) and
+    lengths of every axis and trace, so a browser can view them directly as
+    Float32Array. Time axes are stored relative to their 'origin' to keep
+    float32 precision.
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    blocks, offset = [], 0
+    header = dict(_meta(waveset), dtype=dtype.name, axes={}, waveforms={})
+
+    def add(array):
+        nonlocal offset
+        data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+        blocks.append(data)
+        offset += len(data)
+        return offset - len(data)
+
+    for name, x in waveset['axes'].items():
+        x = np.asarray(x, dtype=float)
+        origin = float(x[0]) if len(x) else 0.0
+        header['axes'][name] = {'offset': add(x - origin), 'length': len(x), 'origin': origin}
+    for name, trace in waveset['waveforms'].items():
+        entry = {k: v for k, v in trace.items() if k != 'values'}
+        entry.update(offset=add(trace['values']), length=len(trace['values']))
+        header['waveforms'][name] = entry
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    prefix = FRAME_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes
+    prefix += b'\0' * (-len(prefix) % 8)
+    return prefix + b''.join(blocks)
+
+
+def decode_frame(frame):
+    """Inverse of encode_frame (arrays come back as views of the frame buffer)."""
+    if frame[:4] != FRAME_MAGIC:
+        raise ValueError("Not a waveform frame")
+    (length,) = struct.unpack_from('<I', frame, 4)
+    header = json.loads(frame[8:8 + length])
+    start = 8 + length + (-(8 + length) % 8)
+    dtype = np.dtype(header.pop('dtype')).newbyteorder('<')
+
+    def view(entry):
+        return np.frombuffer(frame, dtype=dtype, count=entry['length'], offset=start + entry['offset'])
+
+    axes = {name: view(entry) + entry['origin'] for name, entry in header.pop('axes').items()}
+    waveforms = {}
+    for name, entry in header.pop('waveforms').items():
+        values = view(entry)
+        waveforms[name] = {k: v for k, v in entry.items() if k not in ('offset', 'length')}
+        waveforms[name]['values'] = values
+    return dict(header, axes=axes, waveforms=waveforms)
+
+
+def encode_msgpack(waveset, dtype='float32'):
+    """MessagePack map with the arrays as little-endian binary blobs."""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    axes = {}
+    for name, x in waveset['axes'].items():
+        x = np.asarray(x, dtype=float)
+        origin = float(x[0]) if len(x) else 0.0
+        axes[name] = {'origin': origin, 'data': (x - origin).astype(dtype).tobytes()}
+    waveforms = {name: dict({k: v for k, v in trace.items() if k != 'values'},
+                            data=np.asarray(trace['values'], dtype=dtype).tobytes())
+                 for name, trace in waveset['waveforms'].items()}
+    return msgpack.packb(dict(_meta(waveset), dtype=dtype.name, axes=axes, waveforms=waveforms),
+                         use_bin_type=True)
+
+
+def encode_arrow(waveset, dtype='float32'):
+    """
+    Arrow IPC stream with one row per axis / trace (name, kind, axis,
+    reference, origin, values as list<float32>); the other entries go to the
+    schema metadata as JSON. Time axes are stored relative to their float64
+    'origin' (null for traces) to keep float32 precision.
+    """
+    value_type = pa.from_numpy_dtype(np.dtype(dtype))
+    rows = []
+    for name, x in waveset['axes'].items():
+        x = np.asarray(x, dtype=float)
+        origin = float(x[0]) if len(x) else 0.0
+        rows.append((name, 'axis', name, None, origin, (x - origin).astype(dtype)))
+    rows += [(name, 'waveform', trace['axis'], trace.get('reference'), None,
+              np.asarray(trace['values'], dtype=dtype))
+             for name, trace in waveset['waveforms'].items()]
+    batch = pa.record_batch([
+        pa.array([r[0] for r in rows]),
+        pa.array([r[1] for r in rows]),
+        pa.array([r[2] for r in rows]),
+        pa.array([r[3] for r in rows], type=pa.float64()),
+        pa.array([r[4] for r in rows], type=pa.float64()),
+        pa.array([r[5] for r in rows], type=pa.list_(value_type)),
+    ], names=['name', 'kind', 'axis', 'reference', 'origin', 'values'])
+    batch = batch.replace_schema_metadata({'meta': json.dumps(_meta(waveset))})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(waveset, fmt):
+    """Serialize a waveform set as 'json', 'float32', 'msgpack' or 'arrow'."""
+    if fmt == 'json':
+        return json.dumps(to_json(waveset)).encode()
+    if fmt == 'float32':
+        return encode_frame(waveset)
+    if fmt == 'msgpack':
+        return encode_msgpack(waveset)
+    if fmt == 'arrow':
+        return encode_arrow(waveset)
+    raise ValueError(f"Unknown waveform format: {fmt}")
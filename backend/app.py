@@ -2,11 +2,25 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from flask import Flask, jsonify
+from backend.config.settings import Config
+from backend.api import concurrency
+
+# 协程模式必须在导入其他模块之前打补丁
+ASYNC_MODE = concurrency.resolve_async_mode(Config.ASYNC_MODE)
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from api.routes import api_bp
-import threading
+from api.endpoints import api as endpoints_bp
+from api.telemetry_hub import TelemetryHub
+from backend.ai.optimization.task_manager import task_manager
 import time
 import random
 
@@ -23,10 +37,23 @@ CORS(app, resources={
 })
 
 # 初始化SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    message_queue=Config.SOCKETIO_MESSAGE_QUEUE)
+concurrency.configure(socketio.async_mode, Config.SERVER_WORKERS)
+# 优化器的候选评估在原生线程池中执行
+task_manager.offload = concurrency.run_blocking
+
+# 遥测中心：一个采样任务，按房间合并推送
+telemetry_hub = TelemetryHub(
+    socketio,
+    sample_interval=Config.TELEMETRY_SAMPLE_INTERVAL,
+    flush_interval=Config.TELEMETRY_FLUSH_INTERVAL,
+    buffer_size=Config.TELEMETRY_BUFFER_SIZE
+)
 
 # 注册API蓝图
 app.register_blueprint(api_bp, url_prefix='/api')
+app.register_blueprint(endpoints_bp, url_prefix='/api')
 
 @app.route('/')
 def home():
@@ -45,64 +72,79 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    telemetry_hub.unsubscribe(request.sid)
 
 @socketio.on('start_optimization')
 def handle_start_optimization(data):
     print(f'Starting optimization with data: {data}')
-    # 启动优化进程
-    start_optimization_process(data)
+    # 启动优化进程（参数无效时直接返回错误）
+    try:
+        task_id = start_optimization_process(data)
+    except ValueError as e:
+        emit('optimization_error', {'taskId': None, 'error': str(e)})
+        return
+    emit('optimization_started', {'taskId': task_id})
 
 @socketio.on('request_thermal_data')
 def handle_thermal_request():
-    # 发送实时热数据
-    send_thermal_data()
+    # 订阅实时热数据（所有客户端共享同一个采样任务）
+    telemetry_hub.subscribe(request.sid, 'thermal')
+
+@socketio.on('subscribe')
+def handle_subscribe(data):
+    data = data or {}
+    try:
+        telemetry_hub.subscribe(request.sid, data.get('topic', 'thermal'), ack=bool(data.get('ack', False)))
+    except KeyError as e:
+        emit('telemetry_error', {'error': str(e)})
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    telemetry_hub.unsubscribe(request.sid, (data or {}).get('topic'))
+
+@socketio.on('telemetry_ack')
+def handle_telemetry_ack(data):
+    telemetry_hub.acknowledge(request.sid, data.get('topic', 'thermal'), data.get('seq', 0))
 
-# 优化进程模拟
+# 优化进程：进度来自优化器的实际迭代次数
 def start_optimization_process(params):
-    def optimization_worker():
-        for progress in range(0, 101, 5):
-            time.sleep(0.5)  # 模拟计算时间
-            socketio.emit('optimization_progress', {
-                'progress': progress,
-                'status': 'running' if progress < 100 else 'completed',
-                'currentStep': f'Step {progress//20 + 1}',
-                'estimatedTime': max(0, (100-progress) * 0.5)
-            })
-            
-            if progress == 100:
-                # 发送优化完成结果
-                socketio.emit('optimization_complete', {
-                    'results': {
-                        'efficiency': 97.8,
-                        'thd': 1.9,
-                        'powerFactor': 0.99,
-                        'peakTemp': 65
-                    }
-                })
-    
-    thread = threading.Thread(target=optimization_worker)
-    thread.start()
-
-# 热数据推送
-def send_thermal_data():
-    def thermal_worker():
-        while True:
-            thermal_data = {
-                'timestamp': time.time(),
-                'mosfetTemp': 65 + random.uniform(-5, 15),
-                'inductorTemp': 55 + random.uniform(-3, 8),
-                'diodeTemp': 60 + random.uniform(-4, 10),
-                'controllerTemp': 40 + random.uniform(-2, 5),
-                'ambientTemp': 25 + random.uniform(-1, 2)
-            }
-            socketio.emit('thermal_update', thermal_data)
-            time.sleep(2)  # 每2秒推送一次数据
-    
-    thread = threading.Thread(target=thermal_worker, daemon=True)
-    thread.start()
+    def on_progress(task):
+        socketio.emit('optimization_progress', {
+            'taskId': task['taskId'],
+            'progress': task['progress'],
+            'status': task['status'],
+            'currentStep': f"Iteration {task['iteration']}/{task['iterations']}",
+            'estimatedTime': round(task.get('estimatedTime', 0), 1),
+            'bestEfficiency': task['bestEfficiency']
+        })
+
+    def on_complete(task):
+        if task['status'] == 'failed':
+            socketio.emit('optimization_error', {'taskId': task['taskId'], 'error': task['error']})
+        else:
+            socketio.emit('optimization_complete', {'taskId': task['taskId'], 'results': task['results']})
+
+    return task_manager.submit(params or {}, on_progress=on_progress, on_complete=on_complete)
+
+# 热数据采样（由遥测中心按配置的频率调用）
+def sample_thermal_data():
+    return {
+        'timestamp': time.time(),
+        'mosfetTemp': 65 + random.uniform(-5, 15),
+        'inductorTemp': 55 + random.uniform(-3, 8),
+        'diodeTemp': 60 + random.uniform(-4, 10),
+        'controllerTemp': 40 + random.uniform(-2, 5),
+        'ambientTemp': 25 + random.uniform(-1, 2)
+    }
+
+telemetry_hub.register('thermal', sample_thermal_data, event='thermal_update')
+
+@app.route('/api/telemetry/stats')
+def telemetry_stats():
+    return jsonify(telemetry_hub.stats())
 
 if __name__ == '__main__':
-    # 启动热数据推送
-    send_thermal_data()
-    # 启动服务器
-    socketio.run(app, debug=True, host='0.0.0.0', port=3001)
\ No newline at end of file
+    # 启动服务器（eventlet/gevent 下为协程服务器，threading 仅用于开发调试）
+    print(f'Serving in {socketio.async_mode} mode with {Config.SERVER_WORKERS} workers')
+    socketio.run(app, debug=Config.DEBUG, host=Config.HOST, port=Config.PORT,
+                 allow_unsafe_werkzeug=socketio.async_mode == 'threading')
\ No newline at end of file
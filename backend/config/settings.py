@@ -6,10 +6,34 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_default_secret_key'
     DEBUG = os.environ.get('DEBUG', 'False').lower() in ['true', '1']
     HOST =  '0.0.0.0'
-    PORT = 3001
+    PORT = int(os.environ.get('PORT') or 3001)
+    # Socket.IO server mode: 'eventlet' / 'gevent' (cooperative workers) or 'threading';
+    # unset picks the first one installed in that order
+    ASYNC_MODE = os.environ.get('ASYNC_MODE') or None
+    # Native threads for CPU-bound request work (simulation, encoding, optimizer evaluations)
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS') or os.cpu_count() or 1)
+    # Message queue (e.g. redis://) shared by several server processes behind a sticky load balancer
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
     DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///site.db'
     AI_MODEL_PATH = os.environ.get('AI_MODEL_PATH') or 'backend/ai/models/'
+    SURROGATE_MODEL_PATH = os.environ.get('SURROGATE_MODEL_PATH') or 'models/trained_pfc_model.pkl'
+    MODEL_REGISTRY_PATH = os.environ.get('MODEL_REGISTRY_PATH') or 'models/registry/'
     SIMULATION_RESULTS_PATH = os.environ.get('SIMULATION_RESULTS_PATH') or 'data/simulation_results/'
+    SIMULATION_CACHE_MAX_BYTES = int(os.environ.get('SIMULATION_CACHE_MAX_BYTES') or 64 * 1024 * 1024)
+    SIMULATION_CACHE_DISK = os.environ.get('SIMULATION_CACHE_DISK', 'False').lower() in ['true', '1']
+    SIMULATION_CACHE_DIGITS = int(os.environ.get('SIMULATION_CACHE_DIGITS') or 6)
+    WAVEFORM_DEFAULT_WIDTH = int(os.environ.get('WAVEFORM_DEFAULT_WIDTH') or 1000)
+    WAVEFORM_MAX_WIDTH = int(os.environ.get('WAVEFORM_MAX_WIDTH') or 20000)
+    TELEMETRY_SAMPLE_INTERVAL = float(os.environ.get('TELEMETRY_SAMPLE_INTERVAL') or 0.5)
+    TELEMETRY_FLUSH_INTERVAL = float(os.environ.get('TELEMETRY_FLUSH_INTERVAL') or 2.0)
+    TELEMETRY_BUFFER_SIZE = int(os.environ.get('TELEMETRY_BUFFER_SIZE') or 120)
+    MATLAB_POOL_SIZE = int(os.environ.get('MATLAB_POOL_SIZE') or 2)
+    MATLAB_BACKEND = os.environ.get('MATLAB_BACKEND') or None  # 'matlab' or 'numpy'
     TRAINING_DATA_PATH = os.environ.get('TRAINING_DATA_PATH') or 'data/training/'
+    RESPONSE_SURFACE_PATH = os.environ.get('RESPONSE_SURFACE_PATH') or 'data/response_surfaces/'
+    SWEEP_WORKERS = int(os.environ.get('SWEEP_WORKERS') or os.cpu_count() or 1)
+    SWEEP_CHUNK_SIZE = int(os.environ.get('SWEEP_CHUNK_SIZE') or 1000)
+    OPTIMIZATION_WORKERS = int(os.environ.get('OPTIMIZATION_WORKERS') or 2)
+    OPTIMIZATION_MAX_ITERATIONS = int(os.environ.get('OPTIMIZATION_MAX_ITERATIONS') or 500)
 
 # You can add more configuration options as needed.
\ No newline at end of file
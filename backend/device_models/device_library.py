@@ -0,0 +1,281 @@
+import numpy as np
+
+from backend.device_models.sic_mosfet import SiCMOSFET
+
+# Operating points evaluated per block, so the temporaries stay in cache
+CHUNK_SIZE = 16384
+
+
+def interp1(x, xp, fp):
+    """Piecewise-linear lookup in a 1-D table, held constant beyond its ends."""
+    return np.interp(x, xp, fp)
+
+
+def _cell(x, xp):
+    """Cell index and fractional position of x on the grid xp (linear extrapolation outside)."""
+    i = np.clip(np.searchsorted(xp, x, side='right') - 1, 0, len(xp) - 2)
+    x0 = xp[i]
+    return i, (x - x0) / (xp[i + 1] - x0)
+
+
+def interp2(x, y, xp, yp, table):
+    """
+    Bilinear lookup in a 2-D table, table[i, j] at (xp[i], yp[j]), for any
+    number of points at once. Extrapolates linearly from the edge cells.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    i, tx = _cell(x, xp)
+    j, ty = _cell(y, yp)
+    flat = table.ravel()
+    stride = table.shape[1]
+    base = i * stride + j
+    low = flat[base] + ty * (flat[base + 1] - flat[base])
+    high = flat[base + stride] + ty * (flat[base + stride + 1] - flat[base + stride])
+    return low + tx * (high - low)
+
+
+def _common_step(xp, max_points=4096):
+    """Largest step that puts every knot of xp on a uniform grid, or None."""
+    spacing = np.diff(xp)
+    for k in range(1, 65):
+        step = spacing.min() / k
+        if (xp[-1] - xp[0]) / step + 1 > max_points:
+            return None
+        ratio = spacing / step
+        if np.allclose(ratio, np.round(ratio), rtol=0, atol=1e-9):
+            return step
+    return None
+
+
+class UniformTable:
+    """
+    A 1-D or 2-D table resampled on a uniform grid that contains all of its
+    knots, so the piecewise-(bi)linear interpolant is reproduced exactly while
+    a lookup is index arithmetic instead of a binary search. Every cell keeps
+    its polynomial coefficients, so a point needs a single row gather.
+    1-D lookups are held constant beyond the ends, 2-D ones extrapolate
+    linearly like interp2.
+    """
+
+    __slots__ = ('origin', 'inv_step', 'shape', 'values', 'coefficients')
+
+    def __init__(self, axes, table):
+        axes = [np.asarray(axis, dtype=float) for axis in axes]
+        steps = [_common_step(axis) for axis in axes]
+        if any(step is None for step in steps):
+            raise ValueError("Table axes do not fit a uniform grid")
+        grids = [np.linspace(axis[0], axis[-1], int(round((axis[-1] - axis[0]) / step)) + 1)
+                 for axis, step in zip(axes, steps)]
+        self.origin = [grid[0] for grid in grids]
+        self.inv_step = [1.0 / step for step in steps]
+        self.shape = tuple(len(grid) for grid in grids)
+        if len(axes) == 1:
+            f = self.values = np.interp(grids[0], axes[0], table)
+            # f = a + b t on every cell
+            self.coefficients = np.stack([f[:-1], f[1:] - f[:-1]], axis=-1)
+        else:
+            f = self.values = interp2(grids[0][:, None], grids[1][None, :], axes[0], axes[1],
+                                      np.asarray(table, dtype=float))
+            f00, f01, f10, f11 = f[:-1, :-1], f[:-1, 1:], f[1:, :-1], f[1:, 1:]
+            # f = a + b tx + c ty + d tx ty on every cell, cells flattened row-major
+            self.coefficients = np.stack([f00, f10 - f00, f01 - f00, f11 - f10 - f01 + f00],
+                                         axis=-1).reshape(-1, 4)
+
+    def _cell(self, x, axis, clamp):
+        n = self.shape[axis]
+        u = (np.asarray(x, dtype=float) - self.origin[axis]) * self.inv_step[axis]
+        if clamp:
+            u = np.clip(u, 0, n - 1)
+        cell = np.clip(np.floor(u), 0, n - 2)
+        return cell.astype(np.intp), u - cell
+
+    def __call__(self, x, y=None):
+        if y is None:
+            i, t = self._cell(x, 0, clamp=True)
+            a, b = np.moveaxis(self.coefficients[i], -1, 0)
+            return a + b * t
+        i, tx = self._cell(x, 0, clamp=False)
+        j, ty = self._cell(y, 1, clamp=False)
+        i *= self.shape[1] - 1
+        i += j
+        a, b, c, d = np.moveaxis(self.coefficients[i], -1, 0)
+        d *= ty
+        d += b
+        d *= tx
+        c *= ty
+        d += c
+        d += a
+        return d
+
+
+def _lookup(axes, table):
+    """Fast uniform-grid lookup for the table, or the generic interpolation when its axes are irregular."""
+    try:
+        return UniformTable(axes, table)
+    except ValueError:
+        if len(axes) == 1:
+            return lambda x: interp1(x, axes[0], table)
+        return lambda x, y: interp2(x, y, axes[0], axes[1], table)
+
+
+class DatasheetTables:
+    """Datasheet curves of a MOSFET type: Rds(on) vs Tj and Eon / Eoff vs Id and Vds."""
+
+    __slots__ = ('tj', 'rds_factor', 'current', 'voltage', 'e_on', 'e_off',
+                 '_rds_lookup', '_e_on_lookup', '_e_off_lookup', '_e_total_lookup')
+
+    def __init__(self, tj, rds_factor, current, voltage, e_on, e_off):
+        """
+        Parameters:
+        tj (array-like): Junction temperatures (°C), ascending.
+        rds_factor (array-like): Rds(on) normalized to its 25 °C value at every tj.
+        current (array-like): Drain currents (A), ascending.
+        voltage (array-like): Drain-source voltages (V), ascending.
+        e_on, e_off (array-like): Turn-on / turn-off energies (J), shape
+            (len(current), len(voltage)); e_on includes the Coss energy.
+        """
+        self.tj = np.asarray(tj, dtype=float)
+        self.rds_factor = np.asarray(rds_factor, dtype=float)
+        self.current = np.asarray(current, dtype=float)
+        self.voltage = np.asarray(voltage, dtype=float)
+        self.e_on = np.asarray(e_on, dtype=float)
+        self.e_off = np.asarray(e_off, dtype=float)
+        expected = (len(self.current), len(self.voltage))
+        if self.e_on.shape != expected or self.e_off.shape != expected:
+            raise ValueError(f"Energy tables must have shape {expected}")
+        grid = (self.current, self.voltage)
+        self._rds_lookup = _lookup((self.tj,), self.rds_factor)
+        self._e_on_lookup = _lookup(grid, self.e_on)
+        self._e_off_lookup = _lookup(grid, self.e_off)
+        self._e_total_lookup = _lookup(grid, self.e_on + self.e_off)
+
+    def r_on_factor(self, t_j):
+        return self._rds_lookup(t_j)
+
+    def switching_energy(self, i_d, v_ds):
+        """(Eon, Eoff) in J at |i_d| and v_ds."""
+        i_d = np.abs(i_d)
+        return self._e_on_lookup(i_d, v_ds), self._e_off_lookup(i_d, v_ds)
+
+    def total_switching_energy(self, i_d, v_ds):
+        """Eon + Eoff in J, one lookup in the summed table."""
+        return self._e_total_lookup(np.abs(i_d), v_ds)
+
+
+# Typical curves of a 650 V, 50 mOhm SiC MOSFET (energies in J)
+DEFAULT_SIC_TABLES = DatasheetTables(
+    tj=[-55, -25, 0, 25, 50, 75, 100, 125, 150, 175],
+    rds_factor=[1.12, 1.05, 1.01, 1.0, 1.03, 1.1, 1.2, 1.33, 1.5, 1.7],
+    current=[0, 5, 10, 20, 30, 40],
+    voltage=[200, 400, 600],
+    e_on=np.array([[2, 5, 9, 21, 36, 54],
+                   [4, 12, 22, 48, 80, 120],
+                   [7, 19, 35, 77, 128, 192]]).T * 1e-6,
+    e_off=np.array([[1, 2, 4, 7, 11, 17],
+                    [2, 5, 8, 15, 25, 38],
+                    [3, 8, 13, 24, 40, 61]]).T * 1e-6,
+)
+
+
+class MOSFETArray:
+    """
+    Struct-of-arrays model of many MOSFETs sharing one set of datasheet tables.
+
+    Every parameter is an array over devices, so a population (e.g. with
+    manufacturing spread) or a sweep is one object instead of one SiCMOSFET
+    per device. Methods take operating points as arrays; pass `device` (an
+    index array, one entry per point) to evaluate each point on its own
+    device, otherwise the device axis is the last axis of the inputs.
+    """
+
+    __slots__ = ('v_gs', 'v_ds', 'r_on', 'c_gs', 'c_ds', 'v_junction', 'energy_scale', 'tables')
+
+    def __init__(self, r_on, c_gs=0.0, c_ds=0.0, v_gs=18.0, v_ds=400.0, v_junction=4.0,
+                 energy_scale=1.0, tables=None):
+        """
+        Parameters:
+        r_on (array-like): On-resistance at 25 °C per device.
+        c_gs, c_ds (array-like): Gate-source and drain-source (0 V) capacitances.
+        v_gs, v_ds (array-like): Bias point, as in SiCMOSFET.
+        v_junction (array-like): Built-in potential of the Coss(V) curve.
+        energy_scale (array-like): Switching energy relative to the tables.
+        tables (DatasheetTables): Curves shared by the devices (DEFAULT_SIC_TABLES).
+        """
+        arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float)) for v in
+                                       (v_gs, v_ds, r_on, c_gs, c_ds, v_junction, energy_scale)))
+        (self.v_gs, self.v_ds, self.r_on, self.c_gs, self.c_ds,
+         self.v_junction, self.energy_scale) = (a.copy() for a in arrays)
+        self.tables = tables or DEFAULT_SIC_TABLES
+
+    @classmethod
+    def from_devices(cls, devices, tables=None):
+        """Pack SiCMOSFET objects into one array model."""
+        fields = ('r_on', 'c_gs', 'c_ds', 'v_gs', 'v_ds', 'v_junction')
+        return cls(**{f: [getattr(d, f) for d in devices] for f in fields}, tables=tables)
+
+    def __len__(self):
+        return len(self.r_on)
+
+    def __getitem__(self, index):
+        """The device at index as a SiCMOSFET."""
+        return SiCMOSFET(self.v_gs[index], self.v_ds[index], self.r_on[index], self.c_gs[index],
+                         self.c_ds[index], v_junction=self.v_junction[index])
+
+    def _param(self, name, device):
+        values = getattr(self, name)
+        return values if device is None else values[device]
+
+    def r_on_at(self, t_j, device=None):
+        """On-resistance at junction temperature t_j from the Rds(on)-Tj curve."""
+        return self._param('r_on', device) * self.tables.r_on_factor(t_j)
+
+    def coss(self, v_ds, device=None):
+        return self._param('c_ds', device) / np.sqrt(1.0 + np.asarray(v_ds, dtype=float)
+                                                      / self._param('v_junction', device))
+
+    def coss_energy(self, v_ds, device=None):
+        """Energy stored in Coss at v_ds (see SiCMOSFET.coss_energy)."""
+        v_j = self._param('v_junction', device)
+        u = 1.0 + np.asarray(v_ds, dtype=float) / v_j
+        return self._param('c_ds', device) * v_j ** 2 * (2.0 / 3.0 * u ** 1.5 - 2.0 * np.sqrt(u) + 4.0 / 3.0)
+
+    def switching_energy(self, i_d, v_ds, device=None):
+        """Eon + Eoff per switching period from the datasheet tables (Coss energy included)."""
+        return self.tables.total_switching_energy(i_d, v_ds) * self._param('energy_scale', device)
+
+    def power_loss(self, i_d, v_ds, t_j, duty=1.0, switching_freq=0.0, device=None):
+        """
+        Conduction plus switching loss (W) at many operating points.
+
+        Parameters:
+        i_d (array-like): Drain current while on (A).
+        v_ds (array-like): Blocking voltage while off (V).
+        t_j (array-like): Junction temperature (°C).
+        duty (array-like): On-time fraction.
+        switching_freq (array-like): Switching frequency (Hz).
+        device (array-like): Device index per operating point.
+        """
+        if device is None:
+            inputs = np.broadcast_arrays(i_d, v_ds, t_j, duty, switching_freq, self.r_on)
+            index = None
+        else:
+            inputs = list(np.broadcast_arrays(i_d, v_ds, t_j, duty, switching_freq, device))
+            index = inputs.pop()
+        shape = inputs[0].shape
+        i_d, v_ds, t_j, duty, switching_freq = (np.asarray(a, dtype=float).ravel() for a in inputs[:5])
+        if index is not None:
+            index = index.ravel()
+            r_on, scale = self.r_on[index], self.energy_scale[index]
+        else:
+            r_on, scale = (np.broadcast_to(p, shape).ravel() for p in (self.r_on, self.energy_scale))
+
+        out = np.empty(i_d.shape)
+        for start in range(0, len(out), CHUNK_SIZE):
+            block = slice(start, start + CHUNK_SIZE)
+            i = i_d[block]
+            conduction = duty[block] * i * i * r_on[block] * self.tables.r_on_factor(t_j[block])
+            switching = (switching_freq[block] * scale[block]
+                         * self.tables.total_switching_energy(i, v_ds[block]))
+            np.add(conduction, switching, out=out[block])
+        return out.reshape(shape)
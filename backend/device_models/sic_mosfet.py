@@ -1,25 +1,53 @@
+import numpy as np
+
+
 class SiCMOSFET:
-    def __init__(self, v_gs, v_ds, r_on, c_gs, c_ds):
+    def __init__(self, v_gs, v_ds, r_on, c_gs, c_ds, t_j=25.0, r_on_tc=(4e-3, 1.5e-5),
+                 v_junction=4.0, switching_time=20e-9):
         self.v_gs = v_gs  # Gate-source voltage
         self.v_ds = v_ds  # Drain-source voltage
-        self.r_on = r_on  # On-resistance
+        self.r_on = r_on  # On-resistance at 25 °C
         self.c_gs = c_gs  # Gate-source capacitance
-        self.c_ds = c_ds  # Drain-source capacitance
+        self.c_ds = c_ds  # Drain-source capacitance at 0 V
+        self.t_j = t_j  # Junction temperature (°C)
+        self.r_on_tc = r_on_tc  # Linear and quadratic temperature coefficients of r_on (1/K, 1/K^2)
+        self.v_junction = v_junction  # Built-in potential of the Coss(V) curve (V)
+        self.switching_time = switching_time  # Combined rise + fall time (s)
+
+    def r_on_at(self, t_j):
+        """On-resistance at junction temperature t_j (°C, scalar or array)."""
+        dt = np.asarray(t_j, dtype=float) - 25.0
+        alpha, beta = self.r_on_tc
+        return self.r_on * (1.0 + alpha * dt + beta * dt ** 2)
+
+    def coss(self, v_ds):
+        """Output capacitance at v_ds, C0 / sqrt(1 + V / V_j)."""
+        return self.c_ds / np.sqrt(1.0 + np.asarray(v_ds, dtype=float) / self.v_junction)
+
+    def coss_energy(self, v_ds):
+        """Energy stored in Coss at v_ds (integral of v * Coss(v) dv), dissipated at hard turn-on."""
+        u = 1.0 + np.asarray(v_ds, dtype=float) / self.v_junction
+        return self.c_ds * self.v_junction ** 2 * (2.0 / 3.0 * u ** 1.5 - 2.0 * np.sqrt(u) + 4.0 / 3.0)
+
+    def switching_energy(self, i_d, v_ds):
+        """Energy per switching period: V-I overlap of turn-on and turn-off plus the Coss energy."""
+        i_d = np.abs(np.asarray(i_d, dtype=float))
+        return 0.5 * np.asarray(v_ds, dtype=float) * i_d * self.switching_time + self.coss_energy(v_ds)
 
     def calculate_current(self):
         """Calculate the drain current based on Vgs and Vds."""
         if self.v_gs > 0:
-            return (self.v_gs - self.v_ds) / self.r_on
+            return (self.v_gs - self.v_ds) / self.r_on_at(self.t_j)
         return 0
 
     def calculate_power_loss(self):
         """Calculate the power loss in the MOSFET."""
         current = self.calculate_current()
-        return current ** 2 * self.r_on
+        return current ** 2 * self.r_on_at(self.t_j)
 
     def get_capacitance(self):
         """Return the gate-source and drain-source capacitance."""
         return self.c_gs, self.c_ds
 
     def __str__(self):
-        return f"SiC MOSFET: Vgs={self.v_gs}, Vds={self.v_ds}, Ron={self.r_on}, Cgs={self.c_gs}, Cds={self.c_ds}"
\ No newline at end of file
+        return f"SiC MOSFET: Vgs={self.v_gs}, Vds={self.v_ds}, Ron={self.r_on}, Cgs={self.c_gs}, Cds={self.c_ds}"
@@ -1,19 +1,39 @@
+from sklearn.base import clone
 from sklearn.neural_network import MLPRegressor
 import numpy as np
 import pandas as pd
 import joblib
 import os
+import json
+import time
+import sys
 import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
+try:
+    import resource
+except ImportError:  # Windows：不提供峰值内存统计
+    resource = None
+
+from backend.ai.training.dataset_store import load_dataset, iter_chunks, count_rows
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存（MB），不支持时返回None；读取开销可忽略，不影响计时"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
 
 # 设置中文字体支持
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'KaiTi', 'FangSong', 'SimSun', 'Arial Unicode MS'] 
 plt.rcParams['axes.unicode_minus'] = False  # 解决坐标轴负号显示问题
 
 class PFCModel:
-    def __init__(self, hidden_layers=(100, 50), max_iter=1000):
+    def __init__(self, hidden_layers=(100, 50), max_iter=1000, targets=None, n_members=1, **mlp_params):
         """
         初始化PFC电路模型
         
@@ -22,6 +42,14 @@ class PFCModel:
             神经网络隐藏层结构
         max_iter : int
             最大迭代次数
+        targets : list
+            多目标模式的输出名称（如pfc_engine.SURROGATE_TARGETS），
+            各目标单独标准化，一次前向传播得到全部输出；None为单目标
+        n_members : int
+            集成成员数；大于1时训练多个不同随机种子、自助采样的网络，
+            预测取均值，成员间的离散程度给出预测区间（predict_interval）
+        mlp_params : dict
+            其他MLPRegressor参数（如alpha、learning_rate_init、batch_size）
         """
         self.model = MLPRegressor(
             hidden_layer_sizes=hidden_layers, 
@@ -29,12 +57,50 @@ class PFCModel:
             activation='relu',
             solver='adam',
             random_state=42,
-            verbose=True
+            verbose=True,
+            **mlp_params
         )
+        self.targets = list(targets) if targets else None
+        self.members = [self.model] + [
+            clone(self.model).set_params(random_state=42 + i) for i in range(1, n_members)
+        ] if n_members > 1 else None
+        self.interval_scale = None
+        self.confidence = None
         self.trained = False
         self.scaler_X = StandardScaler()
         self.scaler_y = StandardScaler()
 
+    def _target_matrix(self, y):
+        """目标值整理为(n, 目标数)矩阵"""
+        y = np.asarray(y, dtype=float)
+        n_targets = len(self.targets) if self.targets else 1
+        if y.ndim == 1 and n_targets == 1:
+            return y.reshape(-1, 1)
+        if y.ndim != 2 or y.shape[1] != n_targets:
+            raise ValueError(f"目标值应为{n_targets}列，实际形状为{y.shape}")
+        return y
+
+    @classmethod
+    def from_search(cls, summary_path, max_iter=None):
+        """
+        按超参数搜索结果（best_model.json，MLP模型族）创建模型
+        
+        Parameters:
+        summary_path : str
+            hyperparameter_search输出的best_model.json路径
+        max_iter : int
+            最大迭代次数，默认使用搜索时的完整迭代预算
+        """
+        from backend.ai.training.hyperparameter_search import FULL_BUDGET
+
+        with open(summary_path) as f:
+            config = json.load(f)['config']
+        if config['family'] != 'mlp':
+            raise ValueError(f"搜索结果的模型族为{config['family']}，不是MLP")
+        params = dict(config['params'])
+        hidden_layers = tuple(params.pop('hidden_layer_sizes'))
+        return cls(hidden_layers=hidden_layers, max_iter=max_iter or FULL_BUDGET['mlp'][1], **params)
+
     def train(self, X, y):
         """
         训练PFC模型，使用提供的输入-输出对
@@ -43,18 +109,126 @@ class PFCModel:
         X : np.ndarray
             训练用输入特征
         y : np.ndarray
-            训练用目标输出
+            训练用目标输出，多目标模式为(n, 目标数)矩阵，列顺序同targets
         """
-        # 数据标准化
+        # 数据标准化（多目标时每列单独标准化）
         X_scaled = self.scaler_X.fit_transform(X)
-        y_scaled = self.scaler_y.fit_transform(y.reshape(-1, 1)).ravel()
+        y_scaled = self.scaler_y.fit_transform(self._target_matrix(y))
+        if not self.targets:
+            y_scaled = y_scaled.ravel()
         
         # 训练模型
-        self.model.fit(X_scaled, y_scaled)
+        if self.members:
+            # 集成：每个成员在自助采样的数据上训练，共用同一组标准化器
+            rng = np.random.default_rng(42)
+            for member in self.members:
+                rows = rng.integers(0, len(X_scaled), len(X_scaled))
+                member.fit(X_scaled[rows], y_scaled[rows])
+        else:
+            self.model.fit(X_scaled, y_scaled)
+        self.interval_scale = None
         self.trained = True
         
         return self
 
+    def train_streaming(self, data_path, feature_columns, target_column='target_variable',
+                        epochs=10, chunk_size=10000, shuffle_buffer=50000, batch_size=256,
+                        random_state=42):
+        """
+        流式（核外）训练：按块从磁盘读取数据，增量拟合标准化器并调用partial_fit，
+        内存占用只取决于chunk_size和shuffle_buffer，与数据集大小无关
+        
+        Parameters:
+        data_path : str
+            训练数据CSV路径（首次使用时转换为内存映射列存储）
+        feature_columns : list
+            输入特征列名
+        target_column : str
+            目标列名（多目标模式使用targets中的各列）
+        epochs : int
+            训练轮数
+        chunk_size : int
+            每次从磁盘读取的行数
+        shuffle_buffer : int
+            打乱缓冲区行数，块顺序每轮随机，块内数据在缓冲区中混合
+        batch_size : int
+            每次partial_fit的小批量大小
+        random_state : int
+            随机种子
+        
+        Returns:
+        list
+            每轮的统计信息（样本数、样本/秒、进程峰值常驻内存MB、平均损失）
+        """
+        if self.members:
+            raise Exception("集成模型请使用train训练")
+        rng = np.random.default_rng(random_state)
+        target_columns = self.targets or [target_column]
+        columns = list(feature_columns) + target_columns
+        n_chunks = (count_rows(data_path) + chunk_size - 1) // chunk_size
+
+        # 第一遍：增量计算标准化参数
+        self.scaler_X = StandardScaler()
+        self.scaler_y = StandardScaler()
+        for chunk in iter_chunks(data_path, columns=columns, chunk_size=chunk_size):
+            X = np.column_stack([chunk[name] for name in feature_columns])
+            self.scaler_X.partial_fit(X)
+            self.scaler_y.partial_fit(np.column_stack([chunk[name] for name in target_columns]))
+
+        verbose = self.model.verbose
+        self.model.set_params(verbose=False)
+        history = []
+        try:
+            for epoch in range(epochs):
+                started = time.perf_counter()
+                samples, losses = 0, []
+
+                def fit_buffer(X_buffer, y_buffer):
+                    nonlocal samples
+                    for start in range(0, len(X_buffer), batch_size):
+                        X_batch = X_buffer[start:start + batch_size]
+                        y_batch = y_buffer[start:start + batch_size]
+                        y_scaled = self.scaler_y.transform(y_batch)
+                        self.model.partial_fit(self.scaler_X.transform(X_batch),
+                                               y_scaled if self.targets else y_scaled.ravel())
+                        losses.append(self.model.loss_)
+                        samples += len(X_batch)
+
+                X_buffer = np.empty((0, len(feature_columns)))
+                y_buffer = np.empty((0, len(target_columns)))
+                order = rng.permutation(n_chunks)
+                for chunk in iter_chunks(data_path, columns=columns, chunk_size=chunk_size, order=order):
+                    X_buffer = np.vstack([X_buffer, np.column_stack([chunk[name] for name in feature_columns])])
+                    y_buffer = np.vstack([y_buffer, np.column_stack([chunk[name] for name in target_columns])])
+                    if len(X_buffer) >= shuffle_buffer:
+                        # 打乱缓冲区，训练前一半，后一半留下与后续块混合
+                        perm = rng.permutation(len(X_buffer))
+                        X_buffer, y_buffer = X_buffer[perm], y_buffer[perm]
+                        half = len(X_buffer) // 2
+                        fit_buffer(X_buffer[:half], y_buffer[:half])
+                        X_buffer, y_buffer = X_buffer[half:], y_buffer[half:]
+                perm = rng.permutation(len(X_buffer))
+                fit_buffer(X_buffer[perm], y_buffer[perm])
+
+                elapsed = time.perf_counter() - started
+                peak = peak_rss_mb()
+                stats = {
+                    'epoch': epoch + 1,
+                    'samples': samples,
+                    'seconds': elapsed,
+                    'samples_per_second': samples / elapsed if elapsed > 0 else 0.0,
+                    'peak_memory_mb': peak,
+                    'loss': float(np.mean(losses)) if losses else float('nan'),
+                }
+                history.append(stats)
+                print(f"第{stats['epoch']}/{epochs}轮: 损失={stats['loss']:.6f}, "
+                      f"{stats['samples_per_second']:.0f} 样本/秒, 峰值内存 {peak if peak is not None else float('nan'):.1f} MB")
+        finally:
+            self.model.set_params(verbose=verbose)
+
+        self.trained = True
+        return history
+
     def predict(self, X):
         """
         使用给定的输入特征预测输出
@@ -65,7 +239,7 @@ class PFCModel:
         
         Returns:
         np.ndarray
-            预测结果
+            预测结果，多目标模式为(n, 目标数)矩阵
         """
         if not self.trained:
             raise Exception("必须先训练模型才能进行预测")
@@ -73,9 +247,82 @@ class PFCModel:
         # 数据标准化
         X_scaled = self.scaler_X.transform(X)
         
-        # 预测并反标准化结果
-        y_scaled_pred = self.model.predict(X_scaled)
-        return self.scaler_y.inverse_transform(y_scaled_pred.reshape(-1, 1)).ravel()
+        # 预测并反标准化结果（集成模型取成员均值）
+        if self.members:
+            y_pred = self.member_predictions(X).mean(axis=0)
+        else:
+            y_scaled_pred = self.model.predict(X_scaled)
+            y_pred = self.scaler_y.inverse_transform(y_scaled_pred.reshape(len(X_scaled), -1))
+        return y_pred if self.targets else y_pred.ravel()
+
+    def member_predictions(self, X):
+        """
+        集成模型各成员的预测
+        
+        Returns:
+        np.ndarray
+            形状为(成员数, 样本数, 目标数)
+        """
+        if not self.members:
+            raise Exception("不是集成模型（n_members > 1）")
+        X_scaled = self.scaler_X.transform(X)
+        return np.stack([
+            self.scaler_y.inverse_transform(member.predict(X_scaled).reshape(len(X_scaled), -1))
+            for member in self.members
+        ])
+
+    def calibrate(self, X, y_true, confidence=0.9):
+        """
+        用校准集（不参与训练）按分裂共形方法确定预测区间宽度，
+        使区间在该置信度下的实际覆盖率与名义值一致
+        
+        Parameters:
+        X : np.ndarray
+            校准集输入特征
+        y_true : np.ndarray
+            校准集实际目标值
+        confidence : float
+            置信度
+        
+        Returns:
+        np.ndarray
+            每个目标的区间半宽（以成员标准差为单位）
+        """
+        from backend.ai.inference.uncertainty import conformal_scale
+
+        self.interval_scale = conformal_scale(self.member_predictions(X), y_true, confidence)
+        self.confidence = confidence
+        return self.interval_scale
+
+    def predict_interval(self, X, confidence=None):
+        """
+        集成预测区间：均值±k倍成员标准差。已校准且未指定置信度时使用
+        校准得到的k，否则按正态分布取k
+        
+        Returns:
+        dict
+            'mean'、'std'、'lower'、'upper'，形状为(样本数, 目标数)
+        """
+        from backend.ai.inference.uncertainty import prediction_interval, interval_scale
+
+        if confidence is None and self.interval_scale is not None:
+            scale = self.interval_scale
+        else:
+            scale = interval_scale(confidence or 0.9)
+        return prediction_interval(self.member_predictions(X), scale)
+
+    def predict_metrics(self, X):
+        """
+        多目标模式：一次前向传播预测全部目标
+        
+        Returns:
+        dict
+            目标名称 -> 预测值数组
+        """
+        if not self.targets:
+            raise Exception("单目标模型没有多目标输出")
+        y_pred = self.predict(X)
+        return {name: y_pred[:, j] for j, name in enumerate(self.targets)}
 
     def evaluate(self, X, y_true):
         """
@@ -89,16 +336,37 @@ class PFCModel:
             
         Returns:
         dict
-            包含各种评估指标的字典
+            包含各种评估指标的字典；多目标模式下'targets'给出每个目标的
+            mse/rmse/mae/r2（原始单位），总体mse/rmse/r2为各目标在标准化
+            尺度上的平均
         """
         y_pred = self.predict(X)
-        mse = mean_squared_error(y_true, y_pred)
-        r2 = r2_score(y_true, y_pred)
+        if not self.targets:
+            mse = mean_squared_error(y_true, y_pred)
+            r2 = r2_score(y_true, y_pred)
+            
+            return {
+                'mse': mse,
+                'rmse': np.sqrt(mse),
+                'r2': r2
+            }
         
+        y_true = self._target_matrix(y_true)
+        per_target = {}
+        for j, name in enumerate(self.targets):
+            mse = mean_squared_error(y_true[:, j], y_pred[:, j])
+            per_target[name] = {
+                'mse': mse,
+                'rmse': np.sqrt(mse),
+                'mae': float(np.mean(np.abs(y_true[:, j] - y_pred[:, j]))),
+                'r2': r2_score(y_true[:, j], y_pred[:, j])
+            }
+        mse = mean_squared_error(self.scaler_y.transform(y_true), self.scaler_y.transform(y_pred))
         return {
             'mse': mse,
             'rmse': np.sqrt(mse),
-            'r2': r2
+            'r2': r2_score(y_true, y_pred),
+            'targets': per_target
         }
 
     def save_model(self, filepath):
@@ -117,11 +385,33 @@ class PFCModel:
             'model': self.model,
             'scaler_X': self.scaler_X,
             'scaler_y': self.scaler_y,
-            'trained': self.trained
+            'trained': self.trained,
+            'targets': self.targets,
+            'members': self.members,
+            'interval_scale': self.interval_scale,
+            'confidence': self.confidence
         }
         joblib.dump(model_data, filepath)
         print(f"模型已保存至：{filepath}")
 
+    def export_compiled(self, filepath=None):
+        """
+        导出编译后的纯NumPy前向网络：两个标准化器折叠进首层和末层权重，
+        权重存为连续的float32缓冲区，导出时自动与原模型校验预测一致性
+        
+        Parameters:
+        filepath : str
+            可选，保存路径（.npz）
+        
+        Returns:
+        CompiledMLP
+            编译后的网络
+        """
+        if not self.trained:
+            raise Exception("必须先训练模型才能导出")
+        from backend.ai.inference.compiled_mlp import export_mlp
+        return export_mlp(self, filepath)
+
     def load_model(self, filepath):
         """
         从文件加载训练好的模型
@@ -138,6 +428,10 @@ class PFCModel:
         self.scaler_X = model_data['scaler_X']
         self.scaler_y = model_data['scaler_y']
         self.trained = model_data['trained']
+        self.targets = model_data.get('targets')
+        self.members = model_data.get('members')
+        self.interval_scale = model_data.get('interval_scale')
+        self.confidence = model_data.get('confidence')
         print(f"模型已从{filepath}加载")
 
 def visualize_predictions(y_true, y_pred, title="模型预测结果对比"):
@@ -176,6 +470,47 @@ def visualize_feature_importance(model, feature_names):
     except:
         print("该模型不支持直接提取特征重要性")
 
+def train_surrogate(data_path, model_path='../models/pfc_surrogate.pkl', hidden_layers=(100, 80, 50),
+                    max_iter=200, n_members=1):
+    """
+    训练多目标代理模型：一个网络同时预测效率、THD、功率因数和峰值温度
+    
+    Parameters:
+    data_path : str
+        扫描结果CSV（SweepRunner输出，包含FEATURE_COLUMNS和SURROGATE_TARGETS各列）
+    model_path : str
+        模型保存路径
+    n_members : int
+        集成成员数，大于1时另取20%训练数据做区间校准
+    
+    Returns:
+    tuple
+        (模型, 评估指标)
+    """
+    from backend.simulation.pfc_engine import FEATURE_COLUMNS, SURROGATE_TARGETS
+
+    data = load_dataset(data_path).dropna()
+    X_train, X_test, y_train, y_test = train_test_split(
+        data[FEATURE_COLUMNS].values, data[SURROGATE_TARGETS].values, test_size=0.2, random_state=42
+    )
+    model = PFCModel(hidden_layers=hidden_layers, max_iter=max_iter, targets=SURROGATE_TARGETS,
+                     n_members=n_members)
+    for estimator in model.members or [model.model]:
+        estimator.set_params(verbose=False)
+    if n_members > 1:
+        X_train, X_cal, y_train, y_cal = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+        model.train(X_train, y_train)
+        model.calibrate(X_cal, y_cal)
+    else:
+        model.train(X_train, y_train)
+    metrics = model.evaluate(X_test, y_test)
+    for name, target_metrics in metrics['targets'].items():
+        print(f"{name}: RMSE={target_metrics['rmse']:.6f}, MAE={target_metrics['mae']:.6f}, "
+              f"R²={target_metrics['r2']:.4f}")
+    model.save_model(model_path)
+    return model, metrics
+
+
 def main():
     """主函数：数据加载、模型训练与评估"""
     
@@ -185,7 +520,7 @@ def main():
     # 加载数据集
     print("加载PFC和Buck电路数据...")
     try:
-        data = pd.read_csv('../data/training/pfc_buck_data.csv')
+        data = load_dataset('../data/training/pfc_buck_data.csv')
         print(f"成功加载数据，共{len(data)}条记录")
     except Exception as e:
         print(f"数据加载失败: {e}")
@@ -216,7 +551,12 @@ def main():
     
     # 初始化并训练模型
     print("\n开始训练模型...")
-    model = PFCModel(hidden_layers=(100, 80, 50), max_iter=10)
+    tuned = '../models/tuning/best_model.json'
+    try:
+        model = PFCModel.from_search(tuned)
+        print(f"使用超参数搜索结果: {tuned}")
+    except (OSError, ValueError):
+        model = PFCModel(hidden_layers=(100, 80, 50), max_iter=10)
     model.train(X_train.values, y_train.values)
     
     # 评估模型
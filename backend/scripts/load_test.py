@@ -0,0 +1,152 @@
+"""
+Load test for the PFC backend: concurrent API requests and Socket.IO clients.
+
+Usage:
+    python scripts/load_test.py --url http://localhost:3001 --requests 2000 --concurrency 200 --ws-clients 300
+
+Reports request latency percentiles (p50 / p90 / p99 / max) per endpoint,
+throughput and errors, plus connect latency and thermal-update delivery for
+the websocket clients (needs the python-socketio client).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ENDPOINTS = [
+    ('GET', '/api/system/status', None),
+    ('GET', '/api/topology/totem-pole-pfc', None),
+    ('GET', '/api/health', None),
+    # a few distinct parameter sets: the first call simulates, the rest hit the result cache
+    ('POST', '/api/simulation/run?format=float32&width=800', lambda: {
+        'topology': 'totem-pole-pfc',
+        'inductorValue': random.choice([0.4, 0.5, 0.6]),
+        'switchingFrequency': 100,
+        'inputVoltage': 220,
+        'outputVoltage': 400,
+        'loadPower': 1000,
+    }),
+]
+
+
+def _request(base_url, method, path, payload, timeout):
+    data = json.dumps(payload()).encode() if payload else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'} if data else {})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except Exception:
+        ok = False
+    return path, time.perf_counter() - start, ok
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ms = np.asarray(samples) * 1000
+    return {'n': len(ms), 'p50': np.percentile(ms, 50), 'p90': np.percentile(ms, 90),
+            'p99': np.percentile(ms, 99), 'max': ms.max()}
+
+
+def run_http(base_url, n_requests, concurrency, timeout):
+    jobs = [random.choice(ENDPOINTS) for _ in range(n_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda job: _request(base_url, *job, timeout), jobs))
+    elapsed = time.perf_counter() - start
+    per_endpoint = {}
+    for path, latency, ok in results:
+        per_endpoint.setdefault(path, []).append((latency, ok))
+    return results, elapsed, per_endpoint
+
+
+def run_websockets(base_url, n_clients, duration):
+    try:
+        import socketio
+    except ImportError:
+        print("python-socketio client not installed, skipping websocket clients")
+        return None
+    connect_times, updates, errors, messages = [], [0], [0], []
+    lock = threading.Lock()
+    clients = []
+
+    def open_client():
+        client = socketio.Client(reconnection=False)
+
+        @client.on('thermal_update')
+        def on_update(data):
+            with lock:
+                updates[0] += 1
+
+        start = time.perf_counter()
+        try:
+            client.connect(base_url)
+            client.emit('request_thermal_data')
+        except Exception as e:
+            with lock:
+                errors[0] += 1
+                messages.append(str(e))
+            return
+        with lock:
+            connect_times.append(time.perf_counter() - start)
+            clients.append(client)
+
+    with ThreadPoolExecutor(min(n_clients, 64)) as pool:
+        list(pool.map(lambda _: open_client(), range(n_clients)))
+    time.sleep(duration)
+    for client in clients:
+        client.disconnect()
+    return {'connected': len(clients), 'errors': errors[0], 'first_error': messages[0] if messages else None,
+            'connect': percentiles(connect_times),
+            'updates': updates[0], 'updates_per_client_per_s': updates[0] / max(len(clients), 1) / duration}
+
+
+def _format(stats):
+    return '  '.join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:3001')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--ws-clients', type=int, default=0, help='Socket.IO clients held open during the run')
+    parser.add_argument('--ws-duration', type=float, default=10.0)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    ws_result = {}
+    ws_thread = None
+    if args.ws_clients:
+        ws_thread = threading.Thread(target=lambda: ws_result.update(
+            run_websockets(args.url, args.ws_clients, args.ws_duration) or {}))
+        ws_thread.start()
+
+    results, elapsed, per_endpoint = run_http(args.url, args.requests, args.concurrency, args.timeout)
+    errors = sum(not ok for _, _, ok in results)
+    print(f"HTTP: {len(results)} requests, concurrency {args.concurrency}, "
+          f"{len(results) / elapsed:.0f} req/s, {errors} errors")
+    print(f"  all  {_format(percentiles([latency for _, latency, _ in results]))}  (ms)")
+    for path, samples in sorted(per_endpoint.items()):
+        print(f"  {path}  {_format(percentiles([latency for latency, _ in samples]))}")
+
+    if ws_thread is not None:
+        ws_thread.join()
+        if ws_result:
+            print(f"WebSocket: {ws_result['connected']} clients connected, {ws_result['errors']} errors, "
+                  f"{ws_result['updates_per_client_per_s']:.2f} updates/client/s")
+            print(f"  connect  {_format(ws_result['connect'])}  (ms)")
+            if ws_result['first_error']:
+                print(f"  first error: {ws_result['first_error']}")
+
+
+if __name__ == '__main__':
+    main()
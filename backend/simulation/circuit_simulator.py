@@ -1,18 +1,75 @@
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 
+from backend.simulation.pfc_engine import simulate_pfc, simulate_batch, OUTPUT_COLUMNS
+
 class CircuitSimulator:
-    def __init__(self, circuit_parameters):
+    def __init__(self, circuit_parameters, mode='switched', integrator='fixed', line_cycles=3, steps_per_period=100):
+        """
+        Boost-PFC circuit simulator.
+
+        Parameters:
+        circuit_parameters (dict): Circuit parameters, see pfc_engine.DEFAULT_PARAMETERS.
+            An optional 'topology' key selects boost, bridgeless, totem-pole or interleaved.
+        mode (str): 'switched' (switching-level) or 'averaged' (state-space averaged).
+        integrator (str): 'fixed' or 'adaptive' time stepping.
+        line_cycles (float): Number of line cycles to simulate.
+        steps_per_period (int): Samples per PWM period in switched/fixed mode.
+        """
         self.parameters = circuit_parameters
-        self.time = np.linspace(0, 1, 1000)  # Simulation time from 0 to 1 second
-        self.voltage = np.zeros_like(self.time)
-        self.current = np.zeros_like(self.time)
+        self.topology = circuit_parameters.get('topology', 'boost')
+        self.mode = mode
+        self.integrator = integrator
+        self.line_cycles = line_cycles
+        self.steps_per_period = steps_per_period
+        self.time = np.zeros(0)
+        self.voltage = np.zeros(0)
+        self.current = np.zeros(0)
+        self.power = np.zeros(0)
+        self.efficiency = np.zeros(0)
 
     def simulate(self):
-        # Simple simulation logic for a PFC circuit
-        for i, t in enumerate(self.time):
-            self.voltage[i] = self.parameters['input_voltage'] * np.sin(2 * np.pi * self.parameters['frequency'] * t)
-            self.current[i] = self.voltage[i] / self.parameters['load_resistance']
+        """
+        Run the simulation and store the waveforms on the simulator.
+
+        Returns:
+        DataFrame: time, voltage, current, power and efficiency columns
+        (the layout of data/simulation_results/pfc_simulation.csv).
+        """
+        result = simulate_pfc(
+            self.parameters,
+            topology=self.topology,
+            mode=self.mode,
+            integrator=self.integrator,
+            line_cycles=self.line_cycles,
+            steps_per_period=self.steps_per_period,
+        )
+        self.time = result['time'][0]
+        self.voltage = result['voltage'][0]
+        self.current = result['current'][0]
+        self.power = result['power'][0]
+        self.efficiency = result['efficiency'][0]
+        return self.to_dataframe()
+
+    def to_dataframe(self):
+        """Return the last simulation as a DataFrame with the simulation CSV columns."""
+        return pd.DataFrame({column: getattr(self, column) for column in OUTPUT_COLUMNS})
+
+    def save_results(self, file_path):
+        """Write the last simulation to a CSV file."""
+        self.to_dataframe().to_csv(file_path, index=False)
+
+    @staticmethod
+    def simulate_batch(parameter_matrix, columns=None, **kwargs):
+        """
+        Simulate an N x P parameter matrix (pfc_buck_data.csv feature columns by
+        default) in one array pass.
+
+        Returns:
+        DataFrame: efficiency, thd, power_factor, ripple and peak_temp per row.
+        """
+        return simulate_batch(parameter_matrix, columns=columns, **kwargs)
 
     def plot_results(self):
         plt.figure(figsize=(12, 6))
@@ -38,9 +95,10 @@ class CircuitSimulator:
 # Example usage
 if __name__ == "__main__":
     circuit_params = {
-        'input_voltage': 230,  # Input voltage in volts
-        'frequency': 50,       # Frequency in Hz
-        'load_resistance': 10   # Load resistance in ohms
+        'topology': 'totem-pole',
+        'input_voltage': 230,  # RMS input voltage in volts
+        'frequency': 50,       # Line frequency in Hz
+        'load_power': 1000     # Output power in watts
     }
     
     simulator = CircuitSimulator(circuit_params)
@@ -0,0 +1,207 @@
+import numpy as np
+
+from backend.device_models.sic_mosfet import SiCMOSFET
+from backend.simulation.pfc_engine import TOPOLOGIES, normalize_parameters, resolve_topology, simulate_pfc
+from backend.simulation.thermal_simulator import ThermalNetwork
+
+# Power switch used when none is given: 50 mOhm / 1 nF (Coss at 0 V) SiC MOSFET
+DEFAULT_MOSFET = dict(v_gs=18.0, v_ds=400.0, r_on=0.05, c_gs=2e-9, c_ds=1e-9)
+# Copper temperature coefficient of the inductor winding (1/K)
+COPPER_TC = 3.93e-3
+# Bias power of the controller (W); heats the controller only
+CONTROLLER_POWER = 0.8
+# Junction temperature beyond which an operating point is abandoned as thermal runaway (°C)
+RUNAWAY_TEMPERATURE = 300.0
+# Line-cycle samples of the averaged model
+STEPS_PER_LINE_CYCLE = 400
+
+
+def line_cycle_waveforms(parameters, topology='boost', line_cycles=3):
+    """
+    Electrical operating point of every variant over its last line cycle.
+
+    Parameters:
+    parameters (dict): pfc_engine parameters (scalars or 1-D arrays).
+
+    Returns:
+    dict: 'current' and 'input_voltage' of shape (N, M), 'output_voltage',
+    'output_power', 'input_power' and 'switching_freq' of shape (N,),
+    'time_step' (s) and the resolved 'topology'.
+    """
+    topology = resolve_topology(topology)
+    p = normalize_parameters(parameters)
+    line_frequency = float(p['line_frequency'].min())
+    time_step = 1.0 / line_frequency / STEPS_PER_LINE_CYCLE
+    result = simulate_pfc(parameters, topology=topology, mode='averaged',
+                          duration=line_cycles / line_frequency, time_step=time_step)
+    last = slice(-STEPS_PER_LINE_CYCLE, None)
+    current = result['current'][:, last]
+    v_in = result['input_voltage'][:, last]
+    v_out = result['voltage'][:, last]
+    return {
+        'current': current,
+        'input_voltage': v_in,
+        'output_voltage': v_out.mean(axis=1),
+        'output_power': (v_out ** 2).mean(axis=1) / p['load_resistance'],
+        'input_power': (v_in * current).mean(axis=1),
+        'switching_freq': p['switching_freq'],
+        'r_inductor': p['r_inductor'],
+        'diode_drop': p['diode_drop'],
+        'max_duty': p['max_duty'],
+        'time_step': time_step,
+        'topology': topology,
+    }
+
+
+def device_losses(waves, mosfet, t_mosfet, t_rectifier, t_inductor, current_scale=1.0):
+    """
+    Instantaneous losses over the line cycle at the given temperatures.
+
+    Temperatures are (..., N, M) arrays (or broadcastable); leading axes are
+    extra scenarios such as ambient temperatures. Losses are averaged over a
+    switching period: conduction from the duty cycle and the temperature
+    dependent Rds(on), switching from the V-I overlap and Coss energy.
+
+    Returns:
+    dict: 'mosfet', 'rectifier' and 'inductor' loss per device, 'bridge' loss
+    of the input rectifier (W, broadcastable to the temperatures' shape) and
+    the number of 'phases'.
+    """
+    spec = TOPOLOGIES[waves['topology']]
+    i = np.abs(waves['current']) * current_scale
+    v_out = waves['output_voltage'][:, None]
+    duty = np.clip(1.0 - waves['input_voltage'] / v_out, 0.0, waves['max_duty'][:, None])
+    i_phase = i / spec['phases']
+
+    # every phase is one switch; the loss is reported per device
+    mosfet_loss = (duty * i_phase ** 2 * mosfet.r_on_at(t_mosfet)
+                   + waves['switching_freq'][:, None] * mosfet.switching_energy(i_phase, v_out))
+    if spec['synchronous']:
+        rectifier_loss = (1.0 - duty) * i_phase ** 2 * mosfet.r_on_at(t_rectifier)
+    else:
+        rectifier_loss = (1.0 - duty) * i_phase * waves['diode_drop'][:, None]
+    r_l = waves['r_inductor'][:, None] * (1.0 + COPPER_TC * (np.asarray(t_inductor) - 25.0))
+    return {
+        'mosfet': mosfet_loss,
+        'rectifier': rectifier_loss,
+        'inductor': i_phase ** 2 * r_l,
+        'bridge': spec['bridge_diodes'] * waves['diode_drop'][:, None] * i,
+        'phases': spec['phases'],
+    }
+
+
+def cosimulate(parameters, ambient=25.0, topology='boost', mosfet=None, network=None,
+               waves=None, tol=0.01, max_iterations=50):
+    """
+    Electro-thermal co-simulation over one line cycle.
+
+    Losses are evaluated at the junction temperatures, fed through the Foster
+    networks (periodic steady state of the line cycle) and the new
+    temperatures fed back into the losses until the largest change is below
+    tol. The input current follows the loss (the voltage loop draws
+    P_out + P_loss). All variants and ambients iterate together; variants that
+    do not settle (thermal runaway) are reported as not converged.
+
+    Parameters:
+    parameters (dict): pfc_engine parameters (scalars or 1-D arrays of N variants).
+    ambient (float or array-like): Ambient temperatures; an array of shape (A,)
+        evaluates every variant at every ambient, giving (A, N) results.
+    mosfet (SiCMOSFET or MOSFETArray): Power switch; a single-device
+        MOSFETArray uses datasheet tables (DEFAULT_MOSFET when omitted).
+    network (ThermalNetwork): Networks with 'mosfet', 'diode', 'inductor' and
+        'controller' devices (DEVICE_NETWORKS by default).
+    waves (dict): Precomputed line_cycle_waveforms, to reuse one electrical
+        simulation for several thermal conditions.
+
+    Returns:
+    dict: 'efficiency', per-device average losses ('<device>Loss', W), mean and
+    peak junction temperatures ('<device>Temp', '<device>PeakTemp', °C),
+    'iterations' and 'converged', each of shape ambient.shape + (N,).
+    """
+    mosfet = mosfet or SiCMOSFET(**DEFAULT_MOSFET)
+    network = network or ThermalNetwork()
+    waves = waves or line_cycle_waveforms(parameters, topology)
+    ambient = np.asarray(ambient, dtype=float)
+    index = {device: network.devices.index(device) for device in ('mosfet', 'diode', 'inductor', 'controller')}
+
+    shape = ambient.shape + waves['current'].shape
+    temperatures = np.broadcast_to(ambient[..., None, None, None],
+                                   ambient.shape + (len(network.devices),) + waves['current'].shape).copy()
+    temperatures = np.moveaxis(temperatures, -3, -2)               # (..., N, devices, M)
+    scale = np.ones(ambient.shape + (shape[-2], 1))
+    active = np.ones(ambient.shape + (shape[-2],), dtype=bool)
+    converged = np.zeros(active.shape, dtype=bool)
+    iterations = np.zeros(active.shape, dtype=int)
+
+    for _ in range(max_iterations):
+        losses = device_losses(waves, mosfet, temperatures[..., index['mosfet'], :],
+                               temperatures[..., index['diode'], :], temperatures[..., index['inductor'], :],
+                               scale)
+        power = np.zeros(temperatures.shape)
+        power[..., index['mosfet'], :] = losses['mosfet']
+        power[..., index['diode'], :] = losses['rectifier']
+        power[..., index['inductor'], :] = losses['inductor']
+        power[..., index['controller'], :] = CONTROLLER_POWER
+        updated = network.simulate(power, waves['time_step'], ambient[..., None], initial='periodic')
+
+        total = losses['phases'] * (losses['mosfet'] + losses['rectifier'] + losses['inductor']) + losses['bridge']
+        p_loss = total.mean(axis=-1)
+        scale = ((waves['output_power'] + p_loss) / waves['input_power'])[..., None]
+
+        settled = np.abs(updated - temperatures).max(axis=(-2, -1)) <= tol
+        runaway = updated.max(axis=(-2, -1)) > RUNAWAY_TEMPERATURE
+        temperatures = np.where(active[..., None, None], updated, temperatures)
+        iterations += active
+        converged |= active & settled & ~runaway
+        active &= ~(settled | runaway)
+        if not active.any():
+            break
+
+    result = {
+        'efficiency': waves['output_power'] / (waves['output_power'] + p_loss),
+        'iterations': iterations,
+        'converged': converged,
+    }
+    mean_loss = {'mosfet': losses['mosfet'], 'diode': losses['rectifier'],
+                 'inductor': losses['inductor'], 'controller': np.full(shape, CONTROLLER_POWER)}
+    for device, d in index.items():
+        result[f'{device}Loss'] = np.broadcast_to(mean_loss[device], shape).mean(axis=-1)
+        result[f'{device}Temp'] = temperatures[..., d, :].mean(axis=-1)
+        result[f'{device}PeakTemp'] = temperatures[..., d, :].max(axis=-1)
+    return result
+
+
+def efficiency_map(load_power, input_voltage, ambient, parameters=None, topology='boost', **kwargs):
+    """
+    Efficiency and temperatures over a load x input voltage x ambient grid.
+
+    The electrical operating points (load x Vin) are simulated once in a single
+    vectorized averaged-model run; the co-simulation then iterates all of them
+    at every ambient together.
+
+    Parameters:
+    load_power, input_voltage, ambient (array-like): Grid axes (W, V rms, °C).
+    parameters (dict): Further pfc_engine parameters shared by the grid.
+    **kwargs: Passed on to cosimulate (mosfet, network, tol, max_iterations).
+
+    Returns:
+    dict: The grid axes plus every cosimulate output reshaped to
+    (len(load_power), len(input_voltage), len(ambient)).
+    """
+    load_power = np.atleast_1d(np.asarray(load_power, dtype=float))
+    input_voltage = np.atleast_1d(np.asarray(input_voltage, dtype=float))
+    ambient = np.atleast_1d(np.asarray(ambient, dtype=float))
+    load_grid, vin_grid = np.meshgrid(load_power, input_voltage, indexing='ij')
+    grid = dict(parameters or {})
+    grid.update({'load_power': load_grid.ravel(), 'input_voltage': vin_grid.ravel()})
+    grid.pop('load_resistance', None)
+    grid.pop('load_current', None)
+
+    waves = line_cycle_waveforms(grid, topology)
+    result = cosimulate(grid, ambient, topology=topology, waves=waves, **kwargs)
+    shape = (len(load_power), len(input_voltage), len(ambient))
+    out = {'loadPower': load_power, 'inputVoltage': input_voltage, 'ambientTemp': ambient}
+    for key, value in result.items():
+        # (A, L*V) -> (L, V, A)
+        out[key] = np.moveaxis(value.reshape((len(ambient),) + shape[:2]), 0, -1)
+    return out
@@ -0,0 +1,255 @@
+import os
+import json
+import shutil
+
+import numpy as np
+import scipy.io
+
+try:
+    import h5py
+except ImportError:  # only needed for v7.3 (HDF5) files
+    h5py = None
+
+from backend.ai.training.dataset_store import SCHEMA_FILE, cache_path
+
+HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+# v7.3 MAT-files are HDF5 files with a 512-byte MATLAB header in front
+HDF5_OFFSET = 512
+TIME_VARIABLES = ('time', 'tout', 't')
+
+
+def mat_version(file_path):
+    """'7.3' for HDF5-based MAT-files, otherwise '5' (also covers v4/v6/v7)."""
+    with open(file_path, 'rb') as f:
+        f.seek(HDF5_OFFSET)
+        return '7.3' if f.read(len(HDF5_SIGNATURE)) == HDF5_SIGNATURE else '5'
+
+
+def _sample_axis(hdf5_shape):
+    """
+    Axis of an HDF5 dataset that runs over samples.
+
+    MATLAB writes arrays column-major, so a (rows, cols) MATLAB array appears
+    as (cols, rows) in HDF5. Logged signals have one sample per row, except
+    row vectors, which have one per column.
+    """
+    if len(hdf5_shape) < 2:
+        return 0
+    rows, cols = hdf5_shape[-1], hdf5_shape[-2]
+    return len(hdf5_shape) - 2 if rows == 1 and cols > 1 else len(hdf5_shape) - 1
+
+
+def _orient(array):
+    """Samples along axis 0; single-channel signals as 1-D arrays."""
+    array = np.asarray(array)
+    if array.ndim == 2 and array.shape[0] == 1:
+        array = array.T
+    return array[:, 0] if array.ndim == 2 and array.shape[1] == 1 else array
+
+
+class MatResultsReader:
+    def __init__(self, file_path):
+        """
+        Lazy reader for Simulink / MATLAB result files.
+
+        Variables are listed from the file's headers only. For v7.3 (HDF5)
+        files signals are read straight from the datasets, window by window;
+        for older versions only the requested variables are ever loaded.
+
+        Parameters:
+        file_path (str): .mat file.
+        """
+        self.file_path = file_path
+        self.version = mat_version(file_path)
+        self._h5 = None
+        self._loaded = {}
+        if self.version == '7.3':
+            if h5py is None:
+                raise ImportError("h5py is required to read v7.3 MAT-files")
+            self._h5 = h5py.File(file_path, 'r')
+
+    def variables(self):
+        """
+        Describe the stored variables without reading their data.
+
+        Returns:
+        dict: name -> {'shape': MATLAB shape, 'class': MATLAB class / dtype}.
+        Struct fields of v7.3 files are listed with dotted names.
+        """
+        if self._h5 is None:
+            return {name: {'shape': tuple(shape), 'class': cls}
+                    for name, shape, cls in scipy.io.whosmat(self.file_path)}
+        found = {}
+
+        def visit(name, node):
+            if isinstance(node, h5py.Dataset) and not name.startswith('#'):
+                cls = node.attrs.get('MATLAB_class', node.dtype.str)
+                found[name.replace('/', '.')] = {
+                    'shape': tuple(node.shape[::-1]),
+                    'class': cls.decode() if isinstance(cls, bytes) else str(cls),
+                }
+        self._h5.visititems(visit)
+        return found
+
+    def _dataset(self, name):
+        try:
+            return self._h5[name.replace('.', '/')]
+        except KeyError:
+            raise KeyError(f"Variable not found in {self.file_path}: {name}")
+
+    def _v5(self, names):
+        """Load (once) only the named top-level variables of a v5 file; dotted names select struct fields."""
+        wanted = [n for n in {name.split('.')[0] for name in names} if n not in self._loaded]
+        if wanted:
+            data = scipy.io.loadmat(self.file_path, variable_names=wanted,
+                                    squeeze_me=True, struct_as_record=False)
+            for name in wanted:
+                if name not in data:
+                    raise KeyError(f"Variable not found in {self.file_path}: {name}")
+                self._loaded[name] = data[name]
+        result = {}
+        for name in names:
+            value = self._loaded[name.split('.')[0]]
+            for field in name.split('.')[1:]:
+                value = getattr(value, field)
+            result[name] = _orient(value)
+        return result
+
+    def load(self, names):
+        """
+        Read only the requested signals.
+
+        Parameters:
+        names (list): Variable names (dotted for struct fields, e.g. 'logsout.v.Data').
+
+        Returns:
+        dict: name -> array with samples along axis 0.
+        """
+        if self._h5 is None:
+            return self._v5(names)
+        return {name: _orient(self._dataset(name)[()].T) for name in names}
+
+    def n_samples(self, name):
+        if self._h5 is None:
+            return len(self._v5([name])[name])
+        dataset = self._dataset(name)
+        return dataset.shape[_sample_axis(dataset.shape)] if dataset.ndim else 1
+
+    def _read(self, name, start, stop):
+        if self._h5 is None:
+            return self._v5([name])[name][start:stop]
+        dataset = self._dataset(name)
+        axis = _sample_axis(dataset.shape)
+        index = [slice(None)] * dataset.ndim
+        index[axis] = slice(start, stop)
+        return _orient(dataset[tuple(index)].T)
+
+    def _time_index(self, time_variable, value):
+        """First sample with time >= value, by binary search reading single samples."""
+        lo, hi = 0, self.n_samples(time_variable)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if float(np.ravel(self._read(time_variable, mid, mid + 1))[0]) < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_time_variable(self):
+        names = self.variables()
+        return next((name for name in TIME_VARIABLES if name in names), None)
+
+    def iter_windows(self, signals, time_variable=None, chunk_size=1_000_000, start=None, stop=None):
+        """
+        Stream signals in windows of chunk_size samples.
+
+        Parameters:
+        signals (list): Signal names sharing the time base.
+        time_variable (str): Time vector (found automatically among 'time',
+            'tout' and 't' when omitted); included in every window.
+        chunk_size (int): Samples per window.
+        start (float), stop (float): Optional time range in seconds.
+
+        Yields:
+        dict: name -> array of one window.
+        """
+        time_variable = time_variable or self.find_time_variable()
+        names = ([time_variable] if time_variable else []) + [s for s in signals if s != time_variable]
+        total = min(self.n_samples(name) for name in names)
+        first = self._time_index(time_variable, start) if time_variable and start is not None else 0
+        last = self._time_index(time_variable, stop) if time_variable and stop is not None else total
+        for offset in range(first, last, chunk_size):
+            end = min(offset + chunk_size, last)
+            yield {name: self._read(name, offset, end) for name in names}
+
+    def to_column_store(self, store_path=None, signals=None, time_variable=None, chunk_size=1_000_000):
+        """
+        Convert signals to the project's column store (one .npy per column plus
+        schema.json, see ai/training/dataset_store), writing window by window.
+        Multi-channel signals become one column per channel (name_0, name_1 ...).
+
+        Parameters:
+        store_path (str): Store directory, defaults to <mat dir>/.cache/<stem>.
+        signals (list): Signals to convert, defaults to every variable with the
+            time vector's sample count.
+
+        Returns:
+        str: Path of the column store (readable with dataset_store.load_columns).
+        """
+        store_path = store_path or cache_path(self.file_path)
+        time_variable = time_variable or self.find_time_variable()
+        if signals is None:
+            if time_variable is None:
+                raise ValueError("signals must be given when the file has no time vector")
+            n = self.n_samples(time_variable)
+            signals = [name for name, info in self.variables().items()
+                       if name != time_variable and n in info['shape']]
+        windows = self.iter_windows(signals, time_variable, chunk_size)
+
+        tmp_path = store_path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        names = ([time_variable] if time_variable else []) + [s for s in signals if s != time_variable]
+        n_rows = min(self.n_samples(name) for name in names)
+        outputs, columns = {}, []
+        for window in windows:
+            if not outputs:
+                for name in names:
+                    sample = window[name]
+                    channels = [None] if sample.ndim == 1 else range(sample.shape[1])
+                    for channel in channels:
+                        column = name.replace('.', '_') + ('' if channel is None else f'_{channel}')
+                        filename = f'c{len(columns):04d}.npy'
+                        outputs[(name, channel)] = np.lib.format.open_memmap(
+                            os.path.join(tmp_path, filename), mode='w+', dtype=sample.dtype, shape=(n_rows,))
+                        columns.append({'name': column, 'dtype': sample.dtype.str, 'file': filename})
+                row = 0
+            length = len(window[names[0]])
+            for (name, channel), out in outputs.items():
+                values = window[name]
+                out[row:row + length] = values if channel is None else values[:, channel]
+            row += length
+        for out in outputs.values():
+            out.flush()
+        outputs.clear()
+
+        stat = os.stat(self.file_path)
+        schema = {'source': os.path.abspath(self.file_path), 'source_size': stat.st_size,
+                  'source_mtime': stat.st_mtime, 'n_rows': n_rows, 'columns': columns}
+        with open(os.path.join(tmp_path, SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f, indent=2)
+        shutil.rmtree(store_path, ignore_errors=True)
+        os.replace(tmp_path, store_path)
+        return store_path
+
+    def close(self):
+        if self._h5 is not None:
+            self._h5.close()
+            self._h5 = None
+        self._loaded.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,10 +1,271 @@
+import queue
+import threading
+from concurrent.futures import Future
+
 import numpy as np
-import scipy.io
-import matlab.engine
 
-class MatlabBridge:
+try:
+    import matlab.engine
+    TIMEOUT_ERRORS = (TimeoutError, matlab.engine.TimeoutError)
+except ImportError:  # MATLAB is optional: the 'numpy' backend stands in for it
+    matlab = None
+    TIMEOUT_ERRORS = (TimeoutError,)
+
+from backend.config.settings import Config
+from backend.simulation.pfc_engine import simulate_pfc
+from backend.simulation.mat_reader import MatResultsReader
+
+
+class MatlabEngine:
+    """A MATLAB engine process started in the background."""
+
     def __init__(self):
-        self.eng = matlab.engine.start_matlab()
+        if matlab is None:
+            raise ImportError("MATLAB Engine API for Python is not installed; use the 'numpy' backend")
+        self._starting = matlab.engine.start_matlab(background=True)
+        self.eng = None
+
+    def wait_ready(self):
+        if self.eng is None:
+            self.eng = self._starting.result()
+        return self.eng
+
+    def call(self, function, parameters, timeout=None):
+        """
+        Call a MATLAB function on a struct of parameters.
+
+        :param function: Name of the MATLAB function.
+        :param parameters: Dict of scalars or equal-length lists (one struct with vector fields).
+        :param timeout: Seconds to wait for the result.
+        :return: The function's result.
+        """
+        eng = self.wait_ready()
+        struct = {k: matlab.double(np.atleast_1d(v).tolist()) if np.ndim(v) else v for k, v in parameters.items()}
+        future = getattr(eng, function)(struct, background=True)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def alive(self):
+        try:
+            self.wait_ready().eval('1;', nargout=0)
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            if self.eng is None:
+                self._starting.cancel()
+            else:
+                self.eng.quit()
+        except Exception:
+            pass
+
+
+class NumpyEngine:
+    """Local stand-in for a MATLAB engine: run_simulation is served by the NumPy PFC engine."""
+
+    def wait_ready(self):
+        return self
+
+    def call(self, function, parameters, timeout=None):
+        if function != 'run_simulation':
+            raise ValueError(f"NumPy backend has no function {function}")
+        parameters = dict(parameters)
+        topology = parameters.pop('topology', 'boost')
+        mode = parameters.pop('mode', 'averaged')
+        return simulate_pfc(parameters, topology=topology, mode=mode)
+
+    def alive(self):
+        return True
+
+    def quit(self):
+        pass
+
+
+BACKENDS = {
+    'matlab': MatlabEngine,
+    'numpy': NumpyEngine,
+}
+
+
+def stack_parameters(parameter_list):
+    """
+    Merge a list of parameter dicts into one struct of equal-length vectors,
+    so a single engine call simulates the whole batch.
+    """
+    keys = sorted({k for p in parameter_list for k in p})
+    struct = {}
+    for key in keys:
+        values = [p.get(key) for p in parameter_list]
+        if any(v is None for v in values):
+            raise ValueError(f"Parameter '{key}' is missing from part of the batch")
+        if any(isinstance(v, str) for v in values):
+            if any(v != values[0] for v in values):
+                raise ValueError(f"Parameter '{key}' must be the same for the whole batch")
+            struct[key] = values[0]
+        else:
+            struct[key] = np.asarray(values)
+    return struct
+
+
+def split_results(results, n):
+    """Split a batched result (fields with a leading batch dimension) into n per-variant results."""
+    if isinstance(results, dict):
+        out = [{} for _ in range(n)]
+        for key, value in results.items():
+            array = np.asarray(value)
+            for i in range(n):
+                out[i][key] = array[i] if array.ndim and array.shape[0] == n else value
+        return out
+    array = np.asarray(results)
+    return [array[i] for i in range(n)] if array.ndim and array.shape[0] == n else [results] * n
+
+
+class EnginePool:
+    def __init__(self, size=None, backend=None, function='run_simulation', max_retries=1, timeout=None):
+        """
+        Keep `size` warm engines and run simulation jobs on them asynchronously.
+
+        Engines start in parallel in the background when the pool is created.
+        Each engine is served by one worker thread pulling jobs from a shared
+        queue; an engine whose call fails and that no longer responds is quit
+        and replaced, and the job is retried up to max_retries times.
+
+        :param size: Number of engines (default Config.MATLAB_POOL_SIZE).
+        :param backend: 'matlab', 'numpy' or a factory returning an engine object
+            with wait_ready / call / alive / quit (default Config.MATLAB_BACKEND,
+            else MATLAB when installed and the NumPy stand-in otherwise).
+        :param function: Engine function called for every job.
+        :param max_retries: Retries of a job after its engine crashed.
+        :param timeout: Seconds per call before the engine is considered hung.
+        """
+        self.size = size or Config.MATLAB_POOL_SIZE
+        backend = backend or Config.MATLAB_BACKEND or ('matlab' if matlab is not None else 'numpy')
+        self.factory = BACKENDS[backend] if isinstance(backend, str) else backend
+        self.function = function
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.recycled = 0
+        self._jobs = queue.Queue()
+        self._engines = [self.factory() for _ in range(self.size)]
+        self._threads = [threading.Thread(target=self._worker, args=(slot,), daemon=True)
+                         for slot in range(self.size)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, parameters):
+        """
+        Queue one simulation.
+
+        :param parameters: A dictionary of parameters (scalars or equal-length vectors).
+        :return: A Future resolving to the engine's result. With scalar parameters
+            (a single run) the batch dimension is dropped, so the result has the
+            shapes of one submit_batch entry; vector parameters keep it.
+        """
+        if any(np.ndim(v) for k, v in parameters.items() if not isinstance(v, str)):
+            return self._submit(parameters)
+        single = Future()
+        self._submit(parameters).add_done_callback(lambda f: self._scatter(f, [single]))
+        return single
+
+    def _submit(self, parameters):
+        future = Future()
+        self._jobs.put((parameters, future, 0))
+        return future
+
+    def submit_batch(self, parameter_list, batch_size=64):
+        """
+        Queue many simulations as struct batches of up to batch_size variants.
+
+        :param parameter_list: List of parameter dictionaries.
+        :return: A list of Futures, one per parameter set, in order.
+        """
+        futures = []
+        for start in range(0, len(parameter_list), batch_size):
+            chunk = parameter_list[start:start + batch_size]
+            batch = self._submit(stack_parameters(chunk))
+            parts = [Future() for _ in chunk]
+            batch.add_done_callback(lambda f, parts=parts: self._scatter(f, parts))
+            futures.extend(parts)
+        return futures
+
+    @staticmethod
+    def _scatter(batch, parts):
+        if batch.exception() is not None:
+            for part in parts:
+                part.set_exception(batch.exception())
+            return
+        for part, result in zip(parts, split_results(batch.result(), len(parts))):
+            part.set_result(result)
+
+    def map(self, parameter_list, batch_size=64):
+        """Run a list of parameter sets and return their results in order."""
+        return [f.result() for f in self.submit_batch(parameter_list, batch_size)]
+
+    def _recycle(self, slot):
+        self._engines[slot].quit()
+        self._engines[slot] = self.factory()
+        self.recycled += 1
+
+    def _worker(self, slot):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            parameters, future, attempt = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = self._engines[slot].call(self.function, parameters, timeout=self.timeout)
+            except Exception as exc:
+                # a hung call is treated like a crash: its engine is not asked again
+                crashed = isinstance(exc, TIMEOUT_ERRORS) or not self._engines[slot].alive()
+                if crashed:
+                    self._recycle(slot)
+                if crashed and attempt < self.max_retries:
+                    # hand the job back with a fresh Future state
+                    retry = Future()
+                    retry.add_done_callback(lambda f, future=future: self._forward(f, future))
+                    self._jobs.put((parameters, retry, attempt + 1))
+                else:
+                    future.set_exception(exc)
+                continue
+            future.set_result(result)
+
+    @staticmethod
+    def _forward(source, target):
+        if source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+
+    def close(self):
+        """Finish queued jobs and quit all engines."""
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        for engine in self._engines:
+            engine.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MatlabBridge:
+    def __init__(self, pool_size=None, backend=None):
+        """
+        :param pool_size: Warm engines kept by the bridge (default Config.MATLAB_POOL_SIZE).
+        :param backend: 'matlab' or the 'numpy' stand-in (default Config.MATLAB_BACKEND).
+        """
+        self.pool = EnginePool(pool_size, backend)
 
     def run_simulation(self, parameters):
         """
@@ -13,23 +274,43 @@ class MatlabBridge:
         :param parameters: A dictionary of parameters to pass to the MATLAB function.
         :return: The results from the MATLAB simulation.
         """
-        # Convert parameters to MATLAB struct
-        matlab_params = matlab.struct(parameters)
-        results = self.eng.run_simulation(matlab_params)
-        return results
+        return self.pool.submit(parameters).result()
+
+    def run_simulation_async(self, parameters):
+        """
+        Queue a simulation without waiting for it.
+
+        :param parameters: A dictionary of parameters, or a list of them (run as struct batches).
+        :return: A Future, or a list of Futures for a list of parameter sets.
+        """
+        if isinstance(parameters, (list, tuple)):
+            return self.pool.submit_batch(list(parameters))
+        return self.pool.submit(parameters)
+
+    def load_results(self, file_path, variables=None):
+        """
+        Load simulation results from a .mat file (v5 or v7.3).
+
+        :param file_path: Path to the .mat file.
+        :param variables: Names of the signals to load; all variables when omitted.
+        :return: Dict of the loaded arrays (samples along axis 0).
+        """
+        with MatResultsReader(file_path) as reader:
+            return reader.load(variables or list(reader.variables()))
 
-    def load_results(self, file_path):
+    @staticmethod
+    def open_results(file_path):
         """
-        Load simulation results from a .mat file.
+        Open a .mat file lazily: list variables, load selected signals or
+        stream them in time windows (see MatResultsReader).
 
         :param file_path: Path to the .mat file.
-        :return: Loaded data from the .mat file.
+        :return: A MatResultsReader.
         """
-        data = scipy.io.loadmat(file_path)
-        return data
+        return MatResultsReader(file_path)
 
     def close(self):
         """
-        Close the MATLAB engine.
+        Close the MATLAB engines.
         """
-        self.eng.quit()
\ No newline at end of file
+        self.pool.close()
@@ -0,0 +1,642 @@
+import numpy as np
+
+# Topology descriptions used by the boost-PFC engine.
+#   phases:        number of interleaved boost legs (carriers shifted by T/phases)
+#   bridge_diodes: diode drops that sit in the line current path in every switch state
+#   synchronous:   the boost rectifier is a MOSFET, so the inductor current may reverse
+#                  (forced CCM); otherwise the boost diode blocks and DCM can occur
+TOPOLOGIES = {
+    'boost': {'phases': 1, 'bridge_diodes': 2, 'synchronous': False},
+    'bridgeless': {'phases': 1, 'bridge_diodes': 1, 'synchronous': False},
+    'totem-pole': {'phases': 1, 'bridge_diodes': 0, 'synchronous': True},
+    'interleaved': {'phases': 2, 'bridge_diodes': 2, 'synchronous': False},
+}
+
+DEFAULT_PARAMETERS = {
+    'input_voltage': 230.0,      # RMS line voltage (V)
+    'line_frequency': 50.0,      # Hz
+    'output_voltage': 400.0,     # DC bus reference (V)
+    'load_power': 1000.0,        # W, used when neither load_resistance nor load_current is given
+    'inductor_value': 300e-6,    # H, per phase
+    'capacitor_value': 470e-6,   # F
+    'switching_freq': 100e3,     # Hz
+    'kp': 0.25,                  # voltage loop proportional gain (A/V)
+    'ki': 20.0,                  # voltage loop integral gain (A/(V*s))
+    'kd': 0.0,                   # voltage loop derivative gain (A*s/V)
+    'voltage_loop_bandwidth': 20.0,  # Hz, low-pass on the sensed bus voltage
+    'r_on': 0.05,                # MOSFET on-resistance (ohm)
+    'r_inductor': 0.05,          # inductor winding resistance (ohm)
+    'diode_drop': 0.8,           # forward drop of bridge/boost diodes (V)
+    'switching_time': 20e-9,     # combined rise + fall time (s)
+    'c_oss': 100e-12,            # MOSFET output capacitance (F)
+    'max_duty': 0.95,
+}
+
+PARAMETER_ALIASES = {
+    'frequency': 'line_frequency',
+}
+
+OUTPUT_COLUMNS = ['time', 'voltage', 'current', 'power', 'efficiency']
+
+
+def resolve_topology(name):
+    """Map a topology name (also the API ids such as 'totem-pole-pfc') to a TOPOLOGIES key."""
+    key = (name or 'boost').lower().replace('_', '-')
+    if key.endswith('-pfc'):
+        key = key[:-4]
+    if key not in TOPOLOGIES:
+        raise ValueError(f"Unknown PFC topology: {name}")
+    return key
+
+
+def normalize_parameters(parameters):
+    """
+    Merge user parameters with the defaults and broadcast them to float arrays.
+
+    Every value may be a scalar or a 1-D array; all arrays are broadcast to a
+    common length N so that N circuit variants are simulated together. The load
+    is resolved to 'load_resistance' from (in order of precedence)
+    load_resistance, load_current (DC output current) or load_power.
+
+    Parameters:
+    parameters (dict): Circuit parameters, see DEFAULT_PARAMETERS.
+
+    Returns:
+    dict: Parameter name -> np.ndarray of shape (N,).
+    """
+    given = {PARAMETER_ALIASES.get(key, key): value for key, value in parameters.items()
+             if key != 'topology'}
+    merged = dict(DEFAULT_PARAMETERS)
+    merged.update(given)
+
+    arrays = {key: np.atleast_1d(np.asarray(value, dtype=float)) for key, value in merged.items()}
+    n = max(value.shape[0] for value in arrays.values())
+    arrays = {key: np.broadcast_to(value, (n,)).astype(float) for key, value in arrays.items()}
+
+    if 'load_resistance' in given:
+        pass
+    elif 'load_current' in given:
+        arrays['load_resistance'] = arrays['output_voltage'] / arrays['load_current']
+    else:
+        arrays['load_resistance'] = arrays['output_voltage'] ** 2 / arrays['load_power']
+    return arrays
+
+
+def _window_ratio(numerator, denominator, t, window):
+    """
+    Ratio of moving sums over the trailing time `window` along the last axis.
+
+    Rows of t must be sorted; each row may have its own grid. The window is
+    expanding until `window` seconds have elapsed.
+    """
+    num = np.cumsum(numerator, axis=-1)
+    den = np.cumsum(denominator, axis=-1)
+    # one searchsorted over all rows: shift every row into its own time band
+    band = (t[:, -1:] - t[:, :1]).max() + window + 1.0
+    offset = np.arange(t.shape[0])[:, None] * band
+    flat = (t + offset).ravel()
+    start = np.searchsorted(flat, (t - window + offset).ravel(), side='right').reshape(t.shape) - 1
+    start -= np.arange(t.shape[0])[:, None] * t.shape[1]
+    rows = np.arange(t.shape[0])[:, None]
+    inside = start >= 0
+    first = np.where(inside, start, 0)
+    num = num - np.where(inside, num[rows, first], 0.0)
+    den = den - np.where(inside, den[rows, first], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(den > 0, num / den, 0.0)
+    return np.clip(ratio, 0.0, 1.0)
+
+
+def _segments(i, v, v_rect, t_on, T, r_path_on, r_path_off, v_rect_drop, L, sync):
+    """
+    Closed-form inductor segments of one PWM period.
+
+    Given the period start current, the bus voltage and the on-time, returns
+    the on/off slopes, the peak and end currents and the rectifier conduction
+    time (shorter than the off-time in discontinuous conduction).
+    """
+    m_on = (v_rect - i * r_path_on) / L
+    m_off = (v_rect - i * r_path_off - v - v_rect_drop) / L
+    t_off = T - t_on
+    i_pk = i + m_on * t_on
+    if sync:
+        return m_on, m_off, i_pk, i_pk + m_off * t_off, t_off
+    i_pk = np.maximum(i_pk, 0.0)
+    i_end = i_pk + m_off * t_off
+    # the boost diode blocks reverse current: conduction stops at i = 0
+    dcm = i_end < 0.0
+    t_cond = np.where(dcm, i_pk / np.where(dcm, -m_off, 1.0), t_off)
+    return m_on, m_off, i_pk, np.maximum(i_end, 0.0), t_cond
+
+
+def _switching_periods(p, topology, n_periods):
+    """
+    Advance the switched converter one PWM period at a time.
+
+    Within a period the line voltage and bus voltage are frozen, so every
+    inductor segment is a straight line and the period end state has a closed
+    form (including discontinuous conduction). Only the control loop and the
+    state update run per period, vectorized over all N variants and all
+    interleaved phases; slopes and losses are rebuilt afterwards in one array
+    pass over the whole (N, phases, periods) record.
+    """
+    spec = TOPOLOGIES[topology]
+    phases = spec['phases']
+    sync = spec['synchronous']
+
+    T = 1.0 / p['switching_freq']
+    Tc = T[:, None]
+    v_pk = np.sqrt(2.0) * p['input_voltage']
+    L = p['inductor_value'][:, None]
+    C = p['capacitor_value']
+    R_load = p['load_resistance']
+    v_ref = p['output_voltage']
+    kp, ki, kd = p['kp'], p['ki'], p['kd']
+    t_sw = p['switching_time'][:, None]
+    c_oss = p['c_oss'][:, None]
+    d_max = p['max_duty'][:, None]
+
+    # Conduction path of one leg in the ON (switch) and OFF (rectifier) state
+    r_slow = p['r_on'] if sync else 0.0
+    r_path_on = (p['r_inductor'] + p['r_on'] + r_slow)[:, None]
+    r_path_off = (p['r_inductor'] + (p['r_on'] if sync else 0.0) + r_slow)[:, None]
+    v_rect_drop = (0.0 if sync else 1.0) * p['diode_drop'][:, None]
+    v_static = (spec['bridge_diodes'] * p['diode_drop'])[:, None]
+
+    alpha = 1.0 - np.exp(-2 * np.pi * p['voltage_loop_bandwidth'] * T)
+    i_ff = 2.0 * v_ref ** 2 / R_load / v_pk          # peak line current for the nominal load
+    offsets = np.arange(phases) / phases
+
+    # The line voltage does not depend on the state: sample it for all periods at once
+    t_mid = (np.arange(n_periods)[None, None, :] + offsets[None, :, None] + 0.5) * T[:, None, None]
+    v_abs = np.abs(v_pk[:, None, None] * np.sin(2 * np.pi * p['line_frequency'][:, None, None] * t_mid))
+    v_rect = v_abs - v_static[..., None]
+    ref_shape = v_abs / (v_pk * phases)[:, None, None]
+
+    n = T.shape[0]
+    i_start = np.empty((n, phases, n_periods))
+    t_on_all = np.empty((n, phases, n_periods))
+    v_start = np.empty((n, n_periods + 1))
+
+    i = np.zeros((n, phases))
+    v = v_ref.copy()
+    v_filt = v_ref.copy()
+    integ = np.zeros(n)
+    e_prev = np.zeros(n)
+
+    for k in range(n_periods):
+        # Outer voltage loop, sampled once per period
+        v_filt += alpha * (v - v_filt)
+        e = v_ref - v_filt
+        integ += e * T
+        i_amp = np.maximum(i_ff + kp * e + ki * integ + kd * (e - e_prev) / T, 0.0)
+        e_prev = e
+
+        # Inner current loop: predictive duty that lands on i_ref at the period end
+        v_bus = v[:, None]
+        vr = v_rect[..., k]
+        m_on = (vr - i * r_path_on) / L
+        m_off = (vr - i * r_path_off - v_bus - v_rect_drop) / L
+        duty = (i_amp[:, None] * ref_shape[..., k] - i - m_off * Tc) / ((m_on - m_off) * Tc)
+        duty = np.minimum(np.maximum(duty, 0.0), d_max)
+        t_on = duty * Tc
+        _, _, i_pk, i_end, t_cond = _segments(i, v_bus, vr, t_on, Tc, r_path_on, r_path_off,
+                                              v_rect_drop, L, sync)
+        i_start[..., k] = i
+        t_on_all[..., k] = t_on
+        v_start[:, k] = v
+
+        # Bus capacitor: rectifier charge in, load charge out, switching energy lost
+        charge = (0.5 * (i_pk + i_end) * t_cond).sum(axis=1)
+        e_sw = ((duty > 0) * (0.5 * v_bus * (np.abs(i) + np.abs(i_pk)) * t_sw
+                              + 0.5 * c_oss * v_bus ** 2)).sum(axis=1)
+        v = v + (charge - v / R_load * T) / C - e_sw / (C * v)
+        i = i_end
+    v_start[:, n_periods] = v
+
+    # Rebuild every segment and the per-period losses from the recorded states
+    v_bus = v_start[:, None, :-1]
+    Tk = T[:, None, None]
+    m_on, m_off, i_pk, i_end, t_cond = _segments(
+        i_start, v_bus, v_rect, t_on_all, Tk, r_path_on[..., None], r_path_off[..., None],
+        v_rect_drop[..., None], L[..., None], sync)
+    q_on = 0.5 * (i_start + i_pk) * t_on_all
+    q_off = 0.5 * (i_pk + i_end) * t_cond
+    e_sw = (t_on_all > 0) * (0.5 * v_bus * (np.abs(i_start) + np.abs(i_pk)) * t_sw[..., None]
+                             + 0.5 * c_oss[..., None] * v_bus ** 2)
+    e_cond = (r_path_on[..., None] * t_on_all * (i_start ** 2 + i_start * i_pk + i_pk ** 2) / 3
+              + r_path_off[..., None] * t_cond * (i_pk ** 2 + i_pk * i_end + i_end ** 2) / 3
+              + v_static[..., None] * np.abs(q_on + q_off) + v_rect_drop[..., None] * q_off)
+
+    return {
+        'period': T,
+        'offsets': offsets,
+        'synchronous': sync,
+        'i_start': i_start,
+        'i_peak': i_pk,
+        'slope_on': m_on,
+        'slope_off': m_off,
+        't_on': t_on_all,
+        't_cond': t_cond,
+        'v_start': v_start,
+        'p_loss': (e_sw + e_cond).sum(axis=1) / Tk[:, 0],
+    }
+
+
+def _phase_currents(record, t):
+    """Evaluate every phase's piecewise-linear inductor current at times t (N, M)."""
+    T = record['period'][:, None]
+    n_periods = record['i_start'].shape[-1]
+    total = np.zeros_like(t)
+    for phase, offset in enumerate(record['offsets']):
+        local = t / T - offset
+        k = np.clip(np.floor(local).astype(np.int64), 0, n_periods - 1)
+        tau = np.clip(local - k, 0.0, None) * T
+
+        def take(name):
+            return np.take_along_axis(record[name][:, phase, :], k, axis=1)
+
+        t_on = take('t_on')
+        on = tau < t_on
+        current = np.where(on,
+                           take('i_start') + take('slope_on') * tau,
+                           take('i_peak') + take('slope_off') * (tau - t_on))
+        if not record['synchronous']:
+            current = np.where(tau > t_on + take('t_cond'), 0.0, np.maximum(current, 0.0))
+        total += current
+    return total
+
+
+def _phase_currents_grid(record, steps):
+    """
+    Inductor current of all phases on a uniform grid of `steps` samples per period.
+
+    Broadcasts the per-period segments against the in-period sample offsets, so
+    no gathers are needed; interleaved phases are delayed by their carrier
+    offset. Returns an (N, periods * steps) array.
+    """
+    T = record['period'][:, None, None]
+    n, phases, n_periods = record['i_start'].shape
+    tau = np.arange(steps)[None, None, :] / steps * T
+    total = np.zeros((n, n_periods * steps))
+    for phase in range(phases):
+        def field(name):
+            return record[name][:, phase, :, None]
+
+        t_on = field('t_on')
+        current = np.where(tau < t_on,
+                           field('i_start') + field('slope_on') * tau,
+                           field('i_peak') + field('slope_off') * (tau - t_on))
+        if not record['synchronous']:
+            current = np.where(tau > t_on + field('t_cond'), 0.0, np.maximum(current, 0.0))
+        current = current.reshape(n, -1)
+        shift = phase * steps // phases
+        if shift:
+            total[:, shift:] += current[:, :-shift]
+        else:
+            total += current
+    return total
+
+
+def _switching_event_times(record):
+    """Switch transitions and DCM zero crossings of all phases, sorted per variant."""
+    T = record['period'][:, None, None]
+    n_periods = record['i_start'].shape[-1]
+    start = (np.arange(n_periods)[None, None, :] + record['offsets'][None, :, None]) * T
+    events = np.concatenate([
+        start,
+        start + record['t_on'],
+        start + record['t_on'] + record['t_cond'],
+    ], axis=1).reshape(T.shape[0], -1)
+    return np.sort(events, axis=1)
+
+
+def simulate_switched(p, topology, duration, steps_per_period=100, integrator='fixed'):
+    """
+    Switching-level simulation.
+
+    integrator='fixed' samples the waveforms on a uniform grid of
+    steps_per_period points per PWM period; integrator='adaptive' only emits
+    the switching events (turn-on, turn-off, DCM zero crossing) where the
+    piecewise-linear solution changes slope, so the step follows the circuit.
+    """
+    spec = TOPOLOGIES[topology]
+    T = 1.0 / p['switching_freq']
+    n_periods = int(np.ceil(duration / T.min()))
+    record = _switching_periods(p, topology, n_periods)
+
+    if integrator == 'fixed':
+        steps = int(np.ceil(steps_per_period / spec['phases'])) * spec['phases']
+        t = np.arange(n_periods * steps)[None, :] * (T / steps)[:, None]
+        frac = np.arange(steps)[None, None, :] / steps
+        v_start = record['v_start'][..., None]
+        voltage = (1 - frac) * v_start[:, :-1] + frac * v_start[:, 1:]
+        p_loss = np.repeat(record['p_loss'], steps, axis=1)
+        return t, voltage.reshape(t.shape), _phase_currents_grid(record, steps), p_loss
+    if integrator != 'adaptive':
+        raise ValueError(f"Unknown integrator: {integrator}")
+
+    t = _switching_event_times(record)
+    current = _phase_currents(record, t)
+    # the bus voltage changes by millivolts within a period: interpolate between period starts
+    position = np.clip(t / T[:, None], 0.0, n_periods)
+    k = np.minimum(np.floor(position).astype(np.int64), n_periods - 1)
+    frac = position - k
+    v_start = record['v_start']
+    voltage = ((1 - frac) * np.take_along_axis(v_start, k, axis=1)
+               + frac * np.take_along_axis(v_start, k + 1, axis=1))
+    p_loss = np.take_along_axis(record['p_loss'], k, axis=1)
+    return t, voltage, current, p_loss
+
+
+def _averaged_flow(p, spec, t, state):
+    """
+    Averaged power flow of the PFC stage with an ideal inner current loop.
+
+    Returns the input power, the loss power (conduction + switching), the line
+    current and the voltage-loop error for the given state (v, v_filt, integ).
+    """
+    phases = spec['phases']
+    sync = spec['synchronous']
+    v, v_filt, integ = state
+
+    v_pk = np.sqrt(2.0) * p['input_voltage']
+    v_ref = p['output_voltage']
+    w_f = 2 * np.pi * p['voltage_loop_bandwidth']
+    r_slow = p['r_on'] if sync else 0.0
+    r_path_on = p['r_inductor'] + p['r_on'] + r_slow
+    r_path_off = p['r_inductor'] + (p['r_on'] if sync else 0.0) + r_slow
+    v_rect_drop = (0.0 if sync else 1.0) * p['diode_drop']
+    v_static = spec['bridge_diodes'] * p['diode_drop']
+    i_ff = 2.0 * v_ref ** 2 / p['load_resistance'] / v_pk
+
+    e = v_ref - v_filt
+    i_amp = np.maximum(i_ff + p['kp'] * e + p['ki'] * integ - p['kd'] * w_f * (v - v_filt), 0.0)
+    v_abs = np.abs(v_pk * np.sin(2 * np.pi * p['line_frequency'] * t))
+    current = i_amp * v_abs / v_pk
+    i_leg = current / phases
+    duty = np.clip(1.0 - (v_abs - v_static) / (v + v_rect_drop), 0.0, p['max_duty'])
+
+    p_in = v_abs * current
+    p_loss = (phases * i_leg ** 2 * (duty * r_path_on + (1 - duty) * r_path_off)
+              + current * ((1 - duty) * v_rect_drop + v_static)
+              + phases * p['switching_freq'] * (v * i_leg * p['switching_time']
+                                                + 0.5 * p['c_oss'] * v ** 2))
+    return p_in, p_loss, current, e
+
+
+def simulate_averaged(p, topology, duration, time_step=None, integrator='fixed', rtol=1e-4, atol=1e-6):
+    """
+    State-space averaged simulation with an ideal inner current loop.
+
+    The inductor current follows its reference instantly, which removes the
+    switching-frequency mode and leaves the slow bus-voltage / voltage-loop
+    dynamics. The state is integrated with classical RK4 on a fixed step or
+    with an adaptive Bogacki-Shampine (RK23) step shared by all variants.
+    """
+    spec = TOPOLOGIES[topology]
+    C = p['capacitor_value']
+    R_load = p['load_resistance']
+    v_ref = p['output_voltage']
+    w_f = 2 * np.pi * p['voltage_loop_bandwidth']
+
+    def derivative(t, state):
+        v, v_filt, _ = state
+        p_in, p_loss, _, e = _averaged_flow(p, spec, t, state)
+        return np.stack([
+            (p_in - p_loss - v ** 2 / R_load) / (C * v),
+            w_f * (v - v_filt),
+            e,
+        ])
+
+    line_period = 1.0 / p['line_frequency'].max()
+    h = time_step or line_period / 400
+    output_step = h
+    state = np.stack([v_ref.copy(), v_ref.copy(), np.zeros_like(v_ref)])
+    t = 0.0
+    times, states = [t], [state]
+
+    if integrator == 'fixed':
+        for _ in range(int(np.ceil(duration / h))):
+            k1 = derivative(t, state)
+            k2 = derivative(t + h / 2, state + h / 2 * k1)
+            k3 = derivative(t + h / 2, state + h / 2 * k2)
+            k4 = derivative(t + h, state + h * k3)
+            state = state + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            t += h
+            times.append(t)
+            states.append(state)
+    elif integrator == 'adaptive':
+        h_max = line_period / 20
+        k1 = derivative(t, state)
+        slopes = [k1]
+        while t < duration:
+            h = min(h, duration - t)
+            k2 = derivative(t + h / 2, state + h / 2 * k1)
+            k3 = derivative(t + 3 * h / 4, state + 3 * h / 4 * k2)
+            new_state = state + h * (2 * k1 + 3 * k2 + 4 * k3) / 9
+            k4 = derivative(t + h, new_state)
+            error = h * (-5 * k1 / 72 + k2 / 12 + k3 / 9 - k4 / 8)
+            scale = atol + rtol * np.maximum(np.abs(state), np.abs(new_state))
+            norm = np.max(np.abs(error) / scale)
+            if norm <= 1.0:
+                t += h
+                state, k1 = new_state, k4
+                times.append(t)
+                states.append(state)
+                slopes.append(k1)
+            h = min(h_max, h * min(5.0, max(0.2, 0.9 * norm ** (-1 / 3) if norm > 0 else 5.0)))
+    else:
+        raise ValueError(f"Unknown integrator: {integrator}")
+
+    times = np.array(times)
+    states = np.stack(states, axis=-1)            # (3, N, M)
+    if integrator == 'adaptive':
+        # cubic Hermite dense output onto the uniform output grid
+        grid = np.arange(int(np.floor(duration / output_step)) + 1) * output_step
+        slopes = np.stack(slopes, axis=-1)
+        j = np.clip(np.searchsorted(times, grid, side='right') - 1, 0, len(times) - 2)
+        dt = times[j + 1] - times[j]
+        s = (grid - times[j]) / dt
+        h00, h10 = 2 * s ** 3 - 3 * s ** 2 + 1, s ** 3 - 2 * s ** 2 + s
+        h01, h11 = -2 * s ** 3 + 3 * s ** 2, s ** 3 - s ** 2
+        states = (h00 * states[..., j] + h10 * dt * slopes[..., j]
+                  + h01 * states[..., j + 1] + h11 * dt * slopes[..., j + 1])
+        times = grid
+    expand = {key: value[:, None] for key, value in p.items()}
+    p_in, p_loss, current, _ = _averaged_flow(expand, spec, times[None, :], states)
+    t = np.broadcast_to(times, current.shape)
+    return t, states[0], current, p_loss
+
+
+def simulate_pfc(parameters, topology='boost', mode='switched', integrator='fixed',
+                 line_cycles=3, duration=None, steps_per_period=100, time_step=None):
+    """
+    Simulate a boost-type PFC stage for one or many parameter sets.
+
+    Parameters:
+    parameters (dict): Circuit parameters (scalars or 1-D arrays, see DEFAULT_PARAMETERS).
+    topology (str): 'boost', 'bridgeless', 'totem-pole' or 'interleaved' (API ids accepted).
+    mode (str): 'switched' for the switching-level model, 'averaged' for the
+        state-space averaged model.
+    integrator (str): 'fixed' or 'adaptive' time stepping.
+    line_cycles (float): Simulated line cycles when duration is not given.
+    duration (float): Simulated time in seconds.
+    steps_per_period (int): Samples per PWM period for the fixed switched grid.
+    time_step (float): Output step of the averaged model and step of its fixed
+        integrator (default T_line / 400).
+
+    Returns:
+    dict: Arrays of shape (N, M) for every column in OUTPUT_COLUMNS plus
+    'input_voltage' (rectified line voltage) and 'loss' (loss power).
+    """
+    topology = resolve_topology(topology)
+    p = normalize_parameters(parameters)
+    if duration is None:
+        duration = line_cycles / p['line_frequency'].min()
+
+    if mode == 'switched':
+        t, voltage, current, p_loss = simulate_switched(p, topology, duration, steps_per_period, integrator)
+    elif mode == 'averaged':
+        t, voltage, current, p_loss = simulate_averaged(p, topology, duration, time_step, integrator)
+    else:
+        raise ValueError(f"Unknown simulation mode: {mode}")
+
+    v_in = np.abs(np.sqrt(2.0) * p['input_voltage'][:, None]
+                  * np.sin(2 * np.pi * p['line_frequency'][:, None] * t))
+    # Efficiency from the loss model over a sliding half line cycle (the input
+    # power period), weighted by step length for the non-uniform adaptive grids.
+    # Using losses rather than input power keeps the bus capacitor's stored
+    # energy swings out of the ratio.
+    dt = np.diff(t, axis=1, prepend=0.0)
+    p_out = voltage ** 2 / p['load_resistance'][:, None] * dt
+    return {
+        'time': t,
+        'voltage': voltage,
+        'current': current,
+        'power': voltage * current,
+        'efficiency': _window_ratio(p_out, p_out + p_loss * dt, t, 0.5 / p['line_frequency'].min()),
+        'input_voltage': v_in,
+        'loss': p_loss,
+    }
+
+
+# Feature columns of data/training/pfc_buck_data.csv. ambient_temp, zbf and compval
+# are carried along for the training set but do not enter the electrical model.
+FEATURE_COLUMNS = ['input_voltage', 'load_current', 'ambient_temp', 'inductor_value',
+                   'capacitor_value', 'switching_freq', 'kp', 'ki', 'kd', 'zbf', 'compval']
+
+METRIC_COLUMNS = ['efficiency', 'thd', 'power_factor', 'ripple', 'peak_temp']
+
+# Outputs of the multi-target surrogate, in the order of its output columns
+SURROGATE_TARGETS = ['efficiency', 'thd', 'power_factor', 'peak_temp']
+
+# Lumped junction-to-ambient resistance used for the peak temperature estimate (K/W)
+HEATSINK_THERMAL_RESISTANCE = 1.5
+
+
+def peak_temperature(ambient, output_power, efficiency, thermal_resistance=HEATSINK_THERMAL_RESISTANCE):
+    """Device temperature (°C) from the converter loss through a lumped heatsink resistance."""
+    p_loss = output_power * (1.0 / np.maximum(efficiency, 1e-6) - 1.0)
+    return ambient + thermal_resistance * p_loss
+
+
+def waveform_metrics(result, line_frequency, duration, harmonics=40):
+    """
+    Steady-state figures of merit over the last line cycle of every variant.
+
+    Parameters:
+    result (dict): Output of simulate_pfc.
+    line_frequency (np.ndarray): Line frequency per variant, shape (N,).
+    duration (float): Simulated time in seconds.
+    harmonics (int): Highest line harmonic included in the THD.
+
+    Returns:
+    dict: 'efficiency', 'thd' (line current, fraction), 'power_factor' and
+    'ripple' (bus peak-to-peak over mean), each of shape (N,).
+    """
+    t = result['time']
+    f = line_frequency[:, None]
+    window = (t >= duration - 1.0 / f) & (t <= duration)
+    dt = np.where(window, np.diff(t, axis=1, prepend=0.0), 0.0)
+    # the efficiency column already averages over the last half line cycle
+    last = np.maximum((t <= duration).sum(axis=1) - 1, 0)
+    efficiency = result['efficiency'][np.arange(t.shape[0]), last]
+
+    # drop the columns that lie before every variant's window
+    columns = window.any(axis=0)
+    t, window, dt = t[:, columns], window[:, columns], dt[:, columns]
+    voltage = result['voltage'][:, columns]
+    current = result['current'][:, columns]
+    v_in = result['input_voltage'][:, columns]
+    span = dt.sum(axis=1)
+
+    p_in = (v_in * current * dt).sum(axis=1) / span
+    v_rms = np.sqrt((v_in * v_in * dt).sum(axis=1) / span)
+    i_rms = np.sqrt((current * current * dt).sum(axis=1) / span)
+
+    # line current harmonics by projection on e^{-j h w t} (recursive powers)
+    phase = np.exp(-2j * np.pi * f * t)
+    i_line = current * np.sign(np.sin(2 * np.pi * f * t)) * dt
+    basis = np.ones_like(phase)
+    amplitudes = np.empty((t.shape[0], harmonics))
+    for h in range(harmonics):
+        basis = basis * phase
+        amplitudes[:, h] = np.abs((i_line * basis).sum(axis=1))
+    fundamental = np.maximum(amplitudes[:, 0], 1e-12)
+
+    v_window_max = np.where(window, voltage, -np.inf).max(axis=1)
+    v_window_min = np.where(window, voltage, np.inf).min(axis=1)
+    v_mean = (voltage * dt).sum(axis=1) / span
+    return {
+        'efficiency': efficiency,
+        'thd': np.sqrt((amplitudes[:, 1:] ** 2).sum(axis=1)) / fundamental,
+        'power_factor': p_in / np.maximum(v_rms * i_rms, 1e-12),
+        'ripple': (v_window_max - v_window_min) / v_mean,
+    }
+
+
+def simulate_batch(parameter_matrix, columns=None, topology='boost', mode='averaged',
+                   integrator='adaptive', line_cycles=3, chunk_size=1024, **kwargs):
+    """
+    Simulate many circuit variants in one array pass and summarize each one.
+
+    Parameters:
+    parameter_matrix (array-like or DataFrame): N x P matrix, one variant per row.
+    columns (list): Column names of the matrix; defaults to the DataFrame columns
+        or FEATURE_COLUMNS for plain arrays.
+    topology (str): PFC topology shared by all variants.
+    mode (str): 'averaged' (default) or 'switched'.
+    integrator (str): 'adaptive' (default) or 'fixed'.
+    line_cycles (float): Simulated line cycles; metrics use the last one.
+    chunk_size (int): Rows simulated together, bounds the (chunk, T) buffers.
+    **kwargs: Passed on to simulate_pfc (steps_per_period, time_step).
+
+    Returns:
+    DataFrame: One row per variant with METRIC_COLUMNS.
+    """
+    import pandas as pd
+
+    if columns is None:
+        columns = list(getattr(parameter_matrix, 'columns', FEATURE_COLUMNS))
+    matrix = np.asarray(parameter_matrix, dtype=float)
+    if matrix.ndim != 2 or matrix.shape[1] != len(columns):
+        raise ValueError(f"Expected an N x {len(columns)} parameter matrix, got shape {matrix.shape}")
+
+    metrics = {name: np.empty(matrix.shape[0]) for name in METRIC_COLUMNS}
+    for start in range(0, matrix.shape[0], chunk_size):
+        chunk = matrix[start:start + chunk_size]
+        parameters = {name: chunk[:, j] for j, name in enumerate(columns)}
+        p = normalize_parameters(parameters)
+        duration = line_cycles / p['line_frequency'].min()
+        result = simulate_pfc(parameters, topology=topology, mode=mode, integrator=integrator,
+                              duration=duration, **kwargs)
+        summary = waveform_metrics(result, p['line_frequency'], duration)
+        summary['peak_temp'] = peak_temperature(p.get('ambient_temp', 25.0),
+                                                p['output_voltage'] ** 2 / p['load_resistance'],
+                                                summary['efficiency'])
+        for name, values in summary.items():
+            metrics[name][start:start + chunk.shape[0]] = values
+
+    index = getattr(parameter_matrix, 'index', None)
+    return pd.DataFrame(metrics, index=index)
@@ -0,0 +1,386 @@
+import os
+import json
+import time
+import bisect
+import argparse
+import threading
+
+import numpy as np
+
+from backend.config.settings import Config
+from backend.simulation.pfc_engine import simulate_batch, resolve_topology, SURROGATE_TARGETS
+
+VALUES_FILE = 'values.npy'
+META_FILE = 'meta.json'
+
+# Slider parameters of the topology page (frontend names and units) tabulated by default: (low, high, knots)
+DEFAULT_AXES = {
+    'inputVoltage': (90.0, 265.0, 5),
+    'loadPower': (100.0, 3000.0, 5),
+    'inductorValue': (0.1, 2.0, 4),
+    'switchingFrequency': (50.0, 200.0, 4),
+    # peak temperature is linear in the ambient, two knots reproduce it exactly
+    'temperature': (0.0, 60.0, 2),
+}
+
+# Values of the frontend parameters that are not table axes
+DEFAULT_FIXED = {'outputVoltage': 400.0}
+
+# Largest accepted interpolation error per output (efficiency / THD / PF as fractions, °C)
+DEFAULT_TOLERANCE = {'efficiency': 1e-3, 'thd': 2e-3, 'power_factor': 1e-3, 'peak_temp': 0.5}
+
+
+def _engine_matrix(points):
+    """pfc_engine columns and matrix of frontend parameter arrays (mH, kHz, W, °C)."""
+    columns = ['input_voltage', 'output_voltage', 'load_power', 'inductor_value', 'switching_freq', 'ambient_temp']
+    matrix = np.column_stack([
+        points['inputVoltage'], points['outputVoltage'], points['loadPower'],
+        points['inductorValue'] * 1e-3, points['switchingFrequency'] * 1e3, points['temperature'],
+    ])
+    return columns, matrix
+
+
+def simulator_sampler(topology='boost', **simulate_kwargs):
+    """Sampler backed by the vectorized averaged-model simulator."""
+    topology = resolve_topology(topology)
+
+    def sample(points):
+        columns, matrix = _engine_matrix(points)
+        metrics = simulate_batch(matrix, columns=columns, topology=topology, **simulate_kwargs)
+        return metrics[SURROGATE_TARGETS].to_numpy(dtype=float)
+    return sample
+
+
+def surrogate_sampler(predictor):
+    """Sampler backed by a multi-target surrogate Predictor (outputs SURROGATE_TARGETS)."""
+    from backend.simulation.pfc_engine import FEATURE_COLUMNS
+    from backend.simulation.sweep_runner import FEATURE_RANGES
+    from backend.ai.optimization.design_optimizer import DEFAULT_OPERATING_POINT
+
+    if list(getattr(predictor, 'targets', None) or []) != SURROGATE_TARGETS:
+        raise ValueError(f"The surrogate must predict {SURROGATE_TARGETS}")
+    defaults = {name: (low + high) / 2.0 for name, (low, high) in FEATURE_RANGES.items()}
+    defaults.update(DEFAULT_OPERATING_POINT)
+
+    def sample(points):
+        n = len(points['inputVoltage'])
+        features = {name: np.full(n, float(defaults[name])) for name in FEATURE_COLUMNS}
+        features['input_voltage'] = points['inputVoltage']
+        features['load_current'] = points['loadPower'] / points['outputVoltage']
+        features['ambient_temp'] = points['temperature']
+        features['inductor_value'] = points['inductorValue'] * 1e-3
+        features['switching_freq'] = points['switchingFrequency'] * 1e3
+        matrix = np.column_stack([features[name] for name in FEATURE_COLUMNS])
+        return np.asarray(predictor.predict_batch(matrix), dtype=float).reshape(n, -1)
+    return sample
+
+
+class ResponseSurface:
+    def __init__(self, axes, values, outputs, fixed=None, meta=None):
+        """
+        Tabulated response of the converter on a rectilinear grid with
+        multilinear interpolation.
+
+        Parameters:
+        axes (dict): Parameter name -> ascending knots (possibly non-uniform
+            after refinement), in table order.
+        values (np.ndarray): Shape (*knots per axis, outputs); may be a memmap.
+        outputs (list): Output names (pfc_engine SURROGATE_TARGETS).
+        fixed (dict): Values of the parameters that are not axes.
+        meta (dict): Build information and error bounds.
+        """
+        self.names = list(axes)
+        self.knots = [np.asarray(knots, dtype=float) for knots in axes.values()]
+        self.values = values
+        self.outputs = list(outputs)
+        self.fixed = dict(fixed or {})
+        self.meta = dict(meta or {})
+        # flat (cells, outputs) view: a point gathers its 2^d corner rows at once
+        self._rows = np.asarray(values).reshape(-1, len(self.outputs))
+        shape = [len(knots) for knots in self.knots]
+        strides = np.cumprod([1] + shape[:0:-1])[::-1]
+        self._strides = [int(s) for s in strides]
+        corners = np.array(np.meshgrid(*[[0, 1]] * len(shape), indexing='ij')).reshape(len(shape), -1).T
+        self._corner_offsets = corners @ strides
+        # weight factor of every corner and axis as an index into [t_1 .. t_d, 1 - t_1 .. 1 - t_d]
+        self._corner_index = np.where(corners == 1, np.arange(len(shape)), np.arange(len(shape)) + len(shape))
+        # scalar lookups: per axis (name, low, high, middle, knots, cell stride, last cell) as plain Python
+        cell_strides = np.cumprod([1] + [n - 1 for n in shape[:0:-1]])[::-1]
+        self._scalar_axes = [
+            (name, knots[0], knots[-1], (knots[0] + knots[-1]) / 2.0, knots, int(stride), len(knots) - 2)
+            for name, knots, stride in zip(self.names, (k.tolist() for k in self.knots), cell_strides)
+        ]
+        self._cell_blocks = None
+
+    @property
+    def shape(self):
+        return tuple(len(knots) for knots in self.knots)
+
+    def ranges(self):
+        return {name: (float(knots[0]), float(knots[-1])) for name, knots in zip(self.names, self.knots)}
+
+    def _weights(self, factors):
+        """Multilinear weights of the 2^d cell corners from [t, 1 - t] per point, shape (..., 2^d)."""
+        return factors[..., self._corner_index].prod(axis=-1)
+
+    def cell_blocks(self):
+        """
+        The 2^d corner rows of every grid cell, shape (cells, 2^d, outputs),
+        built on first use (less than 2^d times the table size), so a scalar
+        lookup gathers its corners as one row instead of 2^d.
+        """
+        if self._cell_blocks is None:
+            cells = np.meshgrid(*[np.arange(n - 1) for n in self.shape], indexing='ij')
+            base = sum(index.ravel() * stride for index, stride in zip(cells, self._strides))
+            self._cell_blocks = self._rows.take(base[:, None] + self._corner_offsets, axis=0)
+        return self._cell_blocks
+
+    def query(self, **params):
+        """
+        Interpolated outputs at one parameter point (missing axes take the
+        middle of their range, values outside the table are clamped).
+
+        The cell search runs on Python floats and the interpolation is three
+        small NumPy calls on the cell's corner block (see cell_blocks).
+
+        Returns:
+        dict: Output name -> float.
+        """
+        blocks = self._cell_blocks if self._cell_blocks is not None else self.cell_blocks()
+        cell = 0
+        fractions, complements = [], []
+        for name, low, high, middle, knots, stride, last in self._scalar_axes:
+            x = params.get(name)
+            if x is None:
+                x = middle
+            else:
+                x = float(x)
+                if x < low:
+                    x = low
+                elif x > high:
+                    x = high
+            i = bisect.bisect_right(knots, x) - 1
+            if i > last:
+                i = last
+            t = (x - knots[i]) / (knots[i + 1] - knots[i])
+            fractions.append(t)
+            complements.append(1.0 - t)
+            cell += i * stride
+        weights = np.array(fractions + complements)[self._corner_index].prod(axis=1)
+        values = weights @ blocks[cell]
+        return dict(zip(self.outputs, values.tolist()))
+
+    def __call__(self, points):
+        """
+        Vectorized interpolation of many points.
+
+        Parameters:
+        points (dict or np.ndarray): name -> array (missing axes take the middle
+            of their range), or an (n, axes) array in table order.
+
+        Returns:
+        np.ndarray: Shape (n, outputs).
+        """
+        if isinstance(points, dict):
+            n = max(np.size(v) for v in points.values())
+            columns = [np.broadcast_to(np.asarray(points.get(name, (k[0] + k[-1]) / 2.0), dtype=float), (n,))
+                       for name, k in zip(self.names, self.knots)]
+            X = np.column_stack(columns)
+        else:
+            X = np.atleast_2d(np.asarray(points, dtype=float))
+        d = len(self.knots)
+        base = np.zeros(len(X), dtype=np.intp)
+        factors = np.empty((len(X), 2 * d))
+        for axis, (knots, stride) in enumerate(zip(self.knots, self._strides)):
+            x = np.clip(X[:, axis], knots[0], knots[-1])
+            i = np.clip(np.searchsorted(knots, x, side='right') - 1, 0, len(knots) - 2)
+            factors[:, axis] = (x - knots[i]) / (knots[i + 1] - knots[i])
+            base += i * stride
+        factors[:, d:] = 1.0 - factors[:, :d]
+        corners = self._rows.take(base[:, None] + self._corner_offsets, axis=0)   # (n, 2^d, outputs)
+        return np.einsum('nc,nco->no', self._weights(factors), corners)
+
+    @classmethod
+    def build(cls, sampler, axes=None, fixed=None, tolerance=None, max_points=20000, max_rounds=8,
+              validation_points=500, seed=42, verbose=True):
+        """
+        Tabulate a sampler on a grid and refine it until the interpolation error
+        is within tolerance.
+
+        Every round evaluates the sampler at the midpoints of all intervals of
+        each axis (for every combination of the other axes' knots). The gap
+        between those values and the linear interpolation at the midpoint is the
+        interpolation error of the interval; intervals above tolerance are split
+        by adding the midpoint as a knot, reusing the values just computed.
+        Refinement stops when no interval exceeds tolerance, after max_rounds,
+        or when the next split would exceed max_points grid points.
+
+        Parameters:
+        sampler (callable): sampler(points) -> (n, outputs) for a dict of
+            parameter arrays (see simulator_sampler / surrogate_sampler).
+        axes (dict): name -> (low, high, knots), defaults to DEFAULT_AXES.
+        fixed (dict): Values of the non-axis parameters, defaults to DEFAULT_FIXED.
+        tolerance (dict): Largest interpolation error per output, defaults to DEFAULT_TOLERANCE.
+        validation_points (int): Random points checked against the sampler after refinement.
+
+        Returns:
+        ResponseSurface: With meta['error_bound'] (sum over axes of the largest
+        midpoint error per output; the refinement estimate) and
+        meta['validation_max_error'] / ['validation_rms_error'].
+        """
+        started = time.perf_counter()
+        axes = axes or DEFAULT_AXES
+        fixed = dict(DEFAULT_FIXED, **(fixed or {}))
+        tolerance = dict(DEFAULT_TOLERANCE, **(tolerance or {}))
+        names = list(axes)
+        knots = [np.linspace(low, high, int(n)) for low, high, n in axes.values()]
+        tol = np.array([tolerance[name] for name in SURROGATE_TARGETS])
+        evaluations = 0
+        # sampled points by coordinates: later rounds only sample the combinations with new knots
+        sampled = {}
+
+        def evaluate(grid_knots):
+            nonlocal evaluations
+            mesh = np.meshgrid(*grid_knots, indexing='ij')
+            coordinates = np.column_stack([axis.ravel() for axis in mesh])
+            keys = [row.tobytes() for row in coordinates]
+            missing = [i for i, key in enumerate(keys) if key not in sampled]
+            if missing:
+                points = {name: coordinates[missing, j] for j, name in enumerate(names)}
+                points.update({name: np.full(len(missing), float(value)) for name, value in fixed.items()})
+                for i, row in zip(missing, np.asarray(sampler(points), dtype=float).reshape(len(missing), -1)):
+                    sampled[keys[i]] = row
+                evaluations += len(missing)
+            return np.array([sampled[key] for key in keys]).reshape(*mesh[0].shape, len(tol))
+
+        values = evaluate(knots)
+        axis_errors = np.zeros((len(names), len(tol)))
+        converged = False
+        for round_ in range(max_rounds):
+            splits = 0
+            for k in range(len(names)):
+                if len(knots[k]) < 2:
+                    continue
+                mids = (knots[k][:-1] + knots[k][1:]) / 2.0
+                mid_values = evaluate(knots[:k] + [mids] + knots[k + 1:])
+                linear = (np.take(values, range(len(mids)), axis=k)
+                          + np.take(values, range(1, len(mids) + 1), axis=k)) / 2.0
+                error = np.abs(mid_values - linear)
+                other = tuple(a for a in range(values.ndim - 1) if a != k)
+                interval_error = error.max(axis=other)                           # (intervals, outputs)
+                axis_errors[k] = interval_error.max(axis=0)
+                split = np.flatnonzero((interval_error / tol).max(axis=1) > 1.0)
+                new_size = values[..., 0].size // len(knots[k]) * (len(knots[k]) + len(split))
+                if len(split) == 0 or new_size > max_points:
+                    continue
+                # insert the midpoints after the left knot of every split interval
+                values = np.insert(values, split + 1, np.take(mid_values, split, axis=k), axis=k)
+                knots[k] = np.insert(knots[k], split + 1, mids[split])
+                splits += len(split)
+            if verbose:
+                print(f"round {round_ + 1}: grid {tuple(len(k) for k in knots)}, {splits} intervals split, "
+                      f"{evaluations} evaluations")
+            if splits == 0:
+                converged = bool(np.all(axis_errors <= tol))
+                break
+
+        surface = cls(dict(zip(names, knots)), values, SURROGATE_TARGETS, fixed)
+        # error estimate at random points against the sampler
+        rng = np.random.default_rng(seed)
+        sample = {name: rng.uniform(k[0], k[-1], validation_points) for name, k in zip(names, knots)}
+        truth = np.asarray(sampler(dict(sample, **{name: np.full(validation_points, float(v))
+                                                   for name, v in fixed.items()})), dtype=float)
+        error = np.abs(surface(sample) - truth)
+        evaluations += validation_points
+
+        surface.meta = {
+            'outputs': SURROGATE_TARGETS,
+            'tolerance': tol.tolist(),
+            'converged': converged,
+            'error_bound': axis_errors.sum(axis=0).tolist(),
+            'axis_errors': {name: e.tolist() for name, e in zip(names, axis_errors)},
+            'validation_max_error': error.max(axis=0).tolist(),
+            'validation_rms_error': np.sqrt((error ** 2).mean(axis=0)).tolist(),
+            'evaluations': evaluations,
+            'build_seconds': time.perf_counter() - started,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        return surface
+
+    def save(self, path, **meta):
+        """Write values.npy (memory-mappable) and meta.json into the directory path."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, VALUES_FILE + '.tmp.npy'), np.ascontiguousarray(self.values))
+        os.replace(os.path.join(path, VALUES_FILE + '.tmp.npy'), os.path.join(path, VALUES_FILE))
+        self.meta.update(meta)
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump(dict(self.meta, axes={n: k.tolist() for n, k in zip(self.names, self.knots)},
+                           outputs=self.outputs, fixed=self.fixed), f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(path, VALUES_FILE), mmap_mode=mmap_mode)
+        axes = meta.pop('axes')
+        return cls(axes, values, meta.pop('outputs'), meta.pop('fixed'), meta)
+
+
+_surfaces = {}
+_surfaces_lock = threading.Lock()
+
+
+def surface_for(topology, root=None):
+    """
+    The stored response surface of a topology id (e.g. 'totem-pole-pfc'),
+    memory-mapped on first use and shared afterwards; None when not tabulated.
+    """
+    path = os.path.join(root or Config.RESPONSE_SURFACE_PATH, topology)
+    surface = _surfaces.get(path)
+    if surface is None and os.path.exists(os.path.join(path, META_FILE)):
+        with _surfaces_lock:
+            surface = _surfaces.get(path)
+            if surface is None:
+                surface = _surfaces[path] = ResponseSurface.load(path)
+    return surface
+
+
+def _tolerance_arg(text):
+    """argparse type of --tolerance: OUTPUT=VALUE, e.g. peak_temp=1.0."""
+    name, sep, value = text.partition('=')
+    if not sep or name not in DEFAULT_TOLERANCE:
+        raise argparse.ArgumentTypeError(f"expected OUTPUT=VALUE with OUTPUT one of {list(DEFAULT_TOLERANCE)}")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tabulate the response surface of a topology')
+    parser.add_argument('--topology', default='totem-pole-pfc')
+    parser.add_argument('--source', default='simulator', choices=['simulator', 'surrogate'])
+    parser.add_argument('--model', default='pfc', help='Registry model used with --source surrogate')
+    parser.add_argument('--tolerance', type=_tolerance_arg, action='append', default=[], metavar='OUTPUT=VALUE',
+                        help=f'Largest interpolation error of an output (repeatable), defaults {DEFAULT_TOLERANCE}')
+    parser.add_argument('--max-points', type=int, default=20000)
+    parser.add_argument('--max-rounds', type=int, default=8)
+    parser.add_argument('--validation-points', type=int, default=500)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    if args.source == 'simulator':
+        sampler = simulator_sampler(args.topology)
+    else:
+        from backend.ai.inference.model_registry import ModelRegistry
+        sampler = surrogate_sampler(ModelRegistry().predictor(args.model))
+    surface = ResponseSurface.build(sampler, tolerance=dict(args.tolerance), max_points=args.max_points,
+                                    max_rounds=args.max_rounds, validation_points=args.validation_points)
+    surface.save(os.path.join(args.output or Config.RESPONSE_SURFACE_PATH, args.topology),
+                 topology=args.topology, source=args.source)
+    print(json.dumps({k: surface.meta[k] for k in ('converged', 'error_bound', 'validation_max_error',
+                                                    'evaluations', 'build_seconds')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
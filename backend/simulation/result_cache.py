@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def canonicalize(value, significant_digits=6):
+    """
+    Canonical form of a request parameter structure.
+
+    Dict keys are sorted, strings stripped, and numbers (ints and floats alike)
+    rounded to the given significant digits, so that 220, 220.0 and
+    220.0000001 address the same cache entry.
+    """
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v, significant_digits) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v, significant_digits) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        quantized = float(f"{float(value):.{significant_digits}g}")
+        return 0.0 if quantized == 0 else quantized
+    if isinstance(value, str):
+        return value.strip()
+    return str(value)
+
+
+def cache_key(params, significant_digits=6, namespace=''):
+    """sha256 of the canonicalized, quantized parameters (content address of a result)."""
+    canonical = json.dumps(canonicalize(params, significant_digits), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{namespace}|{canonical}".encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None, significant_digits=6):
+        """
+        LRU cache of serialized results with a memory budget and an optional disk tier.
+
+        Values are bytes (e.g. an encoded response body) so that a hit is
+        returned without re-serialization. Entries evicted from memory stay on
+        disk and are promoted again on their next hit.
+
+        Parameters:
+        max_bytes (int): Memory budget for the cached values.
+        disk_dir (str): Directory of the on-disk tier, None for memory only.
+        significant_digits (int): Quantization of numeric parameters in the key.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.significant_digits = significant_digits
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compute_seconds = 0.0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def key(self, params, namespace=''):
+        return cache_key(params, self.significant_digits, namespace)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + '.bin')
+
+    def _store(self, key, value):
+        """Insert into the memory tier (lock held) and evict down to the budget."""
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += len(value)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, key):
+        """Cached bytes for a key, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    value = f.read()
+                with self._lock:
+                    self._store(key, value)
+                    self.disk_hits += 1
+                return value
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(value)
+            os.replace(path + '.tmp', path)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return (value, hit). On a miss compute() is called once, also when the
+        same key is requested concurrently; the other callers wait for it.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            event.wait()
+            value = self.get(key)
+            if value is not None:
+                return value, True
+        try:
+            with self._lock:
+                self.misses += 1
+            start = time.perf_counter()
+            value = compute()
+            self.compute_seconds += time.perf_counter() - start
+            self.put(key, value)
+            return value, False
+        finally:
+            if owner:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.disk_dir:
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if name.endswith('.bin'):
+                        os.remove(os.path.join(root, name))
+
+    def metrics(self):
+        """Hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'diskHits': self.disk_hits,
+                'misses': self.misses,
+                'hitRate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'diskTier': bool(self.disk_dir),
+                'computeSeconds': round(self.compute_seconds, 3),
+            }
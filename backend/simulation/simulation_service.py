@@ -0,0 +1,176 @@
+import time
+
+import numpy as np
+
+from backend.simulation.pfc_engine import simulate_pfc, waveform_metrics, resolve_topology, peak_temperature
+from backend.simulation.thermal_simulator import ThermalNetwork
+from backend.simulation.electrothermal import efficiency_map
+
+# PWM periods shown in the switching-signal trace
+SWITCHING_PERIODS_SHOWN = 5
+# Load (fraction of loadPower) over the thermal history, one level per interval
+LOAD_PROFILE = [0.5, 0.6, 0.8, 1.0, 1.0, 0.9, 0.7, 0.8, 1.0, 1.1, 0.9, 0.8]
+# Split of the converter loss between the power devices; the controller draws a fixed bias power (W)
+LOSS_SHARES = {'mosfet': 0.55, 'diode': 0.3, 'inductor': 0.15}
+CONTROLLER_POWER = 0.8
+
+
+def engine_parameters(params):
+    """
+    Translate the frontend simulation parameters into pfc_engine parameters.
+
+    The frontend uses inductorValue in mH, capacitorValue in µF,
+    switchingFrequency in kHz and the topology ids of /api/topology
+    (e.g. 'totem-pole-pfc').
+
+    Returns:
+    tuple: (parameter dict, topology key). Raises ValueError for topologies
+    the PFC engine does not model.
+    """
+    topology = resolve_topology(params.get('topology', 'boost'))
+    engine = {
+        'input_voltage': float(params.get('inputVoltage', 220)),
+        'output_voltage': float(params.get('outputVoltage', 400)),
+        'load_power': float(params.get('loadPower', 1000)),
+        'inductor_value': float(params.get('inductorValue', 0.5)) * 1e-3,
+        'switching_freq': float(params.get('switchingFrequency', 100)) * 1e3,
+    }
+    if 'capacitorValue' in params:
+        engine['capacitor_value'] = float(params['capacitorValue']) * 1e-6  # µF
+    for name, key in (('lineFrequency', 'line_frequency'), ('kp', 'kp'), ('ki', 'ki'), ('kd', 'kd')):
+        if name in params:
+            engine[key] = float(params[name])
+    return engine, topology
+
+
+def format_metrics(metrics):
+    """
+    The frontend metrics block (efficiency and THD in %, power factor, peak
+    temperature in °C) from engine-named values (efficiency, thd, power_factor,
+    peak_temp), e.g. a simulation result or one row of surrogate predictions.
+    """
+    return {
+        'efficiency': round(100 * float(metrics['efficiency']), 2),
+        'thd': round(100 * float(metrics['thd']), 2),
+        'powerFactor': round(float(metrics['power_factor']), 3),
+        'peakTemp': round(float(metrics['peak_temp']), 1),
+    }
+
+
+def run_simulation(params, line_cycles=3):
+    """
+    Switching-level simulation for one set of frontend parameters.
+
+    Returns:
+    dict: 'metrics' (efficiency %, THD %, power factor, peak temperature,
+    simulation time in ms), 'axes' (shared time arrays) and 'waveforms'
+    (full-resolution traces over the last line cycle plus a few PWM periods
+    of the switching signal, each naming its time axis).
+    """
+    start = time.perf_counter()
+    engine, topology = engine_parameters(params)
+    line_frequency = engine.get('line_frequency', 50.0)
+    duration = line_cycles / line_frequency
+    result = simulate_pfc(engine, topology=topology, mode='switched', duration=duration)
+    metrics = {k: float(v[0]) for k, v in waveform_metrics(result, np.array([line_frequency]), duration).items()}
+
+    t = result['time'][0]
+    line = t >= duration - 1.0 / line_frequency
+
+    # gate signal from the inductor current slope around the line voltage peak
+    period = 1.0 / engine['switching_freq']
+    peak = duration - 0.75 / line_frequency
+    zoom = (t >= peak) & (t < peak + SWITCHING_PERIODS_SHOWN * period)
+    rising = np.diff(result['current'][0], prepend=result['current'][0, 0])[zoom] > 0
+
+    metrics['peak_temp'] = peak_temperature(float(params.get('temperature', 25)), engine['load_power'],
+                                            metrics['efficiency'])
+    return {
+        'metrics': dict(format_metrics(metrics), simulationTime=round(1000 * (time.perf_counter() - start))),
+        'axes': {
+            'line': t[line],
+            'switching': t[zoom] - peak,
+        },
+        'waveforms': {
+            'voltage': {'axis': 'line', 'values': result['voltage'][0, line], 'reference': engine['output_voltage']},
+            'current': {'axis': 'line', 'values': result['current'][0, line], 'reference': 0.0},
+            'switchingSignal': {'axis': 'switching', 'values': np.where(rising, 1.0, 0.0)},
+        },
+    }
+
+
+def thermal_history(params, interval=300.0, time_step=1.0, line_cycles=3):
+    """
+    Device temperatures over a load profile from the transient thermal networks.
+
+    The converter loss at every LOAD_PROFILE level comes from one vectorized
+    averaged-model run; the losses are held for `interval` seconds each and fed
+    through the Foster networks of the MOSFET, diode, inductor and controller.
+
+    Returns:
+    list: One dict per interval (seconds from the start and temperatures in °C
+    at its end), in the keys of /api/thermal/data.
+    """
+    engine, topology = engine_parameters(params)
+    ambient = float(params.get('ambientTemp', params.get('temperature', 25)))
+    levels = np.asarray(LOAD_PROFILE)
+    line_frequency = engine.get('line_frequency', 50.0)
+    duration = line_cycles / line_frequency
+    batch = {k: np.full(len(levels), v) for k, v in engine.items()}
+    batch['load_power'] = engine['load_power'] * levels
+    result = simulate_pfc(batch, topology=topology, mode='averaged', duration=duration)
+    efficiency = waveform_metrics(result, np.full(len(levels), line_frequency), duration)['efficiency']
+    loss = batch['load_power'] * (1.0 / np.maximum(efficiency, 1e-6) - 1.0)
+
+    network = ThermalNetwork()
+    per_interval = int(round(interval / time_step))
+    power = np.zeros((len(network.devices), len(levels)))
+    for d, device in enumerate(network.devices):
+        power[d] = CONTROLLER_POWER if device == 'controller' else LOSS_SHARES[device] * loss
+    temperatures = network.simulate(np.repeat(power, per_interval, axis=1), time_step, ambient)
+    ends = temperatures[:, per_interval - 1::per_interval]
+
+    history = []
+    for k in range(len(levels)):
+        point = {f'{device}Temp': round(float(ends[d, k]), 1) for d, device in enumerate(network.devices)}
+        point.update({
+            'elapsed': (k + 1) * interval,
+            'temperature': max(point[f'{device}Temp'] for device in LOSS_SHARES),
+            'ambientTemp': ambient,
+            'loadPower': round(float(batch['load_power'][k]), 1),
+        })
+        history.append(point)
+    return history
+
+
+def efficiency_map_request(params):
+    """
+    Electro-thermal efficiency map for frontend parameters.
+
+    loadPower (W), inputVoltage (V rms) and ambientTemp (°C) may each be a
+    list (grid axis) or a scalar; the other fields are the usual simulation
+    parameters.
+
+    Returns:
+    dict: The axes plus 'efficiency' (%), 'mosfetTemp', 'diodeTemp',
+    'inductorTemp' (°C) and 'converged' as nested lists [load][vin][ambient].
+    """
+    start = time.perf_counter()
+    engine, topology = engine_parameters({k: v for k, v in params.items()
+                                          if k not in ('loadPower', 'inputVoltage')})
+    default_load, default_voltage = engine.pop('load_power'), engine.pop('input_voltage')
+    loads = params.get('loadPower', default_load)
+    voltages = params.get('inputVoltage', default_voltage)
+    ambients = params.get('ambientTemp', params.get('temperature', 25))
+    result = efficiency_map(loads, voltages, ambients, engine, topology=topology)
+    return {
+        'loadPower': result['loadPower'].tolist(),
+        'inputVoltage': result['inputVoltage'].tolist(),
+        'ambientTemp': result['ambientTemp'].tolist(),
+        'efficiency': np.round(100 * result['efficiency'], 2).tolist(),
+        'mosfetTemp': np.round(result['mosfetTemp'], 1).tolist(),
+        'diodeTemp': np.round(result['diodeTemp'], 1).tolist(),
+        'inductorTemp': np.round(result['inductorTemp'], 1).tolist(),
+        'converged': result['converged'].tolist(),
+        'simulationTime': round(1000 * (time.perf_counter() - start)),
+    }
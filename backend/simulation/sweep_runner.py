@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backend.config.settings import Config
+from backend.simulation.pfc_engine import simulate_batch, FEATURE_COLUMNS
+
+# Parameter ranges of the training set (see notebooks/dataGenarate.ipynb)
+FEATURE_RANGES = {
+    'input_voltage': (176, 265),
+    'load_current': (0.1, 8.25),
+    'ambient_temp': (25, 55),
+    'inductor_value': (100e-6, 500e-6),
+    'capacitor_value': (100e-6, 1000e-6),
+    'switching_freq': (70e3, 120e3),
+    'kp': (0.01, 0.5),
+    'ki': (1, 100),
+    'kd': (0, 0.01),
+    'zbf': (0, 1),
+    'compval': (0, 0.2),
+}
+
+
+def _scale(unit, ranges):
+    """Map unit-cube samples (n, d) onto the given {name: (low, high)} ranges."""
+    low = np.array([bounds[0] for bounds in ranges.values()], dtype=float)
+    high = np.array([bounds[1] for bounds in ranges.values()], dtype=float)
+    return pd.DataFrame(low + unit * (high - low), columns=list(ranges))
+
+
+def grid_samples(levels):
+    """
+    Full factorial grid.
+
+    Parameters:
+    levels (dict): Parameter name -> list of values.
+
+    Returns:
+    DataFrame: One row per grid point.
+    """
+    mesh = np.meshgrid(*[np.asarray(values, dtype=float) for values in levels.values()], indexing='ij')
+    return pd.DataFrame({name: axis.ravel() for name, axis in zip(levels, mesh)})
+
+
+def latin_hypercube_samples(ranges, n_samples, seed=42):
+    """
+    Latin hypercube sample: every parameter range is split into n_samples strata
+    and each stratum is hit exactly once.
+    """
+    rng = np.random.default_rng(seed)
+    d = len(ranges)
+    strata = np.argsort(rng.random((n_samples, d)), axis=0)
+    unit = (strata + rng.random((n_samples, d))) / n_samples
+    return _scale(unit, ranges)
+
+
+def sobol_samples(ranges, n_samples, seed=42):
+    """Scrambled Sobol sequence (requires scipy)."""
+    try:
+        from scipy.stats import qmc
+    except ImportError as exc:
+        raise ImportError("Sobol sampling requires scipy (pip install scipy)") from exc
+    sampler = qmc.Sobol(d=len(ranges), scramble=True, seed=seed)
+    return _scale(sampler.random(n_samples), ranges)
+
+
+def _simulate_chunk(chunk_id, samples, columns, chunk_path, simulate_kwargs):
+    """Worker: simulate one chunk and write it atomically, so a chunk file exists only when complete."""
+    metrics = simulate_batch(samples, columns=columns, **simulate_kwargs)
+    frame = pd.DataFrame(samples, columns=columns)
+    for name in metrics.columns:
+        frame[name] = metrics[name].values
+    tmp_path = chunk_path + '.tmp'
+    frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, chunk_path)
+    return chunk_id, len(frame)
+
+
+class SweepRunner:
+    def __init__(self, samples, name='sweep', output_dir=None, chunk_size=None, workers=None,
+                 **simulate_kwargs):
+        """
+        Sharded, resumable parameter sweep over a process pool.
+
+        Parameters:
+        samples (DataFrame): One parameter set per row (FEATURE_COLUMNS by default).
+        name (str): Sweep name; results go to <output_dir>/<name>/.
+        output_dir (str): Results root, defaults to Config.SIMULATION_RESULTS_PATH.
+        chunk_size (int): Rows per chunk file, defaults to Config.SWEEP_CHUNK_SIZE.
+        workers (int): Worker processes, defaults to Config.SWEEP_WORKERS.
+        **simulate_kwargs: Passed to simulate_batch (topology, mode, line_cycles ...).
+        """
+        self.samples = samples.reset_index(drop=True)
+        self.columns = list(self.samples.columns)
+        self.output_dir = os.path.join(output_dir or Config.SIMULATION_RESULTS_PATH, name)
+        self.chunk_size = chunk_size or Config.SWEEP_CHUNK_SIZE
+        self.workers = workers or Config.SWEEP_WORKERS
+        self.simulate_kwargs = simulate_kwargs
+        self.n_chunks = int(np.ceil(len(self.samples) / self.chunk_size))
+
+    def _fingerprint(self):
+        """Hash of the sampling plan and settings, guards against resuming a different sweep."""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(self.samples.values, dtype=float).tobytes())
+        digest.update(json.dumps([self.columns, self.chunk_size, self.simulate_kwargs],
+                                 sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def chunk_path(self, chunk_id):
+        return os.path.join(self.output_dir, f'chunk_{chunk_id:05d}.csv')
+
+    def _prepare(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest_path = os.path.join(self.output_dir, 'manifest.json')
+        fingerprint = self._fingerprint()
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest['fingerprint'] != fingerprint:
+                raise ValueError(f"{self.output_dir} holds a different sweep; choose another name")
+        else:
+            manifest = {
+                'fingerprint': fingerprint,
+                'n_samples': len(self.samples),
+                'chunk_size': self.chunk_size,
+                'n_chunks': self.n_chunks,
+                'columns': self.columns,
+                'simulate_kwargs': self.simulate_kwargs,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+            with open(manifest_path, 'w') as f:
+                json.dump(manifest, f, indent=2, default=str)
+
+    def completed_chunks(self):
+        """Chunk ids whose result file has been written."""
+        return [chunk_id for chunk_id in range(self.n_chunks) if os.path.exists(self.chunk_path(chunk_id))]
+
+    def iter_progress(self):
+        """
+        Run the missing chunks and yield a progress dict after each one.
+
+        Keys: completed/total points, chunks done, points_per_second (this
+        session) and eta_seconds.
+        """
+        self._prepare()
+        done = set(self.completed_chunks())
+        pending = [chunk_id for chunk_id in range(self.n_chunks) if chunk_id not in done]
+        completed = sum(min(self.chunk_size, len(self.samples) - c * self.chunk_size) for c in done)
+        total = len(self.samples)
+        started = time.perf_counter()
+        processed = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = []
+            for chunk_id in pending:
+                rows = self.samples.values[chunk_id * self.chunk_size:(chunk_id + 1) * self.chunk_size]
+                futures.append(pool.submit(_simulate_chunk, chunk_id, rows, self.columns,
+                                           self.chunk_path(chunk_id), self.simulate_kwargs))
+            for future in as_completed(futures):
+                chunk_id, rows = future.result()
+                done.add(chunk_id)
+                processed += rows
+                completed += rows
+                elapsed = time.perf_counter() - started
+                rate = processed / elapsed if elapsed > 0 else 0.0
+                yield {
+                    'chunk': chunk_id,
+                    'chunks_done': len(done),
+                    'chunks_total': self.n_chunks,
+                    'completed': completed,
+                    'total': total,
+                    'points_per_second': rate,
+                    'eta_seconds': (total - completed) / rate if rate > 0 else float('inf'),
+                }
+
+    def run(self, verbose=True):
+        """Run the sweep to completion and return the merged results."""
+        for progress in self.iter_progress():
+            if verbose:
+                print(f"[{progress['chunks_done']}/{progress['chunks_total']}] "
+                      f"{progress['completed']}/{progress['total']} points, "
+                      f"{progress['points_per_second']:.0f} points/s, "
+                      f"ETA {progress['eta_seconds']:.0f}s")
+        return self.load_results()
+
+    def load_results(self):
+        """Concatenate all completed chunk files."""
+        frames = [pd.read_csv(self.chunk_path(chunk_id)) for chunk_id in self.completed_chunks()]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+
+# Example usage
+if __name__ == "__main__":
+    samples = latin_hypercube_samples(FEATURE_RANGES, n_samples=20000)
+    runner = SweepRunner(samples[FEATURE_COLUMNS], name='lhs_20k', chunk_size=1000)
+    results = runner.run()
+    print(results.describe())
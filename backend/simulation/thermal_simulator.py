@@ -1,21 +1,174 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Junction(hot spot)-to-ambient Foster networks, (R in °C/W, tau in s) per element.
+# Fast elements are die and package, slow ones heatsink / core and board.
+DEVICE_NETWORKS = {
+    'mosfet': [(0.04, 2e-4), (0.16, 5e-3), (0.5, 0.3), (0.8, 40.0)],
+    'diode': [(0.06, 2e-4), (0.24, 5e-3), (0.6, 0.4), (0.8, 40.0)],
+    'inductor': [(1.2, 30.0), (2.3, 400.0)],
+    'controller': [(8.0, 2.0), (22.0, 120.0)],
+}
+
+
+def cauer_to_foster(resistances, capacitances):
+    """
+    Equivalent Foster network of a Cauer ladder.
+
+    The ladder has node i connected to node i+1 through R_i, a capacitance C_i
+    from every node to ambient and the last node tied to ambient through the
+    last resistance; power is injected at node 0 (the junction). With
+    G the conductance matrix, the junction impulse response is
+    e1' exp(-C^-1 G t) C^-1 e1, whose modal expansion gives the Foster terms.
+
+    Returns:
+    list: (R, tau) pairs.
+    """
+    r = np.asarray(resistances, dtype=float)
+    c = np.asarray(capacitances, dtype=float)
+    g = 1.0 / r
+    n = len(r)
+    G = np.diag(g.copy())
+    G[np.arange(1, n), np.arange(1, n)] += g[:-1]
+    G[np.arange(n - 1), np.arange(1, n)] = -g[:-1]
+    G[np.arange(1, n), np.arange(n - 1)] = -g[:-1]
+    # symmetric form S = C^-1/2 G C^-1/2 has real eigenvalues 1/tau_i
+    scale = 1.0 / np.sqrt(c)
+    eigenvalues, vectors = np.linalg.eigh(scale[:, None] * G * scale[None, :])
+    weights = vectors[0] ** 2 / c[0]
+    return [(float(w / lam), float(1.0 / lam)) for w, lam in zip(weights, eigenvalues)]
+
+
+class ThermalNetwork:
+    def __init__(self, networks=None):
+        """
+        Foster RC networks of several devices, solved together.
+
+        Parameters:
+        networks (dict): device -> list of (R, tau) Foster elements; defaults to
+            DEVICE_NETWORKS. Use cauer_to_foster for Cauer ladders.
+        """
+        networks = networks or DEVICE_NETWORKS
+        self.devices = list(networks)
+        size = max(len(elements) for elements in networks.values())
+        # (devices, elements), zero-padded; a zero R element contributes nothing
+        self.R = np.zeros((len(self.devices), size))
+        self.tau = np.ones((len(self.devices), size))
+        for d, elements in enumerate(networks.values()):
+            for e, (r, tau) in enumerate(elements):
+                self.R[d, e] = r
+                self.tau[d, e] = tau
+
+    @classmethod
+    def from_cauer(cls, ladders):
+        """ladders: device -> list of (R, C) Cauer elements, junction first."""
+        return cls({name: cauer_to_foster(*zip(*ladder)) for name, ladder in ladders.items()})
+
+    @property
+    def thermal_resistance(self):
+        """Steady-state junction-to-ambient resistance per device."""
+        return self.R.sum(axis=1)
+
+    def step_response(self, t):
+        """Thermal impedance Z_th(t) per device, shape (devices, len(t))."""
+        t = np.asarray(t, dtype=float)
+        return (self.R[..., None] * (1.0 - np.exp(-t / self.tau[..., None]))).sum(axis=1)
+
+    def steady_state(self, power, ambient=25.0):
+        """Junction temperatures for constant losses of shape (..., devices)."""
+        return np.asarray(ambient)[..., None] + np.asarray(power) * self.thermal_resistance
+
+    def simulate(self, power, time_step, ambient=25.0, initial='steady'):
+        """
+        Junction temperatures for time-varying losses.
+
+        Every Foster element is discretized exactly for piecewise-constant
+        power (x[k] = a x[k-1] + R (1 - a) P[k], a = exp(-dt / tau)), so the
+        response to the whole loss sequence is a convolution with the sampled
+        impulse response, evaluated by FFT for all devices and scenarios at once.
+
+        Parameters:
+        power (array-like): Losses in W, shape (..., devices, steps); leading
+            axes are independent scenarios.
+        time_step (float): Step of the loss samples in seconds.
+        ambient (float or array-like): Ambient temperature, broadcastable to
+            (..., steps) or (...,).
+        initial (str): 'steady' starts from the steady state of the first loss
+            sample, 'ambient' from a cold network and 'periodic' returns the
+            periodic steady state for losses that repeat with the sequence
+            (e.g. one line cycle).
+
+        Returns:
+        np.ndarray: Junction temperatures at the end of every step, shape (..., devices, steps).
+        """
+        power = np.asarray(power, dtype=float)
+        steps = power.shape[-1]
+        decay = np.exp(-time_step / self.tau)                      # (devices, elements)
+        gain = self.R * (1.0 - decay)
+        k = np.arange(steps)
+        # impulse response h[m] = sum_i R_i (1 - a_i) a_i^m, shape (devices, steps)
+        h = (gain[..., None] * decay[..., None] ** k).sum(axis=1)
+
+        n_fft = 1 << int(np.ceil(np.log2(2 * steps)))
+        rise = np.fft.irfft(np.fft.rfft(power, n_fft, axis=-1) * np.fft.rfft(h, n_fft, axis=-1),
+                            n_fft, axis=-1)[..., :steps]
+        if initial == 'steady':
+            # element states R_i * P[0] before the first step, decaying as a_i^(k+1)
+            x0 = self.R * power[..., :1]                            # (..., devices, elements)
+            rise += (x0[..., None] * (decay[..., None] ** (k + 1))).sum(axis=-2)
+        elif initial == 'periodic':
+            # state at the end of one period from rest, then x0 = x_end / (1 - a^steps)
+            weights = decay[..., None] ** (steps - 1 - k)           # (devices, elements, steps)
+            x_end = gain * np.einsum('...dk,dek->...de', power, weights)
+            x0 = x_end / (1.0 - decay ** steps)
+            rise += (x0[..., None] * (decay[..., None] ** (k + 1))).sum(axis=-2)
+        elif initial != 'ambient':
+            raise ValueError(f"Unknown initial condition: {initial}")
+
+        ambient = np.asarray(ambient, dtype=float)
+        if ambient.ndim and ambient.shape[-1] == steps:
+            ambient = ambient[..., None, :]
+        else:
+            ambient = ambient[..., None, None]
+        return ambient + rise
+
+
 class ThermalSimulator:
-    def __init__(self, power_loss, thermal_resistance, ambient_temperature):
+    def __init__(self, power_loss, thermal_resistance, ambient_temperature, thermal_capacitance=None):
         self.power_loss = power_loss  # Power loss in watts
         self.thermal_resistance = thermal_resistance  # Thermal resistance in °C/W
         self.ambient_temperature = ambient_temperature  # Ambient temperature in °C
+        self.thermal_capacitance = thermal_capacitance  # Thermal capacitance in J/°C (None: steady state only)
 
     def calculate_junction_temperature(self):
         """Calculate the junction temperature based on power loss and thermal resistance."""
         junction_temperature = self.ambient_temperature + (self.power_loss * self.thermal_resistance)
         return junction_temperature
 
+    def network(self):
+        """Single-element Foster network of this simulator."""
+        tau = self.thermal_resistance * (self.thermal_capacitance or 0.0)
+        return ThermalNetwork({'device': [(self.thermal_resistance, max(tau, 1e-12))]})
+
+    def temperature_profile(self, time_duration, time_step, power_loss=None):
+        """
+        Junction temperature over time, starting at ambient.
+
+        Parameters:
+        power_loss (array-like): Loss per time point; defaults to the constant power_loss.
+
+        Returns:
+        tuple: (time points, temperatures)
+        """
+        time_points = np.arange(0, time_duration, time_step)
+        power = np.broadcast_to(self.power_loss if power_loss is None else power_loss, time_points.shape)
+        temperatures = self.network().simulate(power[None, :], time_step, self.ambient_temperature,
+                                               initial='ambient')[0]
+        return time_points, temperatures
+
     def plot_temperature_profile(self, time_duration, time_step):
         """Plot the temperature profile over time."""
-        time_points = np.arange(0, time_duration, time_step)
-        temperatures = [self.calculate_junction_temperature() for _ in time_points]
+        time_points, temperatures = self.temperature_profile(time_duration, time_step)
 
         plt.figure(figsize=(10, 5))
         plt.plot(time_points, temperatures, label='Junction Temperature', color='red')
@@ -29,6 +182,12 @@ class ThermalSimulator:
 
 # Example usage
 if __name__ == "__main__":
-    simulator = ThermalSimulator(power_loss=10, thermal_resistance=1.5, ambient_temperature=25)
+    simulator = ThermalSimulator(power_loss=10, thermal_resistance=1.5, ambient_temperature=25, thermal_capacitance=10)
     print(f"Calculated Junction Temperature: {simulator.calculate_junction_temperature()} °C")
-    simulator.plot_temperature_profile(time_duration=60, time_step=1)
\ No newline at end of file
+    simulator.plot_temperature_profile(time_duration=60, time_step=1)
+
+    network = ThermalNetwork()
+    t = np.arange(3600.0)
+    losses = np.stack([8 + 4 * (t > 1200), 3 + 1.5 * (t > 1200), 4 + 2 * (t > 1200), np.full_like(t, 0.8)])
+    temperatures = network.simulate(losses, time_step=1.0, ambient=25.0)
+    print(dict(zip(network.devices, temperatures[:, -1].round(1))))
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.models.pfc_model import PFCModel
+from backend.ai.inference.compiled_mlp import CompiledMLP, export_mlp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODEL_PATH = os.path.join(ROOT, 'models', 'trained_pfc_model.pkl')
+DATA_PATH = os.path.join(ROOT, 'data', 'training', 'pfc_buck_data.csv')
+
+pytestmark = pytest.mark.filterwarnings('ignore::UserWarning')
+
+
+@pytest.fixture(scope='module')
+def model():
+    model = PFCModel()
+    model.load_model(MODEL_PATH)
+    return model
+
+
+@pytest.fixture(scope='module')
+def features():
+    return pd.read_csv(DATA_PATH).drop(columns='target_variable').to_numpy(dtype=float)
+
+
+@pytest.mark.parametrize('fused', [False, True])
+def test_compiled_matches_model_on_training_rows(model, features, fused):
+    expected = model.predict(features)
+    actual = CompiledMLP.from_model(model).predict(features, fused=fused)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+
+
+def test_fused_workspace_reuse_and_single_rows(model, features):
+    compiled = CompiledMLP.from_model(model)
+    expected = model.predict(features[:64])
+    for _ in range(2):
+        np.testing.assert_allclose(compiled.predict(features[:64], fused=True), expected, rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(compiled.predict(features[0]), expected[:1], rtol=1e-4, atol=1e-5)
+
+
+def test_export_round_trip(model, features, tmp_path):
+    path = str(tmp_path / 'pfc_model.npz')
+    export_mlp(model, path, X=features)
+    loaded = CompiledMLP.load(path)
+    np.testing.assert_allclose(loaded.predict(features), model.predict(features), rtol=1e-4, atol=1e-5)
@@ -0,0 +1,64 @@
+import numpy as np
+
+from backend.ai.models.pfc_environment import PFCControlEnv
+from backend.ai.models.reinforcement_learning import ReinforcementLearningPFC
+
+
+def episode_return(policy, n_envs=512, seed=0):
+    """Mean return and trip count of one episode per environment under policy(observations)."""
+    env = PFCControlEnv(n_envs=n_envs, seed=seed)
+    observations = env.reset()
+    returns = np.zeros(n_envs)
+    alive = np.ones(n_envs, dtype=bool)
+    trips = 0
+    while alive.any():
+        observations, rewards, terminated, truncated = env.step(policy(observations))
+        returns += rewards * alive
+        trips += int((terminated & alive).sum())
+        alive &= ~(terminated | truncated)
+    return returns.mean(), trips
+
+
+def regulating_policy(observations):
+    """Steer the current amplitude towards the load balance, nudged by the bus error."""
+    error, mismatch = observations[:, 0], observations[:, 1]
+    actions = np.full(len(observations), 2)
+    actions[mismatch > 0.05] = 1
+    actions[mismatch > 0.2] = 0
+    actions[mismatch < -0.05] = 3
+    actions[mismatch < -0.2] = 4
+    actions[(error < -0.02) & (mismatch < 0.1)] = 3
+    actions[(error > 0.02) & (mismatch > -0.1)] = 1
+    return actions
+
+
+def test_trip_is_charged_for_the_remaining_horizon():
+    env = PFCControlEnv(n_envs=64, seed=0)
+    env.reset()
+    while True:
+        _, rewards, terminated, _ = env.step(np.full(env.n_envs, 4))
+        if terminated.any():
+            break
+    remaining = env.max_steps - env.steps[terminated]
+    assert np.all(rewards[terminated] <= -env.trip_cost * (remaining + 1))
+
+
+def test_regulating_beats_tripping():
+    regulated, regulated_trips = episode_return(regulating_policy)
+    assert regulated_trips < 10
+    for action in (0, 2, 4):
+        tripping, trips = episode_return(lambda observations: np.full(len(observations), action))
+        assert trips > 0
+        assert regulated > tripping
+    rng = np.random.default_rng(0)
+    assert regulated > episode_return(lambda observations: rng.integers(0, 5, len(observations)))[0]
+
+
+def test_learned_policy_beats_tripping():
+    # environment and exploration are both seeded, so the run is deterministic
+    agent = ReinforcementLearningPFC(learning_rate=0.1, env=PFCControlEnv(n_envs=1024, seed=3), seed=0)
+    agent.train(10000, exploration_rate_decay=0.999)
+    learned, trips = episode_return(agent.policy)
+    always_max, _ = episode_return(lambda observations: np.full(len(observations), 4))
+    assert learned > always_max
+    assert trips < 10